@@ -0,0 +1,129 @@
+"""
+DocuMind Active Index
+Which vector index serves a collection, and the embedding model and output
+dimension it was built with, recorded in a small JSON file next to the
+indexes so every worker follows a re-embedding cutover (backend.reembed).
+Also provides the cross-process locks: one that holds index writes back
+while a cutover happens, and one per source file that serializes its
+ingestion and deletion.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+from backend.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process write lock (run migrations with the server stopped)
+    fcntl = None
+
+
+class EmbeddingSpec(NamedTuple):
+    """Embedding model and output dimension"""
+
+    model: str
+    dimension: int
+
+    def request_params(self) -> Dict:
+        """Arguments for embeddings.create (text-embedding-3 models are asked for this many dimensions)."""
+        params = {'model': self.model}
+        if self.model.startswith("text-embedding-3"):
+            params['dimensions'] = self.dimension
+        return params
+
+
+def configured_spec() -> EmbeddingSpec:
+    """EMBEDDING_MODEL and EMBEDDING_DIMENSION from the config."""
+    return EmbeddingSpec(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION)
+
+
+class ActiveIndex:
+    """
+    Pointer file of one collection. Until a migration writes it, the
+    collection's own index and the configured embedding model are active.
+    """
+
+    def __init__(self, persist_directory: str, collection_name: str):
+        self.collection_name = collection_name
+        self.path = Path(persist_directory) / f"{collection_name}.active_index.json"
+        self._lock_path = Path(persist_directory) / f"{collection_name}.write.lock"
+        self._document_lock_dir = Path(persist_directory) / f"{collection_name}.locks"
+        self._local_locks: Dict[str, threading.Lock] = {}  # without fcntl: per-process document locks
+        self._local_locks_guard = threading.Lock()
+
+    def read(self) -> Tuple[str, EmbeddingSpec]:
+        """(index name, embedding spec) currently serving queries."""
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return self.collection_name, configured_spec()
+        return data['index'], EmbeddingSpec(data['model'], data['dimension'])
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """Changes whenever the pointer is rewritten (cheap to poll)."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def write(self, index_name: str, spec: EmbeddingSpec) -> None:
+        """Point the collection at another index (atomic replace)."""
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            'index': index_name,
+            'model': spec.model,
+            'dimension': spec.dimension,
+            'activated_at': time.time()
+        }))
+        os.replace(tmp, self.path)
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Shared lock held by index writes (many at once, across processes)."""
+        with self._flock(fcntl.LOCK_SH if fcntl else None):
+            yield
+
+    @contextmanager
+    def cutover(self) -> Iterator[None]:
+        """Exclusive lock: waits for running index writes and holds new ones back."""
+        with self._flock(fcntl.LOCK_EX if fcntl else None):
+            yield
+
+    @contextmanager
+    def document_lock(self, source_file: str) -> Iterator[None]:
+        """
+        Exclusive lock on one source file: its diff against the indexed
+        version, the writes and a rollback run under it, so two uploads (or an
+        upload and a delete) of the same file in any process don't interleave.
+        Not reentrant (see VectorStore.document_lock).
+        """
+        name = hashlib.sha1(source_file.encode('utf-8')).hexdigest()
+        if fcntl is None:
+            with self._local_locks_guard:
+                lock = self._local_locks.setdefault(name, threading.Lock())
+            with lock:
+                yield
+            return
+        with self._flock(fcntl.LOCK_EX, self._document_lock_dir / f"{name}.lock"):
+            yield
+
+    @contextmanager
+    def _flock(self, mode: Optional[int], path: Optional[Path] = None) -> Iterator[None]:
+        if mode is None:
+            yield
+            return
+        path = path or self._lock_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a+') as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
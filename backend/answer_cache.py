@@ -0,0 +1,153 @@
+"""
+DocuMind Answer Cache
+Two-tier cache of /query responses, scoped to a corpus version:
+exact hits on (normalized query, top_k, filters), and semantic hits when a
+cached question's embedding is close enough to the new one.
+"""
+
+import time
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
+from backend.config import settings
+from backend.query_cache import normalize_query
+
+
+@dataclass
+class _Entry:
+    """One cached response"""
+    version: str
+    top_k: int
+    scope: str  # query filters the answer was retrieved with ("" for none)
+    embedding: Optional[np.ndarray]  # unit-normalized query embedding (for the semantic tier)
+    response: Dict
+    expires_at: float
+
+
+class AnswerCache:
+    """Thread-safe LRU + TTL cache of answers, invalidated by corpus version"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, semantic_threshold: float = None):
+        """
+        Args:
+            max_entries: Cached answers kept (defaults to config)
+            ttl_seconds: Lifetime of an entry (defaults to config)
+            semantic_threshold: Min cosine similarity for a semantic hit
+                                (defaults to config, None/0 disables the semantic tier)
+        """
+        if max_entries is None:
+            max_entries = settings.ANSWER_CACHE_MAX_ENTRIES
+        if ttl_seconds is None:
+            ttl_seconds = settings.ANSWER_CACHE_TTL_SECONDS
+        if semantic_threshold is None:
+            semantic_threshold = settings.ANSWER_CACHE_SEMANTIC_THRESHOLD
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[Tuple[str, int, str], _Entry]" = OrderedDict()
+        self._version: Optional[str] = None  # corpus version the entries belong to
+        self._lock = threading.Lock()
+
+        # Counters (since process start)
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_exact(self, query_text: str, top_k: int, version: str, scope: str = "") -> Optional[Dict]:
+        """Return the cached response for this exact (normalized) question and filters, or None."""
+        key = (normalize_query(query_text), top_k, scope)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or not self._is_live(key, entry):
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.response
+
+    def get_semantic(self, query_embedding: List[float], top_k: int, version: str, scope: str = "") -> Optional[Dict]:
+        """
+        Return the response of the most similar cached question if it is within the threshold.
+        Counts a miss when nothing qualifies (call after get_exact).
+        """
+        if not self.semantic_threshold:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        query_vector = _unit(query_embedding)
+        with self._lock:
+            self._check_version(version)
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry.top_k == top_k and entry.scope == scope and entry.embedding is not None
+                and len(entry.embedding) == len(query_vector) and self._is_live(key, entry, evict=False)
+            ]
+            if candidates:
+                # One matrix-vector product scores every cached question at once
+                matrix = np.stack([entry.embedding for _, entry in candidates])
+                similarities = matrix @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.semantic_threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    return entry.response
+            self.misses += 1
+            return None
+
+    def put(self, query_text: str, top_k: int, version: str, query_embedding: Optional[List[float]], response: Dict,
+            scope: str = "") -> None:
+        """Cache a response computed against the given corpus version (and with the given filters)."""
+        key = (normalize_query(query_text), top_k, scope)
+        embedding = _unit(query_embedding) if query_embedding is not None else None
+        with self._lock:
+            if version != self._version:
+                return  # corpus changed while this answer was computed
+            self._entries[key] = _Entry(version, top_k, scope, embedding, response, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _check_version(self, version: str) -> None:
+        """Drop every entry when the corpus version moves on (caller holds the lock)."""
+        if self._version is None:
+            self._version = version
+        elif version != self._version:
+            # Lookups move the version; a late put() for another version is ignored
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def _is_live(self, key, entry: _Entry, evict: bool = True) -> bool:
+        """Whether an entry is unexpired (expired entries are removed when evict is set)."""
+        if entry.expires_at > time.monotonic():
+            return True
+        if evict:
+            del self._entries[key]
+        return False
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries
+        }
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    """float32 copy of a vector scaled to unit length (dot product = cosine similarity)."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
@@ -0,0 +1,172 @@
+"""
+DocuMind Document Catalog
+Per-document chunk counts, sizes, file type and ingestion time kept in a
+small SQLite table next to the Chroma collection, so /stats, /health and
+document listings never have to scan every chunk.
+"""
+
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+
+class DocumentCatalog:
+    """One row per source file, plus running totals maintained by triggers"""
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the catalog.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    source_file TEXT PRIMARY KEY,
+                    file_type TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    token_count INTEGER NOT NULL,
+                    text_bytes INTEGER NOT NULL,
+                    file_size_bytes INTEGER,
+                    ingested_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # Totals in a single row, kept exact by triggers in the same transaction as each change
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    documents INTEGER NOT NULL,
+                    chunks INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("INSERT OR IGNORE INTO totals (id, documents, chunks) VALUES (0, 0, 0)")
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+                    UPDATE totals SET documents = documents + 1, chunks = chunks + new.chunk_count WHERE id = 0;
+                END
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE OF chunk_count ON documents BEGIN
+                    UPDATE totals SET chunks = chunks + new.chunk_count - old.chunk_count WHERE id = 0;
+                END
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+                    UPDATE totals SET documents = documents - 1, chunks = chunks - old.chunk_count WHERE id = 0;
+                END
+            """)
+
+    def add_chunks(self, documents: List[Dict]) -> None:
+        """
+        Count newly indexed chunks against their source files.
+
+        Args:
+            documents: Vector store records (content and metadata with source_file, token_count)
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            for source_file, (chunks, tokens, text_bytes) in _group(documents).items():
+                self._conn.execute(
+                    """INSERT INTO documents (source_file, file_type, chunk_count, token_count, text_bytes,
+                                              ingested_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (source_file) DO UPDATE SET
+                           chunk_count = chunk_count + excluded.chunk_count,
+                           token_count = token_count + excluded.token_count,
+                           text_bytes = text_bytes + excluded.text_bytes,
+                           updated_at = excluded.updated_at""",
+                    (source_file, file_type_of(source_file), chunks, tokens, text_bytes, now, now)
+                )
+
+    def remove_chunks(self, documents: List[Dict]) -> None:
+        """
+        Uncount deleted chunks; files left with no chunks are dropped.
+
+        Args:
+            documents: The deleted records (content and metadata)
+        """
+        with self._lock, self._conn:
+            for source_file, (chunks, tokens, text_bytes) in _group(documents).items():
+                self._conn.execute(
+                    """UPDATE documents SET chunk_count = chunk_count - ?, token_count = token_count - ?,
+                                            text_bytes = text_bytes - ?, updated_at = ?
+                       WHERE source_file = ?""",
+                    (chunks, tokens, text_bytes, time.time(), source_file)
+                )
+            self._conn.execute("DELETE FROM documents WHERE chunk_count <= 0")
+
+    def remove_document(self, source_file: str) -> None:
+        """Drop a file from the catalog."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE source_file = ?", (source_file,))
+
+    def set_file_size(self, source_file: str, size_bytes: int) -> None:
+        """Record the original file's size (known to the uploader, not to the vector store)."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE documents SET file_size_bytes = ? WHERE source_file = ?",
+                (size_bytes, source_file)
+            )
+
+    def clear(self) -> None:
+        """Remove every document."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents")
+
+    def totals(self) -> Tuple[int, int]:
+        """(documents, chunks), read from the single totals row."""
+        with self._lock:
+            row = self._conn.execute("SELECT documents, chunks FROM totals WHERE id = 0").fetchone()
+        return row['documents'], row['chunks']
+
+    def source_files(self) -> List[str]:
+        """Every cataloged file name, sorted."""
+        with self._lock:
+            rows = self._conn.execute("SELECT source_file FROM documents ORDER BY source_file").fetchall()
+        return [row['source_file'] for row in rows]
+
+    def ingestion_info(self) -> Dict[str, Tuple[str, float]]:
+        """Per source file: (file_type, ingested_at)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT source_file, file_type, ingested_at FROM documents").fetchall()
+        return {row['source_file']: (row['file_type'], row['ingested_at']) for row in rows}
+
+    def list_documents(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """One page of documents, ordered by file name."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM documents ORDER BY source_file LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _group(documents: List[Dict]) -> Dict[str, Tuple[int, int, int]]:
+    """Per source file: (chunks, tokens, text bytes) of the given records."""
+    grouped: Dict[str, Tuple[int, int, int]] = {}
+    for doc in documents:
+        metadata = doc.get('metadata') or {}
+        source_file = metadata.get('source_file', 'unknown')
+        chunks, tokens, text_bytes = grouped.get(source_file, (0, 0, 0))
+        grouped[source_file] = (
+            chunks + 1,
+            tokens + int(metadata.get('token_count', 0)),
+            text_bytes + len((doc.get('content') or '').encode('utf-8'))
+        )
+    return grouped
+
+
+def file_type_of(source_file: str) -> str:
+    """Extension without the dot ('pdf', 'md', ...), or 'unknown'."""
+    suffix = Path(source_file).suffix.lower()
+    return suffix[1:] if suffix else 'unknown'
@@ -0,0 +1,84 @@
+"""
+DocuMind Change Log
+IDs of the chunks written (added, updated or deleted) while a re-embedding
+migration runs, so its catch-up passes and the final pass under the cutover
+lock only revisit those chunks instead of rescanning the whole collection.
+The log is a small SQLite file next to the indexes that exists only between
+the start of a migration and its cutover; writers record into it while it
+exists.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional, Set, Tuple
+
+
+class ChangeLog:
+    """Sequence-numbered chunk IDs written since a migration started"""
+
+    def __init__(self, persist_directory: str, collection_name: str):
+        self.path = Path(persist_directory) / f"{collection_name}.changes.db"
+
+    def start(self) -> None:
+        """Create the log (writers record into it from now on); keeps the entries of a resumed migration."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.path) as conn:
+            # chunk_id NULL: the whole collection was cleared
+            conn.execute("CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, chunk_id TEXT)")
+        conn.close()
+
+    def stop(self) -> None:
+        """Remove the log (writers stop recording)."""
+        self.path.unlink(missing_ok=True)
+
+    @property
+    def active(self) -> bool:
+        return self.path.exists()
+
+    def record(self, ids: Iterable[str]) -> None:
+        """Log chunk IDs that were written, if a migration is running."""
+        self._insert([(chunk_id,) for chunk_id in ids])
+
+    def record_clear(self) -> None:
+        """Log that every chunk was deleted, if a migration is running."""
+        self._insert([(None,)])
+
+    def latest(self) -> int:
+        """Sequence number of the last entry (0 when empty)."""
+        with sqlite3.connect(self.path) as conn:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        conn.close()
+        return seq
+
+    def since(self, seq: int) -> Tuple[Optional[Set[str]], int]:
+        """
+        Chunks written after an entry.
+
+        Args:
+            seq: Sequence number returned by latest() or a previous since()
+
+        Returns:
+            Tuple of (changed chunk IDs, or None if the collection was cleared meanwhile,
+            sequence number of the last entry included)
+        """
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute("SELECT seq, chunk_id FROM changes WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        conn.close()
+        if not rows:
+            return set(), seq
+        ids = {chunk_id for _, chunk_id in rows}
+        return (None if None in ids else ids), rows[-1][0]
+
+    def _insert(self, rows) -> None:
+        if not rows:
+            return
+        try:
+            # mode=rw: don't create the file when no migration is running
+            conn = sqlite3.connect(f"file:{self.path}?mode=rw", uri=True)
+        except sqlite3.OperationalError:
+            return
+        try:
+            with conn:
+                conn.executemany("INSERT INTO changes (chunk_id) VALUES (?)", rows)
+        finally:
+            conn.close()
@@ -0,0 +1,122 @@
+"""
+DocuMind API Clients
+Process-wide OpenAI clients shared by ingestion, retrieval and generation,
+so every call reuses one connection pool instead of a new TLS handshake,
+plus the limiter that bounds concurrent upstream calls from request handlers.
+"""
+
+import asyncio
+from functools import lru_cache
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import httpx
+from openai import OpenAI, AsyncOpenAI
+from backend.config import settings
+from backend.metrics import UPSTREAM_REJECTIONS, UPSTREAM_IN_FLIGHT, UPSTREAM_WAITING
+
+
+def _timeout() -> httpx.Timeout:
+    """Per-request timeout (connecting gets a shorter one)."""
+    return httpx.Timeout(settings.OPENAI_TIMEOUT_SECONDS, connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits() -> httpx.Limits:
+    """Connection pool size and keep-alive."""
+    return httpx.Limits(
+        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+    )
+
+
+@lru_cache()
+def get_openai_client() -> OpenAI:
+    """
+    Get the shared OpenAI client (used from worker threads: ingestion, sync, batch embedding).
+    Returns the same instance every time (it is thread-safe).
+    """
+    return OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        timeout=_timeout(),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.Client(limits=_limits(), timeout=_timeout())
+    )
+
+
+@lru_cache()
+def get_async_openai_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client (used from request handlers on the event loop).
+    Returns the same instance every time.
+    """
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        timeout=_timeout(),
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+    )
+
+
+class UpstreamBusyError(Exception):
+    """Raised when no upstream slot is free and the wait queue is full (or the wait timed out)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many requests waiting for the language model, retry later")
+        self.retry_after = retry_after
+
+
+class UpstreamLimiter:
+    """
+    Bounds concurrent OpenAI calls made by request handlers: up to
+    max_concurrent run at once, up to max_waiting wait for a slot, and
+    anyone beyond that is rejected straight away with UpstreamBusyError,
+    so bursts get a quick 503 instead of piling up behind the API.
+    """
+
+    def __init__(self, max_concurrent: int, max_waiting: int, wait_timeout: float, retry_after: int):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self.waiting = 0
+
+    def check(self) -> None:
+        """Fail fast if a new caller would be rejected (for callers that must answer before acquiring)."""
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            UPSTREAM_REJECTIONS.labels(reason="queue_full").inc()
+            raise UpstreamBusyError(self.retry_after)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one upstream slot for the body of an async with-block."""
+        self.check()
+        self.waiting += 1
+        UPSTREAM_WAITING.inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            UPSTREAM_REJECTIONS.labels(reason="wait_timeout").inc()
+            raise UpstreamBusyError(self.retry_after)
+        finally:
+            self.waiting -= 1
+            UPSTREAM_WAITING.dec()
+
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+
+@lru_cache()
+def get_upstream_limiter() -> UpstreamLimiter:
+    """Get the process-wide upstream limiter."""
+    return UpstreamLimiter(
+        max_concurrent=settings.UPSTREAM_MAX_CONCURRENCY,
+        max_waiting=settings.UPSTREAM_MAX_QUEUE,
+        wait_timeout=settings.UPSTREAM_QUEUE_TIMEOUT_SECONDS,
+        retry_after=settings.UPSTREAM_RETRY_AFTER_SECONDS
+    )
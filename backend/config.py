@@ -5,6 +5,7 @@ Loads settings from .env file using Pydantic
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 #class Settings(BaseSettings)
 #creates a settings class using Pydantic ,reads from .env file,Validates data types, Provides default values
@@ -16,17 +17,104 @@ class Settings(BaseSettings):
     # OpenAI API Configuration
     OPENAI_API_KEY: str
     EMBEDDING_MODEL: str = "text-embedding-3-small"
-    EMBEDDING_DIMENSION: int = 1536
+    EMBEDDING_DIMENSION: int = 1536  # sent as `dimensions` to text-embedding-3 models (after a re-embedding migration the active index's model/dimension apply)
     LLM_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible endpoint, e.g. evaluation/mock_openai.py for load tests
+
+    # OpenAI connection pool (shared by every call in the process)
+    OPENAI_TIMEOUT_SECONDS: float = 60.0  # per request
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    OPENAI_MAX_RETRIES: int = 2  # client retries on 429/5xx (ingestion batches retry themselves)
+
+    # Upstream backpressure for request handlers (beyond the queue: 503 with Retry-After)
+    UPSTREAM_MAX_CONCURRENCY: int = 32  # LLM/embedding calls in flight at once
+    UPSTREAM_MAX_QUEUE: int = 64  # callers allowed to wait for a slot
+    UPSTREAM_QUEUE_TIMEOUT_SECONDS: float = 10.0  # longest wait for a slot
+    UPSTREAM_RETRY_AFTER_SECONDS: int = 2
 
     # Chunking Parameters
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
+    CHUNK_ENCODE_THREADS: int = 8  # tiktoken threads (encode_batch): segments/pages tokenized together while chunking
+
+    # Prompt context (retrieved chunks are merged and packed into this many tokens; 0 = no limit)
+    CONTEXT_TOKEN_BUDGET: int = 3000
      
     # Vector db
     CHROMA_PERSIST_DIR: str = "./chroma_data"
     CHROMA_COLLECTION_NAME: str = "documind_collection"
+    VECTOR_INDEX_BACKEND: str = "chroma"  # "chroma" (HNSW collection) or "numpy" (memory-mapped matrix, flat/IVF search)
+    NUMPY_IVF_MIN_VECTORS: int = 50_000  # numpy backend: exact search below this many chunks, IVF from here on (0 = always exact)
+    NUMPY_IVF_LISTS: int = 0  # IVF lists (0 = sqrt of the chunk count at training time)
+    NUMPY_IVF_PROBES: int = 16  # IVF lists searched per query (more = better recall, slower)
+    NUMPY_QUANTIZATION: str = "none"  # "int8": first pass on int8 codes (~1/4 of the float32 memory), float rerank of a shortlist
+    NUMPY_RERANK_FACTOR: int = 4  # int8 shortlist = top_k x this, rescored on the float32 vectors
     DOCUMENTS_FOLDER: str = "./data/documents"
+    SYNC_MANIFEST_PATH: str = "./sync_data/manifest.db"  # what `python -m backend.sync` has indexed
+
+    # Retrieval: "vector", "lexical" (BM25 only) or "hybrid" (both, fused with reciprocal-rank fusion)
+    RETRIEVAL_MODE: str = "hybrid"
+    HYBRID_CANDIDATES: int = 20  # results taken from each ranker before fusion
+    RRF_K: int = 60
+    # On by default: a keyword-like question whose top BM25 hit contains every term and clearly
+    # wins is retrieved from BM25 alone (no query embedding, no vector search), so its chunks can
+    # differ from the fused ranking's. Set to false to always fuse.
+    LEXICAL_FAST_PATH: bool = True
+    LEXICAL_FAST_PATH_MARGIN: float = 2.0  # top BM25 score must be this many times the runner-up's
+    MMR_ENABLED: bool = False  # diversify results with maximal marginal relevance (fewer near-duplicate neighbouring chunks)
+    MMR_CANDIDATES: int = 20  # candidates fetched (with their embeddings) to pick top_k from
+    MMR_LAMBDA: float = 0.7  # 1 = relevance only, 0 = diversity only
+
+    # Concurrent identical /query requests (normalized question, top_k) share one computation
+    QUERY_COALESCING_ENABLED: bool = True
+
+    # POST /query/batch (questions are embedded and searched together, answers generated concurrently)
+    QUERY_BATCH_MAX_QUESTIONS: int = 100
+    QUERY_BATCH_CONCURRENCY: int = 8  # answers generated at once per batch
+
+    # Ingestion worker pools (keep /upload work off the event loop)
+    INGEST_PROCESS_WORKERS: int = 2  # CPU-bound PDF parsing and chunking
+    INGEST_THREAD_WORKERS: int = 4   # blocking I/O on the /upload request path (saving files)
+
+    # Background ingestion jobs
+    JOBS_DB_PATH: str = "./jobs_data/jobs.db"
+    INGEST_JOB_WORKERS: int = 4  # files processed concurrently
+    INGEST_JOB_LEASE_SECONDS: float = 60.0  # a server worker's claim on its files; another worker takes over once it lapses
+    INGEST_STREAM_BATCH_TOKENS: int = 50_000  # chunk tokens handed to the embedder at a time
+    INGEST_STREAM_MAX_PENDING: int = 4  # parsed batches buffered per file (bounds memory)
+
+    # Embeddings API batching (limits are per request: 2048 inputs, 300k tokens)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100_000
+    EMBEDDING_BATCH_MAX_INPUTS: int = 512
+    EMBEDDING_CONCURRENCY: int = 4  # concurrent embeddings requests per process
+    EMBEDDING_MAX_RETRIES: int = 5  # retries on 429/5xx/connection errors
+    EMBEDDING_RETRY_BASE_DELAY: float = 1.0
+    EMBEDDING_RETRY_MAX_DELAY: float = 60.0
+    REEMBED_BATCH_SIZE: int = 500  # chunks re-embedded per page by `python -m backend.reembed` (checkpointed after each)
+
+    # Embedding cache (skip the API for chunks embedded before)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = "./cache_data/embeddings.db"
+    EMBEDDING_CACHE_MAX_MB: int = 1024
+
+    # Query embedding cache (repeated questions skip the embeddings API)
+    QUERY_CACHE_MAX_ENTRIES: int = 1000
+    QUERY_CACHE_TTL_SECONDS: float = 3600
+    QUERY_CACHE_DISK_PATH: Optional[str] = None  # set to spill entries to SQLite
+    QUERY_CACHE_DISK_MAX_MB: int = 64
+
+    # Answer cache (scoped to the corpus version, cleared on add/delete/clear)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 500
+    ANSWER_CACHE_TTL_SECONDS: float = 3600
+    ANSWER_CACHE_SEMANTIC_THRESHOLD: float = 0.97  # cosine similarity; 0 disables semantic hits
+
+    # Logging (per-request detail is DEBUG; INFO keeps the hot path off the console)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "%(asctime)s %(levelname)s %(name)s %(message)s"
 
     class Config:
         env_file = ".env"
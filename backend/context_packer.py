@@ -0,0 +1,172 @@
+"""
+DocuMind Context Packer
+Turns retrieved chunks into the prompt context: chunks that are neighbours
+in the same file are merged with their shared overlap removed, and the
+resulting passages fill a token budget in relevance order.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
+from backend.config import settings
+from backend.ingestion import get_encoding
+
+
+# Separator between passages in the prompt (as the unpacked context used)
+PASSAGE_SEPARATOR = "\n\n"
+
+# Shortest suffix/prefix match treated as the chunker's overlap
+MIN_OVERLAP_CHARS = 8
+
+# A passage cut to fit the budget must keep at least this many tokens
+MIN_PASSAGE_TOKENS = 32
+
+
+@dataclass
+class Passage:
+    """A run of consecutive chunks from one file, merged into one text"""
+    rank: int                # best (lowest) retrieval rank among its chunks
+    source_file: Optional[str]
+    first_index: int
+    last_index: int
+    text: str
+    chunk_ranks: List[int] = field(default_factory=list)
+
+
+@dataclass
+class PackedContext:
+    """The context sent to the LLM and what packing saved"""
+    passages: List[str]
+    chunks_packed: int       # retrieved chunks whose text is (at least partly) in the context
+    chunks_total: int
+    context_tokens: int
+    unpacked_tokens: int     # tokens of the plain "\n\n" join of every retrieved chunk
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.unpacked_tokens - self.context_tokens
+
+    @property
+    def text(self) -> str:
+        return PASSAGE_SEPARATOR.join(self.passages)
+
+
+def pack_context(chunks: List[str], metadatas: Optional[List[Dict]] = None, token_budget: int = None) -> PackedContext:
+    """
+    Build the prompt context from retrieved chunks
+
+    Args:
+        chunks: Retrieved chunk texts, most relevant first
+        metadatas: Their metadata (source_file, chunk_index); without it chunks are only budgeted
+        token_budget: Max context tokens (defaults to config, 0 means unlimited)
+
+    Returns:
+        PackedContext with the passages in relevance order
+    """
+    if token_budget is None:
+        token_budget = settings.CONTEXT_TOKEN_BUDGET
+
+    encoding = get_encoding()
+    unpacked_tokens = len(encoding.encode_ordinary(PASSAGE_SEPARATOR.join(chunks)))
+
+    passages = merge_adjacent_chunks(chunks, metadatas)
+
+    separator_tokens = len(encoding.encode_ordinary(PASSAGE_SEPARATOR))
+    packed = []
+    chunks_packed = 0
+    used = 0
+    for passage in passages:
+        tokens = encoding.encode_ordinary(passage.text)
+        separator = separator_tokens if packed else 0
+
+        if token_budget and used + separator + len(tokens) > token_budget:
+            # Cut the passage to the remaining room if enough is left to be useful, then stop
+            room = token_budget - used - separator
+            if room >= MIN_PASSAGE_TOKENS:
+                packed.append(encoding.decode(tokens[:room]))
+                chunks_packed += len(passage.chunk_ranks)
+            break
+
+        packed.append(passage.text)
+        chunks_packed += len(passage.chunk_ranks)
+        used += separator + len(tokens)
+
+    context_tokens = len(encoding.encode_ordinary(PASSAGE_SEPARATOR.join(packed)))
+    return PackedContext(
+        passages=packed,
+        chunks_packed=chunks_packed,
+        chunks_total=len(chunks),
+        context_tokens=context_tokens,
+        unpacked_tokens=unpacked_tokens
+    )
+
+
+def merge_adjacent_chunks(chunks: List[str], metadatas: Optional[List[Dict]] = None) -> List[Passage]:
+    """
+    Merge retrieved chunks that are consecutive in the same file
+
+    Args:
+        chunks: Retrieved chunk texts, most relevant first
+        metadatas: Their metadata (source_file, chunk_index)
+
+    Returns:
+        Passages ordered by their best-ranked chunk; text within a passage is in document order
+    """
+    if not metadatas:
+        return [Passage(rank, None, 0, 0, text, [rank]) for rank, text in enumerate(chunks)]
+
+    # Group by file, in document order; the same chunk retrieved twice is kept once
+    by_file: Dict[str, Dict[int, tuple]] = {}
+    loose = []  # chunks without position metadata are never merged
+    for rank, (text, meta) in enumerate(zip(chunks, metadatas)):
+        source_file = (meta or {}).get('source_file')
+        chunk_index = (meta or {}).get('chunk_index')
+        if source_file is None or chunk_index is None:
+            loose.append(Passage(rank, source_file, 0, 0, text, [rank]))
+            continue
+        by_file.setdefault(source_file, {}).setdefault(int(chunk_index), (rank, text))
+
+    passages = loose
+    for source_file, indexed in by_file.items():
+        current = None
+        for chunk_index in sorted(indexed):
+            rank, text = indexed[chunk_index]
+            if current is not None and chunk_index == current.last_index + 1:
+                current.text = join_overlapping(current.text, text)
+                current.last_index = chunk_index
+                current.rank = min(current.rank, rank)
+                current.chunk_ranks.append(rank)
+                continue
+            current = Passage(rank, source_file, chunk_index, chunk_index, text, [rank])
+            passages.append(current)
+
+    passages.sort(key=lambda passage: passage.rank)
+    return passages
+
+
+def join_overlapping(previous: str, following: str) -> str:
+    """
+    Concatenate two consecutive chunks, dropping the text the second repeats from the first.
+    Falls back to a newline join when no overlap of at least MIN_OVERLAP_CHARS is found.
+    """
+    overlap = overlap_length(previous, following)
+    if overlap:
+        return previous + following[overlap:]
+    return previous + "\n" + following
+
+
+def overlap_length(previous: str, following: str) -> int:
+    """Length of the longest suffix of previous that is also a prefix of following (0 if under the minimum)."""
+    limit = min(len(previous), len(following))
+    if limit < MIN_OVERLAP_CHARS:
+        return 0
+
+    # Candidate starts are where following's first characters occur in previous's tail;
+    # the earliest one that matches through to the end is the longest overlap
+    probe = following[:MIN_OVERLAP_CHARS]
+    position = previous.find(probe, len(previous) - limit)
+    while position != -1:
+        length = len(previous) - position
+        if following.startswith(previous[position:]):
+            return length
+        position = previous.find(probe, position + 1)
+    return 0
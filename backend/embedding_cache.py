@@ -0,0 +1,197 @@
+"""
+DocuMind Embedding Cache
+Disk-backed, content-addressed cache of chunk embeddings so re-ingesting
+unchanged text does not pay for the embeddings API again.
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from backend.config import settings
+
+
+class EmbeddingCache:
+    """
+    SQLite store of text -> embedding, keyed by hash(model, dimension, text).
+    Bounded by total vector bytes with least-recently-used eviction.
+    """
+
+    # Max keys per SQL IN (...) lookup
+    LOOKUP_BATCH = 500
+
+    def __init__(self, db_path: str = None, max_mb: int = None, model: str = None, dimension: int = None):
+        """
+        Args:
+            db_path: Path to the SQLite file (defaults to config)
+            max_mb: Size bound for stored vectors in megabytes (defaults to config)
+            model: Embedding model name part of the key (defaults to config)
+            dimension: Embedding dimension part of the key (defaults to config)
+        """
+        if db_path is None:
+            db_path = settings.EMBEDDING_CACHE_PATH
+        if max_mb is None:
+            max_mb = settings.EMBEDDING_CACHE_MAX_MB
+
+        self.model = model or settings.EMBEDDING_MODEL
+        self.dimension = dimension or settings.EMBEDDING_DIMENSION
+        self.max_bytes = max_mb * 1024 * 1024
+
+        # Counters (since process start)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    embedding BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings"
+            ).fetchone()[0]
+
+    def key(self, text: str) -> str:
+        """Content address of a text for the current model and dimension."""
+        digest = hashlib.sha256()
+        digest.update(f"{self.model}\0{self.dimension}\0".encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up embeddings and mark the found entries as recently used.
+
+        Args:
+            keys: Cache keys from key()
+
+        Returns:
+            Dict of key -> embedding for the keys that were cached
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(unique_keys), self.LOOKUP_BATCH):
+                batch = unique_keys[i:i + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Store embeddings, evicting least-recently-used entries if over the size bound.
+
+        Args:
+            items: Dict of key -> embedding
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [
+            (key, np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for key, embedding in items.items()
+        ]
+
+        with self._lock, self._conn:
+            existing = self._existing_bytes([key for key, _, _ in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                rows
+            )
+            self._total_bytes += sum(len(blob) for _, blob, _ in rows) - existing
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _existing_bytes(self, keys: List[str]) -> int:
+        """Bytes already stored under these keys (so replacements are not double counted)."""
+        total = 0
+        for i in range(0, len(keys), self.LOOKUP_BATCH):
+            batch = keys[i:i + self.LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            total += self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(embedding)), 0) FROM embeddings WHERE key IN ({placeholders})",
+                batch
+            ).fetchone()[0]
+        return total
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until under 90% of the bound (caller holds the lock)."""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, LENGTH(embedding) FROM embeddings ORDER BY last_used ASC"
+        )
+
+        to_delete = []
+        for key, size in rows:
+            if self._total_bytes <= target:
+                break
+            to_delete.append((key,))
+            self._total_bytes -= size
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+
+_caches: Dict[tuple, EmbeddingCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(spec: Optional[Tuple[str, int]] = None) -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache for an embedding model.
+    Returns None when EMBEDDING_CACHE_ENABLED is off.
+    
+    Args:
+        spec: (model, dimension), e.g. an EmbeddingSpec (defaults to config)
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    model, dimension = spec or (settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION)
+    with _cache_lock:
+        if (model, dimension) not in _caches:
+            _caches[(model, dimension)] = EmbeddingCache(model=model, dimension=dimension)
+    return _caches[(model, dimension)]
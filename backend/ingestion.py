@@ -4,20 +4,40 @@ Handles loading, chunking, and embedding documents.
 """
 
 import os
+import time
+import logging
+import queue
+import random
+import hashlib
 import tiktoken    #Count tokens (for chunking)
+import openai
+import numpy as np
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional, Iterator, Iterable, Callable
 from pypdf import PdfReader  #Extract text from PDFs
-from openai import OpenAI
 from backend.config import get_settings
 from backend.config import settings
+from backend.clients import get_openai_client
+from backend.embedding_cache import get_embedding_cache
+from backend.active_index import EmbeddingSpec, configured_spec
+from backend.catalog import file_type_of
+from backend.metrics import INGEST_STAGE_SECONDS, record_stage, timed
 
 
-print(f"DEBUG - LLM_MODEL: {settings.LLM_MODEL}")
-print(f"DEBUG - API_KEY starts with: {settings.OPENAI_API_KEY[:10]}...")
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+logger.debug("ingestion configured llm_model=%s embedding_model=%s", settings.LLM_MODEL, settings.EMBEDDING_MODEL)
+client = get_openai_client()
+embedding_client = client.with_options(max_retries=0)  # same connection pool; batches retry themselves (honoring Retry-After)
+
+# Shared pool bounding concurrent embeddings requests across all uploads
+embedding_pool = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_CONCURRENCY,
+    thread_name_prefix="embed"
+)
 
 #returns a list of dictionaries, where each dictionary represents one loaded document
 def load_document(folder_path: str = None) -> List[Dict[str,str]]:
@@ -39,10 +59,10 @@ def load_document(folder_path: str = None) -> List[Dict[str,str]]:
         # Create folder if it doesn't exist
     if not folder.exists():
         folder.mkdir(parents=True, exist_ok=True)
-        print(f"Created documents folder: {folder_path}")
+        logger.info("Created documents folder: %s", folder_path)
         return documents
     
-    print(f"Loading documents from: {folder_path}")
+    logger.info("Loading documents from: %s", folder_path)
     
     # Loop through all files in the folder
     for file_path in folder.iterdir():
@@ -55,15 +75,15 @@ def load_document(folder_path: str = None) -> List[Dict[str,str]]:
         try:
             if suffix == '.pdf':
                 content = extract_pdf_text(str(file_path))
-                print(f" Loaded PDF: {file_path.name} ({len(content)} chars)")
+                logger.debug("Loaded PDF file=%s chars=%d", file_path.name, len(content))
             
             elif suffix in ['.txt', '.md']:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                print(f" Loaded {suffix[1:].upper()}: {file_path.name} ({len(content)} chars)")
+                logger.debug("Loaded %s file=%s chars=%d", suffix[1:].upper(), file_path.name, len(content))
             
             else:
-                print(f"Skipped (unsupported): {file_path.name}")
+                logger.debug("Skipped (unsupported) file=%s", file_path.name)
                 continue
             
             if content and content.strip():
@@ -73,12 +93,12 @@ def load_document(folder_path: str = None) -> List[Dict[str,str]]:
                     'file_type': suffix[1:]  # Remove the dot
                 })
             else:
-                print(f" Empty content: {file_path.name}")
+                logger.warning("Empty content file=%s", file_path.name)
         
         except Exception as e:
-            print(f" Error loading {file_path.name}: {e}")
+            logger.error("Error loading file=%s: %s", file_path.name, e)
     
-    print(f"\nTotal documents loaded: {len(documents)}\n")
+    logger.info("Total documents loaded: %d", len(documents))
     return documents
  
 
@@ -92,17 +112,59 @@ def extract_pdf_text(pdf_path: str) -> str:
     Returns:
         Extracted text with page separators
     """
+    #Takes all pages and joins them with double line breaks
+    return "\n\n".join(iter_pdf_pages(pdf_path))
+
+
+#yields one page at a time so a large PDF is never held as one string
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
+    """
+    Extract PDF text page by page
+    
+    Args:
+        pdf_path: Path to PDF file
+    
+    Yields:
+        Text of each non-empty page, prefixed with its [Page N] marker
+    """
     reader = PdfReader(pdf_path) #Opens the PDF file
-    text_parts = [] #store text from each page separately
     
     for page_num,page in enumerate(reader.pages,start=1):
         page_text = page.extract_text() #Uses pypdf to extract text from the page
         if page_text and page_text.strip():
-            text_parts.append(f"[Page {page_num}]\n{page_text}")
+            yield f"[Page {page_num}]\n{page_text}"
 
-    #Takes all pages and joins them with double line breaks
-    return "\n\n".join(text_parts) 
 
+def iter_text_segments(file_path: str, file_ext: str, block_chars: int = 65536) -> Iterator[str]:
+    """
+    Read a document as consecutive text segments (concatenated, they equal extract_text)
+    
+    Args:
+        file_path: Path to the file
+        file_ext: File extension including the dot (.pdf, .txt, .md)
+        block_chars: Approximate segment size for text files (split on line ends)
+    
+    Yields:
+        Text segments, pages for PDFs
+    """
+    if file_ext == '.pdf':
+        for page_num, page in enumerate(iter_pdf_pages(file_path)):
+            yield page if page_num == 0 else "\n\n" + page  # same separators as extract_pdf_text
+        return
+
+    # .txt or .md
+    with open(file_path, 'r', encoding='utf-8') as f:
+        block = []
+        block_len = 0
+        for line in f:
+            block.append(line)
+            block_len += len(line)
+            if block_len >= block_chars:
+                yield "".join(block)
+                block = []
+                block_len = 0
+        if block:
+            yield "".join(block)
 
 
 def chunk_text(content: str, chunk_size: int = None, overlap: int = None) -> List[str]:
@@ -117,76 +179,632 @@ def chunk_text(content: str, chunk_size: int = None, overlap: int = None) -> Lis
     Returns:
         List of text chunks
     """
+    chunks, _ = chunk_text_with_counts(content, chunk_size, overlap)
+    return chunks
+
+
+def chunk_text_with_counts(content: str, chunk_size: int = None, overlap: int = None) -> Tuple[List[str], List[int]]:
+    """
+    Same as chunk_text, but also returns the token count of each chunk
+    (so embedding batches can be packed by tokens without re-tokenizing)
+    
+    Args:
+        content: Text to chunk
+        chunk_size: Tokens per chunk (defaults to config setting)
+        overlap: Token overlap between chunks (defaults to config setting)
+    
+    Returns:
+        Tuple of (list of text chunks, list of token counts)
+    """
+    chunks = [] #chunks will store all the text chunks
+    counts = [] #token count of each chunk
+    for chunk, count in iter_chunks([content], chunk_size, overlap):
+        chunks.append(chunk)
+        counts.append(count)
+    return chunks, counts
+
+
+def chunk_texts(contents: List[str], chunk_size: int = None, overlap: int = None) -> List[Tuple[List[str], List[int]]]:
+    """
+    Chunk many documents at once, tokenizing them with tiktoken's threaded encode_batch
+    
+    Args:
+        contents: Document texts
+        chunk_size: Tokens per chunk (defaults to config setting)
+        overlap: Token overlap between chunks (defaults to config setting)
+    
+    Returns:
+        One (chunks, token_counts) tuple per document, in input order
+    """
+    results = []
+    for encoded in _encode_batch(contents):
+        chunks = [] #chunks will store all the text chunks
+        counts = [] #token count of each chunk
+        for chunk, count in _iter_windows([encoded], chunk_size, overlap):
+            chunks.append(chunk)
+            counts.append(count)
+        results.append((chunks, counts))
+    return results
+
+
+def iter_chunks(segments: Iterable[str], chunk_size: int = None, overlap: int = None) -> Iterator[Tuple[str, int]]:
+    """
+    Chunk a stream of text segments incrementally
+    Only the tokens of the current window and a few segments are held in
+    memory; the overlap is carried across segment (page) boundaries.
+    Segments are tokenized CHUNK_ENCODE_THREADS at a time with tiktoken's
+    threaded encode_batch (each on its own, as one at a time would).
+    
+    Args:
+        segments: Consecutive pieces of one document (e.g. from iter_text_segments)
+        chunk_size: Tokens per chunk (defaults to config setting)
+        overlap: Token overlap between chunks (defaults to config setting)
+    
+    Yields:
+        Tuples of (chunk text, token count)
+    """
+    return _iter_windows(_encode_segments(segments), chunk_size, overlap)
+
+
+def _encode_segments(segments: Iterable[str]) -> Iterator[Tuple[List[int], bytes]]:
+    """(tokens, utf-8 bytes) of each segment, tokenized CHUNK_ENCODE_THREADS segments per encode_batch call."""
+    pending = []
+    for segment in segments:
+        pending.append(segment)
+        if len(pending) >= settings.CHUNK_ENCODE_THREADS:
+            yield from _encode_batch(pending)
+            pending = []
+    if pending:
+        yield from _encode_batch(pending)
+
+
+def _encode_batch(texts: List[str]) -> List[Tuple[List[int], bytes]]:
+    """(tokens, utf-8 bytes) of each text, tokenized on CHUNK_ENCODE_THREADS threads."""
+    if len(texts) == 1:
+        return [(get_encoding().encode_ordinary(texts[0]), texts[0].encode('utf-8'))]  # no thread pool round trip
+    all_tokens = get_encoding().encode_ordinary_batch(texts, num_threads=settings.CHUNK_ENCODE_THREADS)
+    return [(tokens, text.encode('utf-8')) for text, tokens in zip(texts, all_tokens)]
+
+
+def _iter_windows(encoded: Iterable[Tuple[List[int], bytes]], chunk_size: int = None, overlap: int = None) -> Iterator[Tuple[str, int]]:
+    """
+    Slide the chunk window over (tokens, utf-8 bytes) pieces of one document.
+    
+    Tokens are never decoded back to text: each token's byte length comes from a
+    per-vocabulary table, so window boundaries are byte offsets and each chunk is
+    sliced straight out of the original bytes (the same text encoding.decode would produce).
+    """
     if chunk_size == None:
         chunk_size = settings.CHUNK_SIZE
     if overlap == None:
         overlap = settings.CHUNK_OVERLAP
+    step = chunk_size - overlap
+
+    token_bytes = _token_byte_lengths()
+    lengths = np.zeros(0, dtype=np.int64)  #byte length of each token not yet fully emitted (starts with the carried overlap)
+    data = bytearray()                     #the original text of those tokens, utf-8 encoded
+
+    for piece_tokens, piece_bytes in encoded:
+        lengths = np.concatenate((lengths, token_bytes[np.asarray(piece_tokens, dtype=np.int64)]))
+        data += piece_bytes
+
+        # Emit a window only once tokens exist past it, so the last window is handled below
+        if len(lengths) > chunk_size:
+            offsets = np.concatenate(([0], np.cumsum(lengths)))  #byte offset where each token starts
+            start = 0
+            while len(lengths) - start > chunk_size:
+                # decode errors only at a window edge that splits a multi-byte character, like encoding.decode
+                yield data[offsets[start]:offsets[start + chunk_size]].decode('utf-8', errors='replace'), chunk_size
+                start += step  # Move start forward (accounting for overlap)
+
+            lengths = lengths[start:]
+            del data[:offsets[start]]
+
+    # Final window: whatever is left (the whole document if it fit in one chunk)
+    if len(lengths):
+        yield data.decode('utf-8', errors='replace'), len(lengths)
+
+
+@lru_cache()
+def get_encoding() -> tiktoken.Encoding:
+    """
+    Get the tokenizer for LLM_MODEL, loaded once per process.
+    Falls back to the newest base encoding this tiktoken knows when the model isn't mapped.
+    """
+    try:
+        return tiktoken.encoding_for_model(settings.LLM_MODEL) #Gets the tokenizer for gpt-4o-mini
+    except KeyError:
+        for name in ("o200k_base", "cl100k_base"):
+            try:
+                return tiktoken.get_encoding(name)
+            except ValueError:
+                continue
+        raise
+
+
+@lru_cache()
+def _token_byte_lengths() -> np.ndarray:
+    """Byte length of every token id in the chunking vocabulary (0 for unused ids), built once per process."""
+    encoding = get_encoding()
+    lengths = np.zeros(encoding.n_vocab, dtype=np.int64)
+    for token in range(encoding.n_vocab):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            continue
+    return lengths
+
+
+#runs in a worker process: parses and chunks while the parent embeds earlier batches
+def produce_chunk_batches(file_path: str, file_ext: str, out_queue, cancel, batch_tokens: int) -> None:
+    """
+    Stream a document's chunks to out_queue in batches of about batch_tokens
+    Puts (chunks, token_counts) tuples, then None when finished (also on error).
+    Top-level function so it can be sent to a ProcessPoolExecutor
     
-    encoding = tiktoken.encoding_for_model(settings.LLM_MODEL) #Gets the tokenizer for gpt-4o-mini
-    tokens = encoding.encode(content) # Convert text to tokens
+    Args:
+        file_path: Path to the file
+        file_ext: File extension including the dot (.pdf, .txt, .md)
+        out_queue: Bounded multiprocessing queue (its size bounds memory)
+        cancel: multiprocessing Event the consumer sets to stop early
+        batch_tokens: Tokens per batch handed to the embedder
+    """
+    def put(item) -> bool:
+        # Block while the queue is full, but give up if the consumer went away
+        while not cancel.is_set():
+            try:
+                out_queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-    # Handle empty or very short content
-    if len(tokens) == 0:
-        return []
-    if len(tokens) <= chunk_size:
-        return [content]  # Already small enough, no need to chunk
+    # Seconds spent parsing pages vs. tokenizing/chunking, sent to the parent for metrics
+    timings = {'extract': 0.0, 'chunk': 0.0}
+    segments = _timed_iter(iter_text_segments(file_path, file_ext), timings, 'extract')
+
+    try:
+        batch, counts, total = [], [], 0
+        start = time.perf_counter()
+        for chunk, count in iter_chunks(segments):
+            batch.append(chunk)
+            counts.append(count)
+            total += count
+            if total >= batch_tokens:
+                timings['chunk'] += time.perf_counter() - start  # time blocked on put() is not counted
+                if not put((batch, counts)):
+                    return
+                batch, counts, total = [], [], 0
+                start = time.perf_counter()
+        timings['chunk'] += time.perf_counter() - start
+        if batch:
+            put((batch, counts))
+        timings['chunk'] -= timings['extract']  # chunk time above includes pulling pages
+        put(timings)
+    finally:
+        put(None)
+
+
+def _timed_iter(iterable: Iterable, timings: Dict[str, float], key: str) -> Iterator:
+    """Yield from iterable, adding the time spent producing each item to timings[key]."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[key] += time.perf_counter() - start
+            return
+        timings[key] += time.perf_counter() - start
+        yield item
+
+
+def iter_chunk_batches(process_pool, manager, file_path: str, file_ext: str) -> Iterator[Tuple[List[str], List[int]]]:
+    """
+    Parse and chunk a file in a worker process, yielding chunk batches as they fill
     
-    chunks = [] #chunks will store all the text chunks
-    start = 0 #start is our position in the token list
+    Args:
+        process_pool: ProcessPoolExecutor to run produce_chunk_batches in
+        manager: multiprocessing Manager providing the queue and cancel event
+        file_path: Path to the file
+        file_ext: File extension including the dot (.pdf, .txt, .md)
+    
+    Yields:
+        Tuples of (chunks, token_counts)
+    """
+    out_queue = manager.Queue(maxsize=settings.INGEST_STREAM_MAX_PENDING)
+    cancel = manager.Event()
+    future = process_pool.submit(
+        produce_chunk_batches, file_path, file_ext, out_queue, cancel, settings.INGEST_STREAM_BATCH_TOKENS
+    )
 
-    while start < len(tokens):  #loops until we've processed all tokens
-        # Get chunk tokens range
-        end = min(start + chunk_size ,len(tokens))
-        chunk_tokens = tokens[start:end]
-        
-        # Decode back to text
-        chunk_text = encoding.decode(chunk_tokens)  #convert tokens back to text
-        chunks.append(chunk_text)
-        
-        # Move start forward (accounting for overlap)
-        start = start + chunk_size - overlap
-        
-        # Break if we've covered all tokens
-        if end >= len(tokens):
-            break
+    try:
+        while True:
+            try:
+                item = out_queue.get(timeout=1)
+            except queue.Empty:
+                if future.done():
+                    future.result()  # worker died without a sentinel: raise its error
+                    break
+                continue
+            if item is None:
+                break
+            if isinstance(item, dict):
+                for stage, seconds in item.items():  # stage timings measured in the worker process
+                    record_stage(INGEST_STAGE_SECONDS, stage, seconds)
+                continue
+            yield item
+        future.result()  # re-raise parsing errors
+    finally:
+        cancel.set()  # stop the producer if we stopped consuming early
+
+
+def index_chunk_batches(batches: Iterable[Tuple[List[str], List[int]]], filename: str, vector_store,
+                        on_progress: Callable[[str, int], None] = None) -> List[str]:
+    """
+    Embed and index chunk batches as they arrive (earlier batches are indexed
+    while later pages are still being parsed). On failure the chunks already
+    added for this file are removed again.
     
-    return chunks
+    A file that is already indexed is replaced instead: chunks whose text is
+    unchanged keep their embedding, only new chunks are embedded, and the new
+    version is swapped in at the end (VectorStore.replace_document) so queries
+    never see half of each version.
+    
+    Args:
+        batches: Iterable of (chunks, token_counts), e.g. from iter_chunk_batches
+        filename: Name of the source file
+        vector_store: VectorStore to index into
+        on_progress: Optional callback(stage, chunks_indexed) with stage 'chunk', 'embed' or 'index'
+    
+    Returns:
+        IDs of the file's chunks, in order
+    """
+    # Another upload (or a delete) of the same file waits until this one is
+    # indexed or rolled back, so neither diffs against a half-written version
+    with vector_store.document_lock(filename):
+        # Embed for the index that will receive the chunks (a migration may have cut over since this worker last looked)
+        vector_store.follow_cutover()
+        spec = vector_store.embedding_spec
+
+        # Chunk hash -> IDs of the indexed version's chunks with that text
+        previous: Dict[str, List[str]] = {}
+        ingested_at = None  # a new version keeps the time the file was first ingested
+        for chunk in vector_store.get_document_chunks(filename):
+            previous.setdefault(chunk['chunk_hash'], []).append(chunk['id'])
+            ingested_at = ingested_at or chunk['metadata'].get('ingested_at')
+        replacing = bool(previous)
+        ingested_at = ingested_at or time.time()
+        taken = {chunk_id for chunk_ids in previous.values() for chunk_id in chunk_ids}
+
+        ids = []
+        metadatas = []
+        new_documents = []  # replacing: chunks to add in the swap
+
+        try:
+            for chunks, token_counts in batches:
+                hashes = [chunk_hash(chunk) for chunk in chunks]
+                batch_ids = []
+                new = []  # positions of chunks that need an embedding
+                for i, digest in enumerate(hashes):
+                    if previous.get(digest):
+                        batch_ids.append(previous[digest].pop(0))
+                    else:
+                        batch_ids.append(_new_chunk_id(filename, digest, taken))
+                        new.append(i)
+
+                if on_progress:
+                    on_progress('embed', len(ids))
+                embeddings = [None] * len(chunks)
+                if new:
+                    with timed(INGEST_STAGE_SECONDS, 'embed'):
+                        fresh = generate_embeddings([chunks[i] for i in new], token_counts=[token_counts[i] for i in new],
+                                                    spec=spec)
+                    for i, embedding in zip(new, fresh):
+                        embeddings[i] = embedding
+
+                if on_progress:
+                    on_progress('index', len(ids))
+                documents = build_documents(filename, chunks, embeddings, start_index=len(ids),
+                                            token_counts=token_counts, ids=batch_ids, hashes=hashes,
+                                            ingested_at=ingested_at)
+                if replacing:
+                    new_documents.extend(documents[i] for i in new)
+                elif documents:
+                    with timed(INGEST_STAGE_SECONDS, 'index'):
+                        vector_store.add_documents(documents, embedded_with=spec)
+
+                ids.extend(batch_ids)
+                metadatas.extend(doc['metadata'] for doc in documents)
+                if on_progress:
+                    on_progress('chunk', len(ids))  # waiting on the parser/chunker for the next batch
+
+            # total_chunks is only known once the whole file has been read
+            for metadata in metadatas:
+                metadata['total_chunks'] = len(ids)
+
+            if replacing:
+                added = {doc['id'] for doc in new_documents}
+                kept = [(chunk_id, metadata) for chunk_id, metadata in zip(ids, metadatas) if chunk_id not in added]
+                removed = [chunk_id for chunk_ids in previous.values() for chunk_id in chunk_ids]
+                with timed(INGEST_STAGE_SECONDS, 'index'):
+                    vector_store.replace_document(
+                        filename, new_documents,
+                        [chunk_id for chunk_id, _ in kept], [metadata for _, metadata in kept],
+                        removed, embedded_with=spec
+                    )
+            elif ids:
+                vector_store.update_metadatas(ids, metadatas)
+
+        except BaseException:
+            if hasattr(batches, 'close'):
+                batches.close()  # stop the producer process early
+            if ids and not replacing:
+                vector_store.delete_chunks(ids)  # don't leave a partially indexed document behind
+            raise
+
+    if on_progress:
+        on_progress('index', len(ids))
+    return ids
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash that identifies a chunk across versions of a document."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _new_chunk_id(filename: str, digest: str, taken: set) -> str:
+    """Chunk ID from the file name and chunk hash (repeated text gets .1, .2, ...)."""
+    base = f"{filename}#{digest[:16]}"
+    chunk_id = base
+    n = 0
+    while chunk_id in taken:
+        n += 1
+        chunk_id = f"{base}.{n}"
+    taken.add(chunk_id)
+    return chunk_id
 
 #calls OpenAI API to convert text chunks into vectors.
-def generate_embeddings(texts: List[str], batch_size: int = 100) -> List[List[float]]:
+def generate_embeddings(
+    texts: List[str],
+    batch_size: int = None,
+    token_counts: Optional[List[int]] = None,
+    spec: Optional[EmbeddingSpec] = None
+) -> List[List[float]]:
     """
     Generate embeddings for a list of texts using OpenAI API
-    Processes in batches to handle API limits
+    Texts already in the embedding cache are served from disk,
+    only cache misses are sent to the API
     
     Args:
         texts: List of text chunks to embed
-        batch_size: Number of chunks to embed per API call
+        batch_size: Max chunks per API call (defaults to config setting)
+        token_counts: Token count of each text, from chunk_text_with_counts
+                      (counted here if not given)
+        spec: Embedding model and dimension (defaults to config)
     
     Returns:
-        List of embedding vectors (each is a list of floats)
+        List of embedding vectors (each is a list of floats), in input order
     """
+    if token_counts is None:
+        token_counts = count_tokens(texts)
+    if spec is None:
+        spec = configured_spec()
+
+    cache = get_embedding_cache(spec)
+    if cache is None:
+        return _embed_texts(texts, token_counts, batch_size, spec)
+
+    keys = [cache.key(text) for text in texts]
+    found = cache.get_many(keys)
+
+    # Unique texts the cache doesn't have yet (duplicates inside a document are embedded once)
+    missing = {}
+    for key, text, count in zip(keys, texts, token_counts):
+        if key not in found and key not in missing:
+            missing[key] = (text, count)
+
+    logger.debug("Embedding cache hits=%d misses=%d", len(texts) - len(missing), len(missing))
+
+    if missing:
+        new_embeddings = _embed_texts(
+            [text for text, _ in missing.values()],
+            [count for _, count in missing.values()],
+            batch_size,
+            spec
+        )
+        fresh = dict(zip(missing.keys(), new_embeddings))
+        cache.put_many(fresh)
+        found.update(fresh)
+
+    return [found[key] for key in keys]
+
+
+def count_tokens(texts: List[str]) -> List[int]:
+    """Count tokens of each text with the embedding model's tokenizer."""
+    encoding = _embedding_encoding()
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=settings.CHUNK_ENCODE_THREADS)]
+
+
+@lru_cache()
+def _embedding_encoding() -> tiktoken.Encoding:
+    """Tokenizer of EMBEDDING_MODEL, loaded once per process."""
+    return tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+
+
+def pack_batches(token_counts: List[int], max_tokens: int = None, max_inputs: int = None) -> List[Tuple[int, int]]:
+    """
+    Group consecutive texts into batches under the per-request token and input limits
+    
+    Args:
+        token_counts: Token count of each text
+        max_tokens: Max total tokens per request (defaults to config setting)
+        max_inputs: Max texts per request (defaults to config setting)
+    
+    Returns:
+        List of (start, end) index ranges, in order
+    """
+    if max_tokens is None:
+        max_tokens = settings.EMBEDDING_BATCH_MAX_TOKENS
+    if max_inputs is None:
+        max_inputs = settings.EMBEDDING_BATCH_MAX_INPUTS
+
+    batches = []
+    start = 0
+    batch_tokens = 0
+    for i, count in enumerate(token_counts):
+        # Close the current batch if this text would overflow it (a single oversized text gets its own batch)
+        if i > start and (batch_tokens + count > max_tokens or i - start >= max_inputs):
+            batches.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+def _embed_texts(texts: List[str], token_counts: List[int], batch_size: int = None,
+                 spec: Optional[EmbeddingSpec] = None) -> List[List[float]]:
+    """Send texts to the embeddings API in token-packed batches, concurrently, in order."""
+    batches = pack_batches(token_counts, max_inputs=batch_size)
+
+    # Dispatch every batch to the shared pool, then collect results in input order
+    futures = [
+        embedding_pool.submit(_embed_batch, texts[start:end], batch_num, spec or configured_spec())
+        for batch_num, (start, end) in enumerate(batches, start=1)
+    ]
 
     all_embeddings = []  # store all the embedding vectors
+    try:
+        for future in futures:
+            all_embeddings.extend(future.result())
+    except Exception:
+        for future in futures:
+            future.cancel()  # don't keep paying for a document we won't index
+        raise  #so we dont index the dcument 
+
+    return all_embeddings
 
-    for i in range(0,len(texts),batch_size):  # creates: 0, 100, 200, 300 : looping 100 texts at a time
-        batch = texts[i:i + batch_size]
 
+def _embed_batch(batch: List[str], batch_num: int, spec: EmbeddingSpec) -> List[List[float]]:
+    """Embed one batch, retrying rate limits and server errors with backoff."""
+    max_retries = settings.EMBEDDING_MAX_RETRIES
+
+    for attempt in range(max_retries + 1):
         try:
-            response = client.embeddings.create(     #Sends batch of texts to OpenAI
-                model = settings.EMBEDDING_MODEL,    #Model: text-embedding-3-small
+            response = embedding_client.embeddings.create(     #Sends batch of texts to OpenAI
+                **spec.request_params(),    #Model (text-embedding-3-small) and output dimensions
                 input= batch
             )
 
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)  #extracts the vectors that have been embedded and add them to the list
-            
-            print(f" Generated embeddings for {len(batch)} chunks (batch {i//batch_size + 1})")  
-        
+            # extracts the vectors that have been embedded (API may not keep order, so sort by index)
+            batch_embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            logger.debug("Generated embeddings chunks=%d batch=%d", len(batch), batch_num)
+            return batch_embeddings
+
         except Exception as e:
-            print(f"Error generating embeddings for batch {i//batch_size + 1}: {e}")    #prints which batch failed
-            raise  #so we dont index the dcument 
+            if attempt == max_retries or not _is_retryable(e):
+                logger.error("Error generating embeddings for batch %d: %s", batch_num, e)    #logs which batch failed
+                raise
+
+            delay = _retry_delay(e, attempt)
+            logger.warning("Retrying embeddings batch=%d in %.1fs (%s)", batch_num, delay, type(e).__name__)
+            time.sleep(delay)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and connection problems are transient."""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait: the server's Retry-After if given, else exponential backoff with jitter."""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        retry_after_ms = response.headers.get('retry-after-ms')
+        retry_after = response.headers.get('retry-after')
+        try:
+            if retry_after_ms is not None:
+                return min(float(retry_after_ms) / 1000, settings.EMBEDDING_RETRY_MAX_DELAY)
+            if retry_after is not None:
+                return min(float(retry_after), settings.EMBEDDING_RETRY_MAX_DELAY)
+        except ValueError:
+            pass  # HTTP-date form: fall back to backoff
+
+    backoff = min(settings.EMBEDDING_RETRY_BASE_DELAY * (2 ** attempt), settings.EMBEDDING_RETRY_MAX_DELAY)
+    return backoff * (0.5 + random.random() / 2)
+
+#runs in a worker process: PDF parsing is CPU-bound
+def extract_text(file_path: str, file_ext: str) -> str:
+    """
+    Extract the text of a saved upload
+    Top-level function so it can be sent to a ProcessPoolExecutor
     
-    return all_embeddings
+    Args:
+        file_path: Path to the saved file
+        file_ext: File extension including the dot (.pdf, .txt, .md)
+    
+    Returns:
+        Document text
+    """
+    if file_ext == '.pdf':
+        return extract_pdf_text(file_path)
+
+    # .txt or .md
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+#pairs chunks with their embeddings in the format the vector store expects
+def build_documents(filename: str, chunks: List[str], embeddings: List[List[float]], start_index: int = 0,
+                    token_counts: Optional[List[int]] = None, ids: Optional[List[str]] = None,
+                    hashes: Optional[List[str]] = None, ingested_at: Optional[float] = None) -> List[Dict]:
+    """
+    Build vector store records from chunks and their embeddings
+    
+    Args:
+        filename: Name of the source file
+        chunks: Text chunks of the document
+        embeddings: One embedding vector per chunk
+        start_index: chunk_index of the first chunk (for documents indexed in batches)
+        token_counts: Token count of each chunk, stored as token_count metadata
+        ids: Chunk IDs (defaults to f"{filename}_{chunk_index}")
+        hashes: chunk_hash of each chunk (computed if not given)
+        ingested_at: Time the file was first ingested, stored as ingested_at metadata (defaults to now)
+    
+    Returns:
+        List of dicts with id, content, embedding and metadata
+    """
+    if hashes is None:
+        hashes = [chunk_hash(chunk) for chunk in chunks]
+    if ingested_at is None:
+        ingested_at = time.time()
+    file_type = file_type_of(filename)
+    documents = []
+    for idx, (chunk, embedding, digest) in enumerate(zip(chunks, embeddings, hashes), start=start_index):
+        documents.append({
+            'id': ids[idx - start_index] if ids is not None else f"{filename}_{idx}",
+            'content': chunk,
+            'embedding': embedding,
+            'metadata': {
+                'source_file': filename,
+                'chunk_index': idx,
+                'total_chunks': start_index + len(chunks),
+                'chunk_hash': digest,
+                'file_type': file_type,  # file_type and ingested_at: for query filters
+                'ingested_at': ingested_at
+            }
+        })
+    if token_counts is not None:
+        for document, count in zip(documents, token_counts):
+            document['metadata']['token_count'] = count
+    return documents
+
 
 #combines chunking and embedding into one simple function
 def process_document(filename: str, content: str) -> List[Dict]:
@@ -204,32 +822,23 @@ def process_document(filename: str, content: str) -> List[Dict]:
         - embedding: vector
         - metadata: source info
     """
-    print(f" Processing: {filename}")
+    logger.debug("Processing file=%s", filename)
 
     #Chunk the text
-    chunks = chunk_text(content)
-    print(f"Created {len(chunks)} chunks")  #Takes the full document text and splits it into 500-token chunks
+    with timed(INGEST_STAGE_SECONDS, 'chunk'):
+        chunks, token_counts = chunk_text_with_counts(content)
+    logger.debug("Created chunks=%d file=%s", len(chunks), filename)  #Takes the full document text and splits it into 500-token chunks
 
     if len(chunks) == 0:
-        print(f" No chunks created")
+        logger.warning("No chunks created file=%s", filename)
         return []
     
     #Generate embeddings
-    embeddings = generate_embeddings(chunks) #Converts all chunks to vectors 
+    with timed(INGEST_STAGE_SECONDS, 'embed'):
+        embeddings = generate_embeddings(chunks, token_counts=token_counts) #Converts all chunks to vectors 
     
     #Prepare documents for indexing
-    documents = []
-    for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        documents.append({
-            'id': f"{filename}_{idx}",
-            'content': chunk,
-            'embedding': embedding,
-            'metadata': {
-                'source_file': filename,
-                'chunk_index': idx,
-                'total_chunks': len(chunks)
-            }
-        })
+    documents = build_documents(filename, chunks, embeddings, token_counts=token_counts)
     
-    print(f"Processed {len(documents)} chunks\n")
+    logger.debug("Processed chunks=%d file=%s", len(documents), filename)
     return documents
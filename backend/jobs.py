@@ -0,0 +1,376 @@
+"""
+DocuMind Ingestion Jobs
+Background queue for /upload: files are processed by worker tasks while
+job and per-file progress is kept in SQLite so jobs survive restarts.
+Every server worker shares the database; a file is processed by the queue
+holding its lease, and files whose lease lapsed (their worker died) are
+claimed by another one.
+"""
+
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import sqlite3
+import threading
+import multiprocessing
+from functools import partial
+from pathlib import Path
+from typing import List, Dict, Optional
+from backend.config import settings
+from backend.ingestion import iter_chunk_batches, index_chunk_batches
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per-file stages, in the order a file moves through them
+# (extract: parsing the first pages; chunk: waiting on the parser/chunker for
+# the next batch; chunk/embed/index then repeat per streamed batch)
+STAGES = ["queued", "extract", "chunk", "embed", "index", "done"]
+TERMINAL_STAGES = {"done", "failed"}
+
+
+class JobStore:
+    """Durable job state in a small SQLite database"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Open (or create) the jobs database.
+
+        Args:
+            db_path: Path to the SQLite file (defaults to config)
+        """
+        if db_path is None:
+            db_path = settings.JOBS_DB_PATH
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One shared connection, guarded by a lock (workers run in threads and on the loop)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_files (
+                    job_id TEXT NOT NULL,
+                    file_index INTEGER NOT NULL,
+                    filename TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    chunks INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    lease_expires_at REAL,
+                    PRIMARY KEY (job_id, file_index)
+                )
+            """)
+            # Databases created before leases existed
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(job_files)")}
+            for column, kind in (('owner', 'TEXT'), ('lease_expires_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE job_files ADD COLUMN {column} {kind}")
+
+    def create_job(self, files: List[Dict], owner: Optional[str] = None, lease_seconds: float = 0) -> str:
+        """
+        Record a new job with its files in the 'queued' stage.
+
+        Args:
+            files: List of dicts with filename, path, size_bytes
+                   (and optionally stage/error for files rejected up front)
+            owner: Queue that will process the files (holds their lease)
+            lease_seconds: How long the lease lasts unless renewed
+
+        Returns:
+            The new job ID
+        """
+        job_id = uuid.uuid4().hex
+        lease_expires_at = time.time() + lease_seconds if owner else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, created_at) VALUES (?, ?)",
+                (job_id, time.time())
+            )
+            self._conn.executemany(
+                """INSERT INTO job_files (job_id, file_index, filename, path, size_bytes, stage, error,
+                                          owner, lease_expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (job_id, idx, f['filename'], f['path'], f['size_bytes'],
+                     f.get('stage', 'queued'), f.get('error'), owner, lease_expires_at)
+                    for idx, f in enumerate(files)
+                ]
+            )
+        return job_id
+
+    def update_file(self, job_id: str, file_index: int, **fields) -> None:
+        """Update columns of one job file (stage, chunks, error, timestamps)."""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE job_files SET {columns} WHERE job_id = ? AND file_index = ?",
+                (*fields.values(), job_id, file_index)
+            )
+
+    def get_file(self, job_id: str, file_index: int) -> Optional[Dict]:
+        """Return one job file row as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM job_files WHERE job_id = ? AND file_index = ?",
+                (job_id, file_index)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job with per-file progress and throughput.
+
+        Returns:
+            Dict shaped like JobStatusResponse, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT * FROM job_files WHERE job_id = ? ORDER BY file_index",
+                (job_id,)
+            ).fetchall()
+
+        now = time.time()
+        files = []
+        for row in rows:
+            elapsed = None
+            if row['started_at'] is not None:
+                elapsed = (row['finished_at'] or now) - row['started_at']
+            files.append({
+                'filename': row['filename'],
+                'stage': row['stage'],
+                'chunks': row['chunks'],
+                'size_bytes': row['size_bytes'],
+                'error': row['error'],
+                'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+                'chunks_per_second': round(row['chunks'] / elapsed, 2) if elapsed and row['stage'] == 'done' else None
+            })
+
+        done = sum(1 for f in files if f['stage'] == 'done')
+        failed = sum(1 for f in files if f['stage'] == 'failed')
+        total_chunks = sum(f['chunks'] for f in files if f['stage'] == 'done')
+
+        if done + failed == len(files):
+            status = 'failed' if done == 0 and failed > 0 else 'completed'
+        elif any(f['stage'] != 'queued' for f in files):
+            status = 'running'
+        else:
+            status = 'queued'
+
+        # Job-level throughput from the first file start to the last finish (or now)
+        started = [r['started_at'] for r in rows if r['started_at'] is not None]
+        finished = [r['finished_at'] for r in rows if r['finished_at'] is not None]
+        elapsed = None
+        if started:
+            end = max(finished) if status in ('completed', 'failed') and finished else now
+            elapsed = max(end - min(started), 1e-6)
+
+        return {
+            'job_id': job_id,
+            'status': status,
+            'created_at': job['created_at'],
+            'total_files': len(files),
+            'files_done': done,
+            'files_failed': failed,
+            'total_chunks': total_chunks,
+            'elapsed_seconds': round(elapsed, 3) if elapsed is not None else None,
+            'chunks_per_second': round(total_chunks / elapsed, 2) if elapsed else None,
+            'files': files
+        }
+
+    def claim_unfinished(self, owner: str, lease_seconds: float) -> List[Dict]:
+        """
+        Atomically take over unfinished files no live queue holds: never
+        claimed, released at shutdown, or with a lapsed lease (worker died).
+        Claimed files go back to 'queued'.
+
+        Returns:
+            The claimed rows (job_id, file_index, filename), in upload order
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                """UPDATE job_files SET owner = ?, lease_expires_at = ?, stage = 'queued', started_at = NULL
+                   WHERE stage NOT IN ('done', 'failed')
+                     AND (owner IS NULL OR lease_expires_at IS NULL OR lease_expires_at < ?)
+                   RETURNING job_id, file_index, filename""",
+                (owner, now + lease_seconds, now)
+            ).fetchall()
+        return sorted((dict(row) for row in rows), key=lambda row: (row['job_id'], row['file_index']))
+
+    def renew_leases(self, owner: str, lease_seconds: float) -> None:
+        """Extend the lease on every unfinished file the owner holds."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_files SET lease_expires_at = ? WHERE owner = ? AND stage NOT IN ('done', 'failed')",
+                (time.time() + lease_seconds, owner)
+            )
+
+    def release(self, owner: str) -> None:
+        """Give up the owner's unfinished files (shutdown), so the next queue to look claims them at once."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_files SET owner = NULL, lease_expires_at = NULL "
+                "WHERE owner = ? AND stage NOT IN ('done', 'failed')",
+                (owner,)
+            )
+
+
+class IngestionQueue:
+    """In-process work queue that runs the ingestion pipeline for job files"""
+
+    def __init__(self, store: JobStore, vector_store, process_pool, thread_pool, num_workers: int = None,
+                 lease_seconds: float = None):
+        """
+        Args:
+            store: JobStore holding durable progress
+            vector_store: VectorStore to index into
+            process_pool: Executor for CPU-bound extraction/chunking
+            thread_pool: Executor for blocking I/O (embeddings, ChromaDB); a worker holds one of its
+                         threads for a whole file, so size it to num_workers and keep request-path work off it
+            num_workers: Files processed concurrently (defaults to config)
+            lease_seconds: Lease on claimed files, renewed while this queue runs (defaults to config)
+        """
+        if num_workers is None:
+            num_workers = settings.INGEST_JOB_WORKERS
+        if lease_seconds is None:
+            lease_seconds = settings.INGEST_JOB_LEASE_SECONDS
+
+        self.store = store
+        self.vector_store = vector_store
+        self.process_pool = process_pool
+        self.thread_pool = thread_pool
+        self.num_workers = num_workers
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"  # this queue, in job_files.owner
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._manager = None  # multiprocessing Manager: queues that stream chunks out of worker processes
+
+    async def start(self) -> None:
+        """Start worker tasks and claim files left unfinished by a previous run."""
+        self._manager = multiprocessing.get_context("spawn").Manager()
+        self._queue = asyncio.Queue()
+        for _ in range(self.num_workers):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+        self._claim_unfinished()
+        self._heartbeat = asyncio.create_task(self._renew_leases())
+
+    async def stop(self) -> None:
+        """Cancel worker tasks and release their files; in-progress files are claimed again on next start."""
+        tasks = self._workers + ([self._heartbeat] if self._heartbeat is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._heartbeat = None
+        self.store.release(self.owner)
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def submit(self, files: List[Dict]) -> str:
+        """
+        Create a job for already-saved files and queue them.
+
+        Args:
+            files: List of dicts with filename, path, size_bytes
+
+        Returns:
+            The job ID
+        """
+        job_id = self.store.create_job(files, owner=self.owner, lease_seconds=self.lease_seconds)
+        for idx, f in enumerate(files):
+            if f.get('stage', 'queued') == 'queued':
+                self._queue.put_nowait((job_id, idx))
+        return job_id
+
+    def _claim_unfinished(self) -> None:
+        """Queue the unfinished files no live worker holds."""
+        claimed = self.store.claim_unfinished(self.owner, self.lease_seconds)
+        for row in claimed:
+            self._queue.put_nowait((row['job_id'], row['file_index']))
+        if claimed:
+            logger.info("Claimed %d unfinished file(s) from a previous or stopped worker", len(claimed))
+
+    async def _renew_leases(self) -> None:
+        """Keep this queue's leases alive, and take over files of workers that died."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                self.store.renew_leases(self.owner, self.lease_seconds)
+                self._claim_unfinished()
+            except Exception as e:
+                logger.error("Renewing ingestion leases failed: %s", e)
+
+    async def _worker(self) -> None:
+        """Take files off the queue forever."""
+        while True:
+            job_id, file_index = await self._queue.get()
+            try:
+                await self._process_file(job_id, file_index)
+            finally:
+                self._queue.task_done()
+
+    async def _process_file(self, job_id: str, file_index: int) -> None:
+        """Run one file through extract -> chunk -> embed -> index (stages overlap per batch)."""
+        row = self.store.get_file(job_id, file_index)
+        if row is None or row['stage'] in TERMINAL_STAGES or row['owner'] != self.owner:
+            return  # finished, or claimed by another worker after this queue's lease lapsed
+
+        loop = asyncio.get_running_loop()
+        file_path = row['path']
+        file_ext = Path(row['filename']).suffix.lower()
+
+        def on_progress(stage: str, chunks: int) -> None:
+            self.store.update_file(job_id, file_index, stage=stage, chunks=chunks)
+
+        try:
+            self.store.update_file(job_id, file_index, stage='extract', started_at=time.time())
+
+            # Pages are parsed and chunked in a worker process and streamed back in
+            # batches; each batch is embedded and indexed while later pages are parsed
+            batches = iter_chunk_batches(self.process_pool, self._manager, file_path, file_ext)
+            await loop.run_in_executor(
+                self.thread_pool,
+                partial(index_chunk_batches, batches, row['filename'], self.vector_store, on_progress)
+            )
+            self.vector_store.catalog.set_file_size(row['filename'], row['size_bytes'])
+
+            self.store.update_file(job_id, file_index, stage='done', finished_at=time.time())
+
+            # Clean up the saved upload, as now its in the db
+            await loop.run_in_executor(self.thread_pool, os.remove, file_path)
+
+        except asyncio.CancelledError:
+            raise  # Shutting down: stop() releases the file so it is claimed again on restart
+        except Exception as e:
+            logger.error("Error processing %s (job %s): %s", row['filename'], job_id, e)
+            self.store.update_file(job_id, file_index, stage='failed', error=str(e), finished_at=time.time())
+
+            # A failed file is not retried: don't keep its upload around
+            try:
+                await loop.run_in_executor(self.thread_pool, os.remove, file_path)
+            except FileNotFoundError:
+                pass
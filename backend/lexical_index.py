@@ -0,0 +1,178 @@
+"""
+DocuMind Lexical Index
+On-disk BM25 inverted index (SQLite FTS5) kept next to the Chroma
+collection, so exact identifiers and names can be found without
+embedding the question.
+"""
+
+import re
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from backend.vector_index import where_sql
+
+
+# Query terms: runs of letters/digits, with inner _ . - kept (user_id, v1.2, gpt-4o)
+TERM_PATTERN = re.compile(r"\w+(?:[._-]\w+)*")
+
+
+class LexicalIndex:
+    """BM25 search over chunk text, mirroring the vector store's chunks"""
+
+    # Max ids per SQL IN (...) statement
+    ID_BATCH = 500
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: Path to the SQLite file
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Chunk rows, plus an external-content FTS5 table over their text kept in sync by triggers
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    source_file TEXT,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source_file ON chunks (source_file)")
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                    content, content='chunks', content_rowid='rowid',
+                    tokenize="unicode61 remove_diacritics 2 tokenchars '_'"
+                )
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                    INSERT INTO chunks_fts (rowid, content) VALUES (new.rowid, new.content);
+                END
+            """)
+            self._conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                    INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+                END
+            """)
+
+    def count(self) -> int:
+        """Number of indexed chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, ids: List[str], contents: List[str], metadatas: List[Dict]) -> None:
+        """Index chunks (replacing any with the same ID)."""
+        with self._lock, self._conn:
+            self._delete_ids(ids)
+            self._conn.executemany(
+                "INSERT INTO chunks (id, source_file, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, (meta or {}).get('source_file'), content, json.dumps(meta or {}))
+                    for chunk_id, content, meta in zip(ids, contents, metadatas)
+                ]
+            )
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]) -> None:
+        """Replace the stored metadata of indexed chunks."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(meta or {}), chunk_id) for chunk_id, meta in zip(ids, metadatas)]
+            )
+
+    def delete_ids(self, ids: List[str]) -> None:
+        """Remove chunks by ID."""
+        with self._lock, self._conn:
+            self._delete_ids(ids)
+
+    def delete_source(self, source_file: str) -> None:
+        """Remove every chunk of a file."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE source_file = ?", (source_file,))
+
+    def clear(self) -> None:
+        """Remove everything."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+
+    def _delete_ids(self, ids: List[str]) -> None:
+        """Delete rows by ID (caller holds the lock and transaction)."""
+        for i in range(0, len(ids), self.ID_BATCH):
+            batch = ids[i:i + self.ID_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM chunks WHERE id IN ({placeholders})", batch)
+
+    def search(self, query_text: str, n_results: int = 5, where: Optional[Dict] = None) -> List[Dict]:
+        """
+        Rank chunks by BM25 against any of the query's terms.
+
+        Args:
+            query_text: The question as text
+            n_results: Number of results to return
+            where: Chroma-style metadata filter the chunks must match
+
+        Returns:
+            List of dicts with id, document, metadata, score (higher is better)
+            and matches_all (whether the chunk contains every query term), best first
+        """
+        terms = query_terms(query_text)
+        if not terms:
+            return []
+
+        any_terms = " OR ".join(terms)
+        all_terms = " AND ".join(terms)
+        clause, params = where_sql(where) if where else ("1", [])
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT c.id, c.content, c.metadata, -bm25(chunks_fts) AS score,
+                       c.rowid IN (SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ?) AS matches_all
+                FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+                WHERE chunks_fts MATCH ? AND {clause}
+                ORDER BY bm25(chunks_fts)
+                LIMIT ?
+                """,
+                (all_terms, any_terms, *params, n_results)
+            ).fetchall()
+
+        return [
+            {
+                'id': chunk_id,
+                'document': content,
+                'metadata': json.loads(metadata),
+                'score': score,
+                'matches_all': bool(matches_all)
+            }
+            for chunk_id, content, metadata, score, matches_all in rows
+        ]
+
+
+def query_terms(query_text: str) -> List[str]:
+    """Distinct query terms as quoted FTS5 strings (quoting keeps operators and punctuation literal)."""
+    terms = dict.fromkeys(term.lower() for term in TERM_PATTERN.findall(query_text))
+    return ['"' + term.replace('"', '""') + '"' for term in terms]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists: each ID scores sum(1 / (k + rank)) over the lists it appears in.
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
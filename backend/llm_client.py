@@ -1,26 +1,37 @@
-from openai import OpenAI
-from typing import List
+import time
+import logging
+import openai
+from typing import List, Dict, AsyncIterator, Optional
 from backend.config import settings
+from backend.clients import get_async_openai_client, get_upstream_limiter, UpstreamBusyError
+from backend.context_packer import pack_context
+from backend.metrics import QUERY_STAGE_SECONDS, CONTEXT_TOKENS, record_stage, timed
 from backend.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 
 
+logger = logging.getLogger(__name__)
+
 
 class LLMClient:
     """
     Client for interacting with OpenAI's models
     Generates answers based on retrieved context
     """
+
+    ERROR_ANSWER = "I encountered an error while generating the answer,try asking again."
     
     def __init__(self):
-        """Initialize the OpenAI client."""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Use the shared AsyncOpenAI client and upstream limiter."""
+        self.client = get_async_openai_client()
+        self.limiter = get_upstream_limiter()
         self.model = settings.LLM_MODEL
     
-    def generate_answer(
+    async def generate_answer(
         self,
         query: str,
         context_chunks: List[str],
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        metadatas: Optional[List[Dict]] = None
     )-> str:
         """
           Generate an answer using retrieved context.
@@ -29,31 +40,93 @@ class LLMClient:
               query: The user's question
               context_chunks: List of relevant text chunks from vector store
               max_tokens: Maximum length of the response (default: 500)
+              metadatas: Metadata of each chunk (source_file, chunk_index), used to merge neighbours
         
            Returns:
         The generated answer as a string
-        """
-        #Takes the list of chunks,joins them into one big strent with double lines between each(gpt needs a string not a list)
-        context = "\n\n".join(context_chunks)
         
-        # Create the user prompt using template
-        user_prompt = USER_PROMPT_TEMPLATE.format(context=context, query=query)
+        Raises:
+            UpstreamBusyError: No upstream slot (the caller should answer 503)
+            openai.RateLimitError: OpenAI kept rate limiting after retries (the caller should answer 429)
+        """
+        messages = self._build_messages(query, context_chunks, metadatas)
         
         try:
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.7,
-                frequency_penalty=0.3  # Reduce repetition
-            )
+            async with self.limiter.slot():
+                with timed(QUERY_STAGE_SECONDS, 'llm'):
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=0.7,
+                        frequency_penalty=0.3  # Reduce repetition
+                    )
             
             return response.choices[0].message.content.strip()
             
+        except (UpstreamBusyError, openai.RateLimitError):
+            raise
         except Exception as e:
-            print(f"Error generating answer: {e}")
-            return "I encountered an error while generating the answer,try asking again."
+            logger.error("Error generating answer: %s", e)
+            return self.ERROR_ANSWER
+
+    async def stream_answer(
+        self,
+        query: str,
+        context_chunks: List[str],
+        max_tokens: int = 500,
+        metadatas: Optional[List[Dict]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate an answer as a stream of text deltas.
+        
+        Args:
+            query: The user's question
+            context_chunks: List of relevant text chunks from vector store
+            max_tokens: Maximum length of the response (default: 500)
+            metadatas: Metadata of each chunk (source_file, chunk_index), used to merge neighbours
+        
+        Yields:
+            Pieces of the answer as the model produces them
+        """
+        messages = self._build_messages(query, context_chunks, metadatas)
+
+        # The slot is held until the whole answer has streamed
+        async with self.limiter.slot():
+            start = time.perf_counter()
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                frequency_penalty=0.3,  # Reduce repetition
+                stream=True
+            )
+
+            first_token = True
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token:
+                        record_stage(QUERY_STAGE_SECONDS, 'llm_first_token', time.perf_counter() - start)
+                        first_token = False
+                    yield chunk.choices[0].delta.content
+            record_stage(QUERY_STAGE_SECONDS, 'llm', time.perf_counter() - start)
+
+    def _build_messages(self, query: str, context_chunks: List[str], metadatas: Optional[List[Dict]] = None) -> List[Dict[str, str]]:
+        """Build the chat messages for a question and its retrieved context."""
+        # Merge neighbouring chunks (dropping their repeated overlap) and fit them into the token budget
+        with timed(QUERY_STAGE_SECONDS, 'pack'):
+            packed = pack_context(context_chunks, metadatas)
+        logger.debug("Context chunks=%d/%d passages=%d tokens=%d saved=%d", packed.chunks_packed, packed.chunks_total,
+                     len(packed.passages), packed.context_tokens, packed.tokens_saved)
+        CONTEXT_TOKENS.labels(kind="packed").inc(packed.context_tokens)
+        CONTEXT_TOKENS.labels(kind="saved").inc(max(packed.tokens_saved, 0))
+        
+        # Create the user prompt using template
+        user_prompt = USER_PROMPT_TEMPLATE.format(context=packed.text, query=query)
+
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ]
@@ -1,17 +1,44 @@
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from typing import List
-import os
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Optional, Tuple
+import json
+import time
+import openai
+import uuid
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from backend.config import settings
 from backend.schemas import QueryRequest, QueryResponse, StatsResponse, ProcessedDocument
-from backend.ingestion import extract_pdf_text, chunk_text, generate_embeddings, process_document
-from backend.vector_store import VectorStore
+from backend.schemas import BatchQueryRequest, BatchQueryResponse, BatchQueryItem
+from backend.schemas import UploadJobResponse, JobStatusResponse, DocumentListResponse
+from backend.jobs import JobStore, IngestionQueue
+from backend.embedding_cache import get_embedding_cache
+from backend.answer_cache import AnswerCache
+from backend.query_cache import normalize_query
+from backend.single_flight import SingleFlight
+from backend.vector_store import VectorStore, QueryNotEmbeddedError, filter_where
+from backend.active_index import EmbeddingSpec
 from backend.llm_client import LLMClient
+from backend.clients import UpstreamBusyError
+from backend.metrics import (
+    INGEST_STAGE_SECONDS, REQUEST_SECONDS, CACHE_LOOKUPS,
+    start_request_timing, server_timing_header, timed
+)
+
+
+logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
 
+NO_RESULTS_ANSWER = "I couldn't find any relevant information in your knowledge base for this question."
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -32,9 +59,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Endpoints that report their stage breakdown in a Server-Timing header
+SERVER_TIMING_PATHS = {"/query", "/query/batch", "/upload"}
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    """Time every request; /query and /upload also return their stages as Server-Timing."""
+    timings = start_request_timing()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Label by route template (/jobs/{job_id}), not the raw path, to bound cardinality
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.labels(request.method, endpoint, str(response.status_code)).observe(elapsed)
+
+    if request.url.path in SERVER_TIMING_PATHS:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
 # Initialize services
 vector_store = VectorStore()
 llm_client = LLMClient()
+answer_cache = AnswerCache() if settings.ANSWER_CACHE_ENABLED else None
+query_flights = SingleFlight() if settings.QUERY_COALESCING_ENABLED else None
+
+# Worker pools for /upload so ingestion never blocks the event loop
+# spawn (not fork) because the parent already runs ChromaDB/uvicorn threads
+ingest_process_pool = ProcessPoolExecutor(
+    max_workers=settings.INGEST_PROCESS_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+)
+ingest_thread_pool = ThreadPoolExecutor(
+    max_workers=settings.INGEST_THREAD_WORKERS,
+    thread_name_prefix="ingest"
+)
+# Job workers hold a thread for a whole file (embedding and indexing): their own pool,
+# so /upload's file saves never queue behind them
+ingest_job_pool = ThreadPoolExecutor(
+    max_workers=settings.INGEST_JOB_WORKERS,
+    thread_name_prefix="ingest-job"
+)
+
+# Background ingestion queue (job state survives restarts)
+job_store = JobStore()
+ingestion_queue = IngestionQueue(job_store, vector_store, ingest_process_pool, ingest_job_pool)
+
+@app.on_event("startup")
+async def start_ingestion_queue():
+    """Start ingestion workers and resume unfinished jobs."""
+    await ingestion_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    """Stop ingestion workers and the worker pools."""
+    await ingestion_queue.stop()
+    ingest_process_pool.shutdown(wait=False, cancel_futures=True)
+    ingest_thread_pool.shutdown(wait=False, cancel_futures=True)
+    ingest_job_pool.shutdown(wait=False, cancel_futures=True)
 
 # Create uploads directory (fixed for Docker)
 UPLOAD_DIR = Path(__file__).resolve().parent / "uploads"
@@ -56,70 +139,97 @@ async def api_info():
         "message": "Welcome to DocuMind API",
         "version": "1.0.0",
         "endpoints": {
-            "POST /upload": "Upload documents",
+            "POST /upload": "Upload documents (returns a job ID)",
+            "GET /jobs/{job_id}": "Ingestion job progress",
             "POST /query": "Ask questions",
+            "POST /query/stream": "Ask questions (streamed answer, Server-Sent Events)",
+            "POST /query/batch": "Ask many questions at once (results in order, per-question errors)",
             "GET /stats": "Get statistics",
+            "GET /documents": "List indexed documents (paginated: offset, limit)",
+            "GET /cache/stats": "Answer and embedding cache hit/miss counters",
+            "GET /metrics": "Prometheus metrics (per-stage latency histograms)",
             "DELETE /clear": "Clear database",
             "GET /health": "Health check"
         }
     }
 
 # POST endpoint (used for sending data TO server)
-@app.post("/upload")
+@app.post("/upload", status_code=202, response_model=UploadJobResponse)
 async def upload_documents(files: List[UploadFile] = File(...)):
     """
-    Upload and process documents for indexing
+    Upload documents and queue them for indexing
     
     Accepts: PDF, TXT, MD files
+    Returns immediately with a job ID; poll GET /jobs/{job_id} for progress
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
     
-    processed_count = 0   # Track how many files succeeded
-    errors = []           # List to store error messages for failed files
+    loop = asyncio.get_running_loop()
+    allowed_extensions = [".pdf", ".txt", ".md"]
+    queued = []     # Saved files handed to the ingestion queue
+    rejected = []   # Error messages for files we refuse up front
     
     for file in files:
-        try:
-            # Validate file type
-            allowed_extensions = [".pdf", ".txt", ".md"]
-            file_ext = Path(file.filename).suffix.lower()
-            
-            if file_ext not in allowed_extensions:
-                errors.append(f"{file.filename}: Unsupported file type")
-                continue
+        filename = Path(file.filename).name
+        file_ext = Path(filename).suffix.lower()
+        
+        # Validate file type
+        if file_ext not in allowed_extensions:
+            rejected.append(f"{filename}: Unsupported file type")
+            continue
 
-            # Save file to disk temporarily, 'wb':write mode 
-            file_path = UPLOAD_DIR / file.filename
+        # Save file to disk until a worker picks it up (unique name per upload)
+        file_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{filename}"
+        with timed(INGEST_STAGE_SECONDS, 'save'):
             content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
-            
-            # Process the document
-            if file_ext == '.pdf':
-                text = extract_pdf_text(str(file_path))
-            else:  # .txt or .md
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-            
-            # Process and add to vector store
-            documents = process_document(file.filename, text)
-            vector_store.add_documents(documents)
-
-            # Increment success counter (file proc. successfully)
-            processed_count += 1
-            
-            # Clean up temporary file, as now its in the db
-            os.remove(file_path)
-            
-        except Exception as e:
-            errors.append(f"{file.filename}: {str(e)}")
+            await loop.run_in_executor(ingest_thread_pool, file_path.write_bytes, content)
+        
+        queued.append({
+            'filename': filename,
+            'path': str(file_path),
+            'size_bytes': len(content)
+        })
     
-    return {
-        "message": f"Processed {processed_count} file(s)",
-        "processed": processed_count,
-        "total": len(files),
-        "errors": errors if errors else None
-    }
+    if not queued:
+        raise HTTPException(status_code=400, detail="; ".join(rejected))
+    
+    with timed(INGEST_STAGE_SECONDS, 'queue'):
+        job_id = ingestion_queue.submit(queued)
+    
+    return UploadJobResponse(
+        job_id=job_id,
+        status_url=f"/jobs/{job_id}",
+        total_files=len(queued),
+        rejected=rejected
+    )
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Get progress of an ingestion job."""
+    job = job_store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
+@app.exception_handler(UpstreamBusyError)
+async def upstream_busy_handler(request: Request, exc: UpstreamBusyError):
+    """Too many requests waiting for OpenAI: reject quickly so clients back off."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(openai.RateLimitError)
+async def upstream_rate_limited_handler(request: Request, exc: openai.RateLimitError):
+    """OpenAI kept rate limiting after the client's retries: pass its Retry-After on."""
+    retry_after = exc.response.headers.get("retry-after") or str(settings.UPSTREAM_RETRY_AFTER_SECONDS)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "The language model is rate limited, retry later"},
+        headers={"Retry-After": retry_after}
+    )
 
 # POST endpoint for asking questions
 @app.post("/query", response_model=QueryResponse)
@@ -130,47 +240,347 @@ async def query_documents(request: QueryRequest):
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
     
+    if query_flights is None:
+        return await answer_query(request)
+    
+    # The same question is already being answered: share that answer instead of computing it again
+    key = (normalize_query(request.query), request.top_k, filter_scope(request), vector_store.corpus_version)
+    response = await query_flights.run(key, lambda: answer_query(request))
+    return response.model_copy(update={"query": request.query})
+
+async def answer_query(request: QueryRequest) -> QueryResponse:
+    """Answer one question: answer cache, retrieval, then the LLM."""
     try:
-        # Get relevant chunks from vector store
-        results = vector_store.query(
-            query_text=request.query,
-            n_results=request.top_k
-        )
+        # Same (or near-identical) question against an unchanged corpus: reuse the answer
+        cached, version, query_embedding, results, embedded_with = await get_cached_answer(request)
+        if cached is not None:
+            return QueryResponse(**cached)
+        
+        # Get relevant chunks from vector store unless BM25 already did
+        if results is None:
+            results = await retrieve(request, query_embedding, embedded_with)
         
         if not results["documents"]:
-            return QueryResponse(
+            response = QueryResponse(
                 query=request.query,
-                answer="I couldn't find any relevant information in your knowledge base for this question.",
+                answer=NO_RESULTS_ANSWER,
                 sources=[],
                 chunks_used=0
             )
+            cache_answer(request, version, query_embedding, response.model_dump())
+            return response
         
         # Generate answer using LLM
-        answer = llm_client.generate_answer(
+        answer = await llm_client.generate_answer(
             query=request.query,
-            context_chunks=results["documents"]
+            context_chunks=results["documents"],
+            metadatas=results["metadatas"]
         )
         
         # Prepare sources
-        sources = [
-            {
-                "text": doc,
-                "source_file": meta.get("source_file", "unknown"),
-                "chunk_index": meta.get("chunk_index", 0)
-            }
-            for doc, meta in zip(results["documents"], results["metadatas"])
-        ]
+        sources = build_sources(results)
         
-        return QueryResponse(
+        response = QueryResponse(
             query=request.query,
             answer=answer,
             sources=sources,
             chunks_used=len(results["documents"])
         )
+        cache_answer(request, version, query_embedding, response.model_dump())
+        return response
         
+    except (UpstreamBusyError, openai.RateLimitError):
+        raise  # 503/429 with Retry-After (see the exception handlers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+
+# POST endpoint streaming the answer as Server-Sent Events
+@app.post("/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """
+    Query the knowledge base and stream the answer
+    
+    Events: 'sources' (retrieved chunks, sent first), 'delta' (answer text),
+    'done' (end of answer) or 'error'
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    
+    try:
+        cached, version, query_embedding, results, embedded_with = await get_cached_answer(request)
+        if cached is None and results is None:
+            results = await retrieve(request, query_embedding, embedded_with)
+        if cached is None and results["documents"]:
+            llm_client.limiter.check()  # reject with 503 now rather than after the stream has started
+    except (UpstreamBusyError, openai.RateLimitError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+    async def event_stream():
+        if cached is not None:
+            # Cache hit: replay the whole answer as a single delta
+            yield format_sse("sources", {"query": request.query, "sources": cached["sources"]})
+            yield format_sse("delta", {"text": cached["answer"]})
+            yield format_sse("done", {"chunks_used": cached["chunks_used"]})
+            return
+
+        sources = build_sources(results)
+        yield format_sse("sources", {"query": request.query, "sources": sources})
+
+        if not results["documents"]:
+            yield format_sse("delta", {"text": NO_RESULTS_ANSWER})
+            yield format_sse("done", {"chunks_used": 0})
+            return
+
+        answer_parts = []
+        try:
+            async for delta in llm_client.stream_answer(
+                query=request.query,
+                context_chunks=results["documents"],
+                metadatas=results["metadatas"]
+            ):
+                answer_parts.append(delta)
+                yield format_sse("delta", {"text": delta})
+        except Exception as e:
+            logger.error("Error streaming answer: %s", e)
+            yield format_sse("error", {"detail": LLMClient.ERROR_ANSWER})
+            return
+
+        yield format_sse("done", {"chunks_used": len(results["documents"])})
+
+        cache_answer(request, version, query_embedding, {
+            "query": request.query,
+            "answer": "".join(answer_parts).strip(),
+            "sources": sources,
+            "chunks_used": len(results["documents"])
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # don't let proxies buffer the stream
+        }
+    )
+
+# POST endpoint answering many questions in one request
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(request: BatchQueryRequest):
+    """
+    Answer a batch of questions: one embeddings request and one Chroma query
+    for all of them (one per distinct filter), then answers generated
+    concurrently (QUERY_BATCH_CONCURRENCY at a time). Results are in question order; a question that fails gets an
+    error without failing the rest of the batch.
+    """
+    questions = request.questions
+    if len(questions) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUERY_BATCH_MAX_QUESTIONS} questions per batch"
+        )
+
+    items = [BatchQueryItem(index=i) for i in range(len(questions))]
+    valid = []
+    for i, question in enumerate(questions):
+        if question.query.strip():
+            valid.append(i)
+        else:
+            items[i].error = "Query cannot be empty"
+
+    # Cache lookups and one embeddings request for the whole batch, then one retrieval in a worker thread
+    try:
+        cached, version, embeddings, fast, embedded_with = await get_cached_answers([questions[i] for i in valid])
+        pending = []
+        for i, hit, embedding, results in zip(valid, cached, embeddings, fast):
+            if hit is not None:
+                items[i].response = QueryResponse(**hit)
+            else:
+                pending.append((i, embedding, results))
+
+        # Questions BM25 answered alone already have their results
+        to_retrieve = [(i, embedding) for i, embedding, results in pending if results is None]
+        if to_retrieve:
+            searched = iter(await retrieve_batch(
+                [questions[i] for i, _ in to_retrieve],
+                [embedding for _, embedding in to_retrieve],
+                embedded_with
+            ))
+        retrieved = [results if results is not None else next(searched) for _, _, results in pending]
+    except (UpstreamBusyError, openai.RateLimitError):
+        raise  # nothing could be answered: let the client retry the batch
+    except Exception as e:
+        logger.error("Batch retrieval failed: %s", e)
+        for i in valid:
+            if items[i].response is None:
+                items[i].error = f"Query failed: {str(e)}"
+        return BatchQueryResponse(results=items)
+
+    semaphore = asyncio.Semaphore(settings.QUERY_BATCH_CONCURRENCY)
+
+    async def answer(i: int, query_embedding: Optional[List[float]], results: Dict) -> None:
+        question = questions[i]
+        try:
+            if not results["documents"]:
+                response = QueryResponse(query=question.query, answer=NO_RESULTS_ANSWER, sources=[], chunks_used=0)
+            else:
+                async with semaphore:
+                    answer_text = await llm_client.generate_answer(
+                        query=question.query,
+                        context_chunks=results["documents"],
+                        metadatas=results["metadatas"]
+                    )
+                response = QueryResponse(
+                    query=question.query,
+                    answer=answer_text,
+                    sources=build_sources(results),
+                    chunks_used=len(results["documents"])
+                )
+                if answer_text == LLMClient.ERROR_ANSWER:
+                    items[i].error = "Answer generation failed"
+            items[i].response = response
+            cache_answer(question, version, query_embedding, response.model_dump())
+        except (UpstreamBusyError, openai.RateLimitError) as e:
+            items[i].error = f"Server busy, retry later: {str(e)}"
+        except Exception as e:
+            items[i].error = f"Query failed: {str(e)}"
+
+    await asyncio.gather(*(
+        answer(i, embedding, results) for (i, embedding, _), results in zip(pending, retrieved)
+    ))
+    return BatchQueryResponse(results=items)
+
+async def get_cached_answer(
+    request: QueryRequest
+) -> Tuple[Optional[Dict], str, Optional[List[float]], Optional[Dict], EmbeddingSpec]:
+    """
+    Look a question up in the answer cache (see get_cached_answers).
+    
+    Returns:
+        Tuple of (cached response or None, corpus version, query embedding or None,
+        BM25 fast-path results or None, embedding model of the query embedding)
+    """
+    cached, version, embeddings, retrieved, embedded_with = await get_cached_answers([request])
+    return cached[0], version, embeddings[0], retrieved[0], embedded_with
+
+async def get_cached_answers(
+    requests: List[QueryRequest]
+) -> Tuple[List[Optional[Dict]], str, List[Optional[List[float]]], List[Optional[Dict]], EmbeddingSpec]:
+    """
+    Look questions up in the answer cache. Questions that aren't exact hits
+    and that BM25 can't answer alone are embedded together in one async
+    request (needed for the semantic tier and reused for retrieval); the
+    results of those BM25 does answer alone are returned so retrieval isn't
+    run again.
+    
+    Returns:
+        Tuple of (cached response or None per question, corpus version, query embedding or None per question,
+        BM25 fast-path results or None per question, embedding model of the query embeddings)
+    """
+    version = vector_store.corpus_version
+    embedded_with = vector_store.embedding_spec  # read before embedding: a cutover meanwhile makes them stale
+    cached: List[Optional[Dict]] = [None] * len(requests)
+    embeddings: List[Optional[List[float]]] = [None] * len(requests)
+    retrieved: List[Optional[Dict]] = [None] * len(requests)
+
+    candidates = []
+    for i, request in enumerate(requests):
+        hit = answer_cache.get_exact(request.query, request.top_k, version, filter_scope(request)) if answer_cache is not None else None
+        if hit is not None:
+            CACHE_LOOKUPS.labels(cache="answer", result="exact_hit").inc()
+            cached[i] = {**hit, "query": request.query}
+        else:
+            candidates.append(i)
+
+    # A decisive keyword match is retrieved without embeddings: don't embed it at all
+    fast = await run_in_threadpool(lambda: [
+        vector_store.lexical_fast_path(requests[i].query, requests[i].top_k, requests[i].filters)
+        for i in candidates
+    ])
+    for i, results in zip(candidates, fast):
+        retrieved[i] = results
+    to_embed = [i for i, results in zip(candidates, fast) if results is None]
+    if answer_cache is not None:
+        for _ in range(len(candidates) - len(to_embed)):
+            CACHE_LOOKUPS.labels(cache="answer", result="miss").inc()
+
+    if to_embed:
+        query_embeddings = await vector_store.aembed_queries([requests[i].query for i in to_embed])
+        for i, query_embedding in zip(to_embed, query_embeddings):
+            embeddings[i] = query_embedding
+            if answer_cache is None:
+                continue
+            # Semantic tier: a rephrasing of a cached question within the cosine threshold
+            hit = answer_cache.get_semantic(query_embedding, requests[i].top_k, version, filter_scope(requests[i]))
+            if hit is not None:
+                CACHE_LOOKUPS.labels(cache="answer", result="semantic_hit").inc()
+                cached[i] = {**hit, "query": requests[i].query}
+            else:
+                CACHE_LOOKUPS.labels(cache="answer", result="miss").inc()
+
+    return cached, version, embeddings, retrieved, embedded_with
+
+async def retrieve(request: QueryRequest, query_embedding: Optional[List[float]], embedded_with: EmbeddingSpec) -> Dict:
+    """
+    Retrieve a question's chunks in a worker thread (blocking). Query
+    embeddings are only made under the upstream limiter: if a migration cut
+    over since the question was embedded, it is embedded again for the new
+    index with aembed_queries.
+    """
+    def search(embedding: Optional[List[float]], spec: EmbeddingSpec) -> Dict:
+        return vector_store.query(query_text=request.query, n_results=request.top_k, query_embedding=embedding,
+                                  filters=request.filters, embed_missing=False, embedded_with=spec)
+
+    try:
+        return await run_in_threadpool(search, query_embedding, embedded_with)
+    except QueryNotEmbeddedError:
+        embedded_with = vector_store.embedding_spec
+        query_embedding = (await vector_store.aembed_queries([request.query]))[0]
+        return await run_in_threadpool(search, query_embedding, embedded_with)
+
+async def retrieve_batch(requests: List[QueryRequest], embeddings: List[Optional[List[float]]],
+                         embedded_with: EmbeddingSpec) -> List[Dict]:
+    """retrieve() for several questions, as one query_batch."""
+    def search(embeddings: List[Optional[List[float]]], spec: EmbeddingSpec) -> List[Dict]:
+        return vector_store.query_batch(
+            [request.query for request in requests], [request.top_k for request in requests],
+            embeddings, [request.filters for request in requests], embed_missing=False, embedded_with=spec
+        )
+
+    try:
+        return await run_in_threadpool(search, embeddings, embedded_with)
+    except QueryNotEmbeddedError:
+        embedded_with = vector_store.embedding_spec
+        embeddings = await vector_store.aembed_queries([request.query for request in requests])
+        return await run_in_threadpool(search, embeddings, embedded_with)
+
+def cache_answer(request: QueryRequest, version: str, query_embedding: Optional[List[float]], response: Dict) -> None:
+    """Store a response in the answer cache (failed generations are not cached)."""
+    if answer_cache is None or response["answer"] == LLMClient.ERROR_ANSWER:
+        return
+    answer_cache.put(request.query, request.top_k, version, query_embedding, response, filter_scope(request))
+
+def filter_scope(request: QueryRequest) -> str:
+    """Canonical form of a request's filters, part of its cache and coalescing keys ("" without filters)."""
+    where = filter_where(request.filters)
+    return json.dumps(where, sort_keys=True) if where else ""
+
+def build_sources(results: Dict) -> List[Dict]:
+    """Turn vector store results into the sources list returned to the client."""
+    return [
+        {
+            "text": doc,
+            "source_file": meta.get("source_file", "unknown"),
+            "chunk_index": meta.get("chunk_index", 0)
+        }
+        for doc, meta in zip(results["documents"], results["metadatas"])
+    ]
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @app.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """Get statistics about indexed documents."""
@@ -180,6 +590,32 @@ async def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@app.get("/documents", response_model=DocumentListResponse)
+async def list_documents(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """List indexed documents with chunk counts, sizes, file type and ingestion time."""
+    try:
+        total, _ = vector_store.catalog.totals()
+        documents = vector_store.catalog.list_documents(offset=offset, limit=limit)
+        return DocumentListResponse(total=total, offset=offset, limit=limit, documents=documents)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get hit/miss counters of the answer and embedding caches, and /query computations in flight."""
+    embedding_cache = get_embedding_cache(vector_store.embedding_spec)
+    return {
+        "answers": answer_cache.stats() if answer_cache else None,
+        "query_embeddings": vector_store.query_cache.stats(),
+        "chunk_embeddings": embedding_cache.stats() if embedding_cache else None,
+        "queries_in_flight": query_flights.in_flight() if query_flights else None
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, request latency, cache lookups."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.delete("/clear")
 async def clear_database():
     """Clear all documents from the vector store."""
@@ -196,12 +632,12 @@ async def clear_database():
 async def health_check():
     """Health check endpoint."""
     try:
-        stats = vector_store.get_stats()
+        documents, chunks = vector_store.catalog.totals()
         return {
             "status": "healthy",
             "vector_store": "connected",
-            "documents_indexed": stats["unique_documents"],
-            "chunks_indexed": stats["total_chunks"]
+            "documents_indexed": documents,
+            "chunks_indexed": chunks
         }
     except Exception as e:
         return {
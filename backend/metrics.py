@@ -0,0 +1,114 @@
+"""
+DocuMind Metrics
+Per-stage timers for the query and ingestion paths, exported as Prometheus
+histograms on /metrics and, for the current request, as a Server-Timing header.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Tuple, Optional, Iterator
+from prometheus_client import Histogram, Counter, Gauge
+
+
+# Latency buckets (seconds): sub-millisecond lookups up to slow LLM calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+QUERY_STAGE_SECONDS = Histogram(
+    "documind_query_stage_seconds",
+    "Time spent per /query stage (embed, lexical, search, mmr, pack, llm)",
+    ["stage"],
+    buckets=BUCKETS
+)
+
+INGEST_STAGE_SECONDS = Histogram(
+    "documind_ingest_stage_seconds",
+    "Time spent per ingestion stage (extract, chunk, embed, index)",
+    ["stage"],
+    buckets=BUCKETS
+)
+
+REQUEST_SECONDS = Histogram(
+    "documind_request_seconds",
+    "End-to-end request latency per endpoint",
+    ["method", "endpoint", "status"],
+    buckets=BUCKETS
+)
+
+CACHE_LOOKUPS = Counter(
+    "documind_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+
+CONTEXT_TOKENS = Counter(
+    "documind_context_tokens_total",
+    "Prompt context tokens sent to the LLM (packed) and saved by context packing (saved: merged overlaps, budget trim)",
+    ["kind"]
+)
+
+QUERY_COALESCED = Counter(
+    "documind_query_coalesced_total",
+    "/query requests that ran the computation (leader) or joined an identical one in flight (follower)",
+    ["role"]
+)
+
+QUERY_IN_FLIGHT = Gauge(
+    "documind_query_in_flight",
+    "Distinct /query computations in flight (identical requests joining one are not counted again)"
+)
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "documind_upstream_in_flight",
+    "OpenAI calls from request handlers currently running"
+)
+
+UPSTREAM_WAITING = Gauge(
+    "documind_upstream_waiting",
+    "Request handlers waiting for an upstream slot"
+)
+
+UPSTREAM_REJECTIONS = Counter(
+    "documind_upstream_rejections_total",
+    "Requests rejected with 503 because upstream slots were exhausted",
+    ["reason"]
+)
+
+
+# Stage timings of the request being served (None outside a request that asked for them)
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timing() -> List[Tuple[str, float]]:
+    """Start collecting stage timings for the current request (read them back for Server-Timing)."""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def record_stage(histogram: Histogram, stage: str, seconds: float) -> None:
+    """Observe a stage duration and add it to the current request's timings."""
+    histogram.labels(stage=stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(histogram: Histogram, stage: str) -> Iterator[None]:
+    """Time the body of a with-block as one stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(histogram, stage, time.perf_counter() - start)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """Format timings as a Server-Timing header value (repeated stages are summed)."""
+    merged = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    if total is not None:
+        merged['total'] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items())
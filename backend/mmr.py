@@ -0,0 +1,66 @@
+"""
+DocuMind Diversification
+Maximal marginal relevance (MMR) over retrieved candidates: each pick is the
+candidate most relevant to the question minus its similarity to the chunks
+already picked, so neighbouring chunks that repeat each other (500-token
+chunks with 50-token overlap) don't fill every top_k slot.
+"""
+
+import numpy as np
+from typing import List, Optional, Sequence
+
+
+def mmr_select(query_embedding: List[float], candidate_embeddings: List[List[float]], k: int,
+               lambda_mult: float = 0.5, relevance: Optional[Sequence[float]] = None) -> List[int]:
+    """
+    Pick k candidates by maximal marginal relevance:
+    argmax  lambda * sim(query, c) - (1 - lambda) * max sim(c, picked)
+
+    The candidate/query and candidate/candidate cosine similarities are two
+    matrix products; each pick then updates the running max similarity to the
+    picked set with one vector operation.
+
+    Args:
+        query_embedding: Embedding of the question
+        candidate_embeddings: Embeddings of the candidates, most relevant first
+        k: Number of candidates to pick
+        lambda_mult: 1 = rank by relevance only, 0 = by diversity only
+        relevance: Relevance score of each candidate from the ranking that
+                   produced them (e.g. RRF-fused scores in hybrid mode), used
+                   instead of the cosine similarity to the question; scaled
+                   to [0, 1] to be comparable with the similarity term
+
+    Returns:
+        Positions of the picked candidates, in pick order
+    """
+    if k <= 0 or len(candidate_embeddings) == 0:
+        return []
+    candidates = _unit_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    query = _unit_rows(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+    k = min(k, len(candidates))
+
+    if relevance is None:
+        relevance = candidates @ query
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+        spread = relevance.max() - relevance.min()
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+    similarity = candidates @ candidates.T
+    redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)  # max similarity to a picked candidate
+    available = np.ones(len(candidates), dtype=bool)
+
+    picked = [int(np.argmax(relevance))]
+    for _ in range(k - 1):
+        last = picked[-1]
+        available[last] = False
+        redundancy = np.maximum(redundancy, similarity[last])
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        picked.append(int(np.argmax(scores)))
+    return picked
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length (dot product = cosine similarity)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
@@ -0,0 +1,112 @@
+"""
+DocuMind Query Embedding Cache
+In-memory LRU + TTL cache of normalized query text -> embedding,
+optionally spilled to disk, so repeated questions skip the embeddings API.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from backend.config import settings
+from backend.embedding_cache import EmbeddingCache
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different spellings share an entry."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache with per-entry expiry and an optional disk tier"""
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, disk_path: Optional[str] = None,
+                 model: str = None, dimension: int = None):
+        """
+        Args:
+            max_entries: Entries kept in memory (defaults to config)
+            ttl_seconds: Lifetime of an in-memory entry (defaults to config)
+            disk_path: SQLite file for spilled entries (defaults to config, None disables)
+            model: Embedding model of the cached embeddings, part of the disk key (defaults to config)
+            dimension: Embedding dimension, part of the disk key (defaults to config)
+        """
+        if max_entries is None:
+            max_entries = settings.QUERY_CACHE_MAX_ENTRIES
+        if ttl_seconds is None:
+            ttl_seconds = settings.QUERY_CACHE_TTL_SECONDS
+        if disk_path is None:
+            disk_path = settings.QUERY_CACHE_DISK_PATH
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, embedding)
+        self._lock = threading.Lock()
+
+        # Evicted/expired entries stay available on disk (embeddings don't go stale)
+        self._disk = None
+        if disk_path:
+            self._disk = EmbeddingCache(db_path=disk_path, max_mb=settings.QUERY_CACHE_DISK_MAX_MB,
+                                        model=model, dimension=dimension)
+
+        # Counters (since process start)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def get(self, query_text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, or None."""
+        key = normalize_query(query_text)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, embedding = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return embedding
+                del self._entries[key]
+                self.expirations += 1
+
+        if self._disk is not None:
+            found = self._disk.get_many([self._disk.key(key)])
+            if found:
+                embedding = next(iter(found.values()))
+                self._remember(key, embedding)
+                with self._lock:
+                    self.disk_hits += 1
+                return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, query_text: str, embedding: List[float]) -> None:
+        """Cache the embedding of a query."""
+        key = normalize_query(query_text)
+        self._remember(key, embedding)
+        if self._disk is not None:
+            self._disk.put_many({self._disk.key(key): embedding})
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        """Insert into the in-memory tier, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries
+        }
@@ -0,0 +1,271 @@
+"""
+DocuMind Re-embedding Migration
+Moves a collection to another embedding model and/or output dimension
+(e.g. 512-dimension text-embedding-3-small) without downtime: a shadow index
+is filled in the background from the chunk text already stored (resumable
+from a checkpoint), caught up with documents changed meanwhile, then every
+worker's /query is cut over to it in one step.
+
+Writes made while the migration runs are recorded in a change log
+(backend.change_log), so catching up, and the last pass that runs with
+index writes held back, only revisit the chunks written since the previous
+pass. An interrupted migration keeps the log until it is resumed or aborted.
+
+The migration runs in its own process and opens the indexes itself. With
+VECTOR_INDEX_BACKEND=numpy the server can keep ingesting meanwhile. With
+Chroma a second PersistentClient on the same directory doesn't see the
+server's in-memory HNSW state, so keep the server read-only (no uploads,
+deletes, /clear or sync runs) until the cutover; queries keep working
+throughout.
+
+Usage:
+    python -m backend.reembed --model text-embedding-3-small --dimension 512 [--batch 500]
+    python -m backend.reembed --status
+    python -m backend.reembed --abort
+"""
+
+import re
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from backend.config import settings
+from backend.active_index import EmbeddingSpec
+from backend.change_log import ChangeLog
+from backend.ingestion import generate_embeddings
+from backend.vector_index import VectorIndex, create_vector_index
+
+
+logger = logging.getLogger(__name__)
+
+# Catch-up passes before cutting over (the final one runs with writes held back)
+MAX_CATCH_UP_PASSES = 5
+
+# IDs read per page when comparing the two indexes
+ID_PAGE_SIZE = 10_000
+
+
+def shadow_index_name(collection_name: str, spec: EmbeddingSpec) -> str:
+    """Index name for the collection embedded with spec (also a valid Chroma collection name)."""
+    model = re.sub(r'[^A-Za-z0-9_-]+', '-', spec.model)
+    return f"{collection_name}__{model}_{spec.dimension}"[:63]
+
+
+class Reembedder:
+    """Builds the shadow index for one embedding spec and cuts the collection over to it"""
+
+    def __init__(self, vector_store, spec: EmbeddingSpec, batch_size: int = None):
+        """
+        Args:
+            vector_store: VectorStore of the collection to migrate
+            spec: Target embedding model and dimension
+            batch_size: Chunks re-embedded per page (defaults to config)
+        """
+        self.vector_store = vector_store
+        self.spec = spec
+        self.batch_size = batch_size or settings.REEMBED_BATCH_SIZE
+        self.source = vector_store.index
+        self.source_name = vector_store.index_name
+        self.target_name = shadow_index_name(vector_store.collection_name, spec)
+        self.checkpoint_path = checkpoint_path(vector_store)
+        self.change_log: ChangeLog = vector_store.change_log
+
+    def run(self) -> Dict:
+        """
+        Migrate: copy, catch up, cut over.
+
+        Returns:
+            Summary dict (index, embedded, updated, deleted, passes, elapsed_seconds)
+        """
+        if self.spec == self.vector_store.embedding_spec or self.target_name == self.source_name:
+            raise ValueError(f"{self.source_name} already uses {self.spec.model} ({self.spec.dimension} dimensions)")
+
+        start_time = time.time()
+        offset = self._resume_offset()
+        target = create_vector_index(self.vector_store.persist_directory, self.target_name)
+        summary = {'index': self.target_name, 'embedded': 0, 'updated': 0, 'deleted': 0, 'passes': 0}
+        logger.info("Re-embedding %s into %s (%s, %d dimensions) from chunk %d",
+                    self.source_name, self.target_name, self.spec.model, self.spec.dimension, offset)
+
+        # Every write from now on is logged (writes in progress finish first)
+        with self.vector_store.active_index.cutover():
+            self.change_log.start()
+
+        # Bulk copy, checkpointed page by page
+        self._sync_pass(target, summary, start=offset, checkpoint=True)
+
+        # One full comparison: chunks the paged copy skipped while others were deleted under it
+        seen = self.change_log.latest()
+        self._sync_pass(target, summary)
+
+        # Catch up with documents uploaded, replaced or deleted meanwhile
+        for _ in range(MAX_CATCH_UP_PASSES):
+            seen, changes = self._apply_changes(target, summary, seen)
+            if changes < self.batch_size:
+                break
+
+        # Last pass with index writes held back, then point every worker at the new index
+        with self.vector_store.active_index.cutover():
+            self._apply_changes(target, summary, seen)
+            self.vector_store.active_index.write(self.target_name, self.spec)
+            self.vector_store._bump_corpus_version()  # cached answers came from the old index
+            self.change_log.stop()
+
+        self.checkpoint_path.unlink(missing_ok=True)
+        summary['elapsed_seconds'] = round(time.time() - start_time, 2)
+        logger.info("Cut over to %s: %s (the previous index %s is kept; remove it once no worker uses it)",
+                    self.target_name, summary, self.source_name)
+        return summary
+
+    def _sync_pass(self, target: VectorIndex, summary: Dict, start: int = 0, checkpoint: bool = False) -> int:
+        """
+        Make the target match the source: embed chunks it lacks, copy changed
+        metadata, delete chunks the source no longer has.
+
+        Returns:
+            Number of chunks changed in the target
+        """
+        changes = 0
+        offset = start
+        while True:
+            page = self.source.get(include=['documents', 'metadatas'], limit=self.batch_size, offset=offset)
+            if not page['ids']:
+                break
+            changes += self._copy_page(target, page, summary)
+            offset += len(page['ids'])
+            if checkpoint:
+                self._save_checkpoint(offset, summary)
+                logger.info("Re-embedded through chunk %d (%d embedded)", offset, summary['embedded'])
+
+        extra = list(_all_ids(target) - _all_ids(self.source))
+        for i in range(0, len(extra), self.batch_size):
+            target.delete(ids=extra[i:i + self.batch_size])
+        summary['deleted'] += len(extra)
+        summary['passes'] += 1
+        return changes + len(extra)
+
+    def _apply_changes(self, target: VectorIndex, summary: Dict, seen: int) -> Tuple[int, int]:
+        """
+        Bring the chunks written since a change log entry up to date in the
+        target (a full pass if the collection was cleared meanwhile).
+
+        Returns:
+            Tuple of (last change log entry applied, number of chunks changed in the target)
+        """
+        ids, seen = self.change_log.since(seen)
+        if ids is None:
+            return seen, self._sync_pass(target, summary)
+
+        changes = 0
+        ids = sorted(ids)
+        for i in range(0, len(ids), self.batch_size):
+            batch = ids[i:i + self.batch_size]
+            page = self.source.get(ids=batch, include=['documents', 'metadatas'])
+            changes += self._copy_page(target, page, summary)
+
+            gone = set(batch) - set(page['ids'])
+            if gone:
+                gone = target.get(ids=list(gone), include=[])['ids']
+                if gone:
+                    target.delete(ids=gone)
+                summary['deleted'] += len(gone)
+                changes += len(gone)
+        summary['passes'] += 1
+        return seen, changes
+
+    def _copy_page(self, target: VectorIndex, page: Dict, summary: Dict) -> int:
+        """Embed the page's chunks the target lacks and update metadata that differs."""
+        existing = target.get(ids=page['ids'], include=['metadatas'])
+        have = dict(zip(existing['ids'], existing['metadatas']))
+
+        missing = [i for i, chunk_id in enumerate(page['ids']) if chunk_id not in have]
+        changed = [i for i, chunk_id in enumerate(page['ids'])
+                   if chunk_id in have and have[chunk_id] != page['metadatas'][i]]
+
+        if missing:
+            texts = [page['documents'][i] for i in missing]
+            target.add(
+                ids=[page['ids'][i] for i in missing],
+                embeddings=generate_embeddings(texts, spec=self.spec),
+                documents=texts,
+                metadatas=[page['metadatas'][i] for i in missing]
+            )
+        if changed:
+            target.update(ids=[page['ids'][i] for i in changed], metadatas=[page['metadatas'][i] for i in changed])
+
+        summary['embedded'] += len(missing)
+        summary['updated'] += len(changed)
+        return len(missing) + len(changed)
+
+    def _resume_offset(self) -> int:
+        """Where the bulk copy of an interrupted run of the same migration stopped."""
+        try:
+            saved = json.loads(self.checkpoint_path.read_text())
+        except FileNotFoundError:
+            return 0
+        if saved.get('source') == self.source_name and saved.get('index') == self.target_name:
+            return saved['offset']
+        logger.warning("Ignoring checkpoint of another migration (%s -> %s)", saved.get('source'), saved.get('index'))
+        return 0
+
+    def _save_checkpoint(self, offset: int, summary: Dict) -> None:
+        self.checkpoint_path.write_text(json.dumps({
+            'source': self.source_name,
+            'index': self.target_name,
+            'model': self.spec.model,
+            'dimension': self.spec.dimension,
+            'offset': offset,
+            'embedded': summary['embedded'],
+            'total_chunks': self.source.count(),
+            'updated_at': time.time()
+        }))
+
+
+def checkpoint_path(vector_store) -> Path:
+    """Checkpoint file of the collection's migration in progress."""
+    return Path(vector_store.persist_directory) / f"{vector_store.collection_name}.reembed.json"
+
+
+def _all_ids(index: VectorIndex) -> Set[str]:
+    """Every chunk ID in an index."""
+    ids: List[str] = []
+    while True:
+        page = index.get(include=[], limit=ID_PAGE_SIZE, offset=len(ids))
+        if not page['ids']:
+            return set(ids)
+        ids.extend(page['ids'])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed the collection with another embedding model or dimension")
+    parser.add_argument("--model", default=None, help="Target embedding model (defaults to the active one)")
+    parser.add_argument("--dimension", type=int, default=None, help="Target output dimension (text-embedding-3 models)")
+    parser.add_argument("--batch", type=int, default=None, help="Chunks per page (defaults to REEMBED_BATCH_SIZE)")
+    parser.add_argument("--status", action="store_true", help="Show the active index and any migration in progress")
+    parser.add_argument("--abort", action="store_true",
+                        help="Give up an interrupted migration (stops the change log; the shadow index is kept)")
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    from backend.vector_store import VectorStore
+    store = VectorStore()
+    if args.status:
+        path = checkpoint_path(store)
+        print(json.dumps({
+            'active_index': store.index_name,
+            'model': store.embedding_spec.model,
+            'dimension': store.embedding_spec.dimension,
+            'in_progress': json.loads(path.read_text()) if path.exists() else None,
+            'logging_changes': store.change_log.active
+        }, indent=2))
+    elif args.abort:
+        with store.active_index.cutover():
+            store.change_log.stop()
+        checkpoint_path(store).unlink(missing_ok=True)
+    else:
+        if settings.VECTOR_INDEX_BACKEND == "chroma":
+            logger.warning("Chroma backend: keep the server read-only (no uploads or deletes) until the cutover")
+        target = EmbeddingSpec(args.model or store.embedding_spec.model, args.dimension or store.embedding_spec.dimension)
+        Reembedder(store, target, batch_size=args.batch).run()
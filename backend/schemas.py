@@ -3,11 +3,34 @@ API Schemas
 Pydantic models for request validation and response serialization.
 """
 
+from datetime import datetime
 from pydantic import BaseModel, Field
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 # Query/Ask schemas
+class QueryFilters(BaseModel):
+    """Restricts retrieval to matching chunks (all given conditions apply)"""
+    source_files: Optional[List[str]] = Field(
+        default=None,
+        min_length=1,
+        description="Only these files"
+    )
+    file_type: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        description="Only files of this type ('pdf', 'md', 'txt')"
+    )
+    ingested_after: Optional[datetime] = Field(
+        default=None,
+        description="Only files first ingested at or after this time (ISO 8601 or Unix seconds)"
+    )
+    ingested_before: Optional[datetime] = Field(
+        default=None,
+        description="Only files first ingested before this time (ISO 8601 or Unix seconds)"
+    )
+
+
 class QueryRequest(BaseModel):
     """Request model for /query endpoint"""
     query: str = Field(
@@ -22,6 +45,10 @@ class QueryRequest(BaseModel):
         le=10,
         description="Number of chunks to retrieve"
     )
+    filters: Optional[QueryFilters] = Field(
+        default=None,
+        description="Search only chunks of matching documents"
+    )
 
 
 class Source(BaseModel):
@@ -39,6 +66,28 @@ class QueryResponse(BaseModel):
     chunks_used: int
 
 
+# Batch query schemas
+class BatchQueryRequest(BaseModel):
+    """Request model for /query/batch endpoint"""
+    questions: List[QueryRequest] = Field(
+        ...,
+        min_length=1,
+        description="Questions to answer (each with its own top_k)"
+    )
+
+
+class BatchQueryItem(BaseModel):
+    """Result of one question in a batch: the response, or the error it failed with"""
+    index: int
+    response: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for /query/batch endpoint (results in question order)"""
+    results: List[BatchQueryItem]
+
+
 # Stats schema
 class StatsResponse(BaseModel):
     """Response model for /stats endpoint"""
@@ -47,6 +96,27 @@ class StatsResponse(BaseModel):
     source_files: List[str]
 
 
+# Document catalog schemas
+class DocumentInfo(BaseModel):
+    """One indexed document"""
+    source_file: str
+    file_type: str
+    chunk_count: int
+    token_count: int
+    text_bytes: int
+    file_size_bytes: Optional[int] = None  # original file size (unknown for backfilled catalogs)
+    ingested_at: float
+    updated_at: float
+
+
+class DocumentListResponse(BaseModel):
+    """Response model for GET /documents"""
+    total: int
+    offset: int
+    limit: int
+    documents: List[DocumentInfo]
+
+
 # Document processing schema
 class ProcessedDocument(BaseModel):
     """Schema for a processed document chunk"""
@@ -79,6 +149,40 @@ class UploadResponse(BaseModel):
     chunks_added: int
 
 
+# Ingestion job schemas
+class UploadJobResponse(BaseModel):
+    """Response for /upload (202 Accepted)"""
+    job_id: str
+    status_url: str
+    total_files: int
+    rejected: List[str]
+
+
+class JobFileStatus(BaseModel):
+    """Progress of one file in an ingestion job"""
+    filename: str
+    stage: str  # queued, extract, chunk, embed, index, done, failed
+    chunks: int  # chunks indexed so far
+    size_bytes: int
+    error: Optional[str] = None
+    elapsed_seconds: Optional[float] = None
+    chunks_per_second: Optional[float] = None
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for GET /jobs/{job_id}"""
+    job_id: str
+    status: str  # queued, running, completed, failed
+    created_at: float
+    total_files: int
+    files_done: int
+    files_failed: int
+    total_chunks: int
+    elapsed_seconds: Optional[float] = None
+    chunks_per_second: Optional[float] = None
+    files: List[JobFileStatus]
+
+
 # Health schema
 class HealthResponse(BaseModel):
     """Response model for health check endpoint"""
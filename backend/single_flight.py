@@ -0,0 +1,56 @@
+"""
+DocuMind Single Flight
+Coalesces concurrent identical requests: the first caller for a key runs the
+computation, callers arriving while it is in flight await the same result
+instead of repeating the embedding, search and LLM calls.
+"""
+
+import asyncio
+from typing import Dict, Hashable, Callable, Awaitable, TypeVar
+from backend.metrics import QUERY_COALESCED, QUERY_IN_FLIGHT
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """In-flight computations by key (one event loop; not shared across processes)"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() for this key, or join the run already in flight.
+
+        Args:
+            key: Identifies identical requests
+            fn: Starts the computation (only called by the first caller)
+
+        Returns:
+            fn()'s result (exceptions are raised to every caller)
+        """
+        task = self._flights.get(key)
+        if task is None:
+            QUERY_COALESCED.labels(role="leader").inc()
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            QUERY_IN_FLIGHT.inc()
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            QUERY_COALESCED.labels(role="follower").inc()
+
+        # A caller that goes away (client disconnect) mustn't cancel the others' computation
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed."""
+        return len(self._flights)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Forget a finished run (later callers start a new one)."""
+        if self._flights.get(key) is task:
+            del self._flights[key]
+            QUERY_IN_FLIGHT.dec()
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
@@ -0,0 +1,247 @@
+"""
+DocuMind Folder Sync
+Incrementally indexes settings.DOCUMENTS_FOLDER: a manifest of what is
+already indexed lets each run embed only new or modified files and
+delete the chunks of files that were removed. Changed files are parsed in
+worker processes and embedded/indexed several at a time on threads.
+
+Usage:
+    python -m backend.sync [--folder PATH] [--full]
+"""
+
+import time
+import json
+import logging
+import sqlite3
+import hashlib
+import argparse
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Tuple, Optional
+from backend.config import settings
+from backend.ingestion import extract_text, chunk_text_with_counts, index_chunk_batches
+
+
+SUPPORTED_EXTENSIONS = {'.pdf', '.txt', '.md'}
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentManifest:
+    """SQLite record of every synced file: path, size, mtime, content hash, chunk IDs"""
+
+    def __init__(self, db_path: str = None):
+        """
+        Args:
+            db_path: Path to the SQLite file (defaults to config)
+        """
+        if db_path is None:
+            db_path = settings.SYNC_MANIFEST_PATH
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size_bytes INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    chunk_ids TEXT NOT NULL,
+                    indexed_at REAL NOT NULL
+                )
+            """)
+
+    def all(self) -> Dict[str, Dict]:
+        """Every manifest entry, keyed by relative path."""
+        rows = self._conn.execute("SELECT * FROM files").fetchall()
+        return {row['path']: dict(row) for row in rows}
+
+    def upsert(self, path: str, size_bytes: int, mtime_ns: int, content_hash: str, chunk_ids: List[str]) -> None:
+        """Record a file as indexed."""
+        with self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO files (path, size_bytes, mtime_ns, content_hash, chunk_ids, indexed_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (path, size_bytes, mtime_ns, content_hash, json.dumps(chunk_ids), time.time())
+            )
+
+    def touch(self, path: str, size_bytes: int, mtime_ns: int) -> None:
+        """Update size/mtime of a file whose content did not change."""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE files SET size_bytes = ?, mtime_ns = ? WHERE path = ?",
+                (size_bytes, mtime_ns, path)
+            )
+
+    def remove(self, path: str) -> None:
+        """Forget a file."""
+        with self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+
+def hash_file(file_path: Path) -> str:
+    """sha256 of a file's bytes, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+#runs in a worker process: hashing, parsing and tokenizing are CPU-bound
+def _prepare_file(file_path: str) -> Tuple[str, List[str], List[int]]:
+    """Hash, extract and chunk one file. Returns (content_hash, chunks, token_counts)."""
+    content_hash = hash_file(Path(file_path))
+    text = extract_text(file_path, Path(file_path).suffix.lower())
+    chunks, token_counts = chunk_text_with_counts(text)
+    return content_hash, chunks, token_counts
+
+
+def _index_file(vector_store, rel_path: str, chunks: List[str], token_counts: List[int], size_bytes: int) -> List[str]:
+    """Embed and index one prepared file (runs on an indexing thread). Returns its chunk IDs."""
+    # Replaces any chunks already indexed under this name (old version or earlier
+    # upload), embedding only the chunks whose text changed
+    chunk_ids = index_chunk_batches([(chunks, token_counts)], rel_path, vector_store)
+    vector_store.catalog.set_file_size(rel_path, size_bytes)
+    return chunk_ids
+
+
+def sync_documents_folder(vector_store, folder_path: str = None, manifest: Optional[DocumentManifest] = None,
+                          full: bool = False, workers: int = None, index_workers: int = None) -> Dict:
+    """
+    Bring the vector store in line with the documents folder
+
+    Args:
+        vector_store: VectorStore to index into
+        folder_path: Folder to sync (defaults to config DOCUMENTS_FOLDER)
+        manifest: Manifest to use (defaults to the one at SYNC_MANIFEST_PATH)
+        full: Ignore the manifest and re-index every file
+        workers: Processes for extraction/chunking (defaults to config)
+        index_workers: Files embedded and indexed concurrently (defaults to config INGEST_JOB_WORKERS)
+
+    Returns:
+        Summary dict with counts of added, updated, unchanged, removed and failed files
+    """
+    if folder_path is None:
+        folder_path = settings.DOCUMENTS_FOLDER
+    if manifest is None:
+        manifest = DocumentManifest()
+    if workers is None:
+        workers = settings.INGEST_PROCESS_WORKERS
+    if index_workers is None:
+        index_workers = settings.INGEST_JOB_WORKERS
+
+    folder = Path(folder_path)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.time()
+    summary = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0, 'chunks_added': 0}
+    known = manifest.all()
+    seen = set()
+    to_index = []  # (relative path, absolute path, stat) of new or modified files
+
+    logger.info("Syncing documents from: %s", folder_path)
+
+    # 1. Find new and modified files (size/mtime first, content hash only when those differ)
+    for file_path in sorted(folder.rglob('*')):
+        if not file_path.is_file() or file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            continue
+
+        rel_path = file_path.relative_to(folder).as_posix()
+        seen.add(rel_path)
+        stat = file_path.stat()
+        entry = known.get(rel_path)
+
+        if full or entry is None:
+            to_index.append((rel_path, file_path, stat))
+            continue
+        if entry['size_bytes'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            summary['unchanged'] += 1
+            continue
+        if entry['size_bytes'] == stat.st_size and entry['content_hash'] == hash_file(file_path):
+            manifest.touch(rel_path, stat.st_size, stat.st_mtime_ns)  # touched, not edited
+            summary['unchanged'] += 1
+            continue
+
+        to_index.append((rel_path, file_path, stat))
+
+    # 2. Remove chunks of files that disappeared
+    for rel_path in known.keys() - seen:
+        vector_store.delete_document(rel_path)
+        manifest.remove(rel_path)
+        summary['removed'] += 1
+        logger.info("Removed: %s", rel_path)
+
+    # 3. Index new/modified files: parse in worker processes, embed and index on threads
+    #    (the manifest is only written from this thread)
+    if to_index:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+                ThreadPoolExecutor(max_workers=index_workers) as index_pool:
+            # Keep a bounded window of files in flight (parsing or indexing) so parsed text doesn't pile up in memory
+            window = max(2, workers * 2, index_workers * 2)
+            preparing = {}  # future -> (relative path, absolute path, stat)
+            indexing = {}   # future -> (relative path, stat, content hash)
+            queue = iter(to_index)
+
+            def submit_next():
+                item = next(queue, None)
+                if item is not None:
+                    preparing[pool.submit(_prepare_file, str(item[1]))] = item
+
+            for _ in range(window):
+                submit_next()
+
+            while preparing or indexing:
+                done, _ = wait(list(preparing) + list(indexing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in preparing:
+                        rel_path, file_path, stat = preparing.pop(future)
+                        try:
+                            content_hash, chunks, token_counts = future.result()
+                        except Exception as e:
+                            logger.error("Error syncing %s: %s", rel_path, e)
+                            summary['failed'] += 1
+                            submit_next()
+                            continue
+
+                        if not full and rel_path in known and known[rel_path]['content_hash'] == content_hash:
+                            manifest.touch(rel_path, stat.st_size, stat.st_mtime_ns)
+                            summary['unchanged'] += 1
+                            submit_next()
+                            continue
+
+                        index_future = index_pool.submit(_index_file, vector_store, rel_path, chunks, token_counts,
+                                                         stat.st_size)
+                        indexing[index_future] = (rel_path, stat, content_hash)
+                        continue
+
+                    rel_path, stat, content_hash = indexing.pop(future)
+                    submit_next()
+                    try:
+                        chunk_ids = future.result()
+                    except Exception as e:
+                        logger.error("Error syncing %s: %s", rel_path, e)
+                        summary['failed'] += 1
+                        continue
+
+                    manifest.upsert(rel_path, stat.st_size, stat.st_mtime_ns, content_hash, chunk_ids)
+                    summary['updated' if rel_path in known else 'added'] += 1
+                    summary['chunks_added'] += len(chunk_ids)
+
+    summary['elapsed_seconds'] = round(time.time() - start_time, 2)
+    logger.info("Sync complete: %s", summary)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally index the documents folder")
+    parser.add_argument("--folder", default=None, help="Folder to sync (defaults to DOCUMENTS_FOLDER)")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-index everything")
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    from backend.vector_store import VectorStore
+    sync_documents_folder(VectorStore(), folder_path=args.folder, full=args.full)
@@ -0,0 +1,789 @@
+"""
+DocuMind Vector Index
+Pluggable storage and nearest-neighbour search for chunk embeddings, behind
+the subset of Chroma's collection API that VectorStore uses:
+ChromaIndex (Chroma's persistent HNSW collection, the default) and
+NumpyIndex (a memory-mapped float32 matrix shared by every worker through the
+page cache, searched exactly or through an IVF coarse quantizer).
+"""
+
+import os
+import json
+import math
+import sqlite3
+import logging
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional, Sequence, Tuple, Iterator
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from backend.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Bound parameters per SQLite statement (stays under SQLITE_MAX_VARIABLE_NUMBER)
+SQL_BATCH = 500
+
+# Rows assigned to IVF lists per matrix product while training
+ASSIGN_BLOCK = 65_536
+
+# k-means training points per IVF list (sampled from the corpus)
+KMEANS_POINTS_PER_LIST = 64
+
+# Rows of int8 codes widened to float32 at a time while scoring (small enough to stay in CPU cache)
+INT8_SCORE_BLOCK = 256
+
+# Chunk metadata fields with a SQLite expression index in NumpyIndex (where filters on them skip the table scan)
+INDEXED_METADATA = ("source_file", "file_type", "ingested_at")
+
+
+class VectorIndex(ABC):
+    """Chunk embeddings, text and metadata; results use Chroma's dict format"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored chunks."""
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict]) -> None:
+        """Store chunks (an ID that is already stored is overwritten)."""
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            include: Sequence[str] = ('documents', 'metadatas'),
+            limit: Optional[int] = None, offset: Optional[int] = None) -> Dict:
+        """
+        Fetch chunks by ID, by metadata filter, or page by page.
+
+        Returns:
+            Dict with 'ids' and, as included, 'documents', 'metadatas', 'embeddings'
+        """
+
+    @abstractmethod
+    def update(self, ids: List[str], metadatas: List[Dict]) -> None:
+        """Replace the metadata of stored chunks."""
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete chunks by ID."""
+
+    @abstractmethod
+    def query(self, query_embeddings: List[List[float]], n_results: int, where: Optional[Dict] = None,
+              include: Sequence[str] = ('documents', 'metadatas', 'distances')) -> Dict:
+        """
+        Nearest chunks to each query embedding (cosine distance).
+
+        Returns:
+            Dict with 'ids' and the included fields, each a list per query
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete every chunk."""
+
+
+class ChromaIndex(VectorIndex):
+    """Chroma persistent collection (HNSW, cosine space)"""
+
+    def __init__(self, persist_directory: str, collection_name: str):
+        self.collection_name = collection_name
+
+        # Initialize ChromaDB client object
+        self.client = chromadb.PersistentClient(  # creates a database that saves to disk(survives restarts)
+            path=persist_directory,  # path = directory where SQLite database files are stored
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        self.collection = self._open()
+
+    def _open(self):
+        """Get or create the collection."""
+        return self.client.get_or_create_collection(  # creates new collection first time, later uses existing collections
+            name=self.collection_name,
+            metadata={"hnsw:space": "cosine"}  # use hnsw for fast search, cosine similarity for matching text embeddings
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids, embeddings, documents, metadatas) -> None:
+        self.collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def get(self, ids=None, where=None, include=('documents', 'metadatas'), limit=None, offset=None) -> Dict:
+        return self.collection.get(ids=ids, where=where, include=list(include), limit=limit, offset=offset)
+
+    def update(self, ids, metadatas) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids) -> None:
+        self.collection.delete(ids=ids)
+
+    def query(self, query_embeddings, n_results, where=None, include=('documents', 'metadatas', 'distances')) -> Dict:
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=list(include)
+        )
+
+    def clear(self) -> None:
+        self.client.delete_collection(name=self.collection_name)
+        self.collection = self._open()
+
+
+class NumpyIndex(VectorIndex):
+    """
+    Unit-normalized float32 embeddings in a memory-mapped vectors.npy, with
+    IDs, chunk text and metadata in a sidecar SQLite table (meta.db). Every
+    worker maps the same files, so the page cache holds one copy and opening
+    the index is an mmap rather than a rebuild.
+
+    Searches are exact (one matrix product over the live rows) until the index
+    holds ivf_min_vectors chunks; from then on a k-means coarse quantizer (IVF)
+    restricts each search to the ivf_probes lists nearest the query.
+
+    With quantization="int8" the first pass scores int8 codes (one byte per
+    dimension plus a per-row scale, a quarter of the float32 matrix), and only
+    the top n_results x rerank_factor candidates are rescored against the
+    float32 rows, so the full-precision matrix stays on disk except for the
+    pages those candidates touch.
+
+    Files: vectors.npy (rows x dimension), valid.npy (row in use), lists.npy
+    (IVF list per row, -1 if none), centroids.npy, codes.npy and scales.npy
+    (int8 codes, kept up to date once created). Deleted rows are reused.
+    Writers serialize through a SQLite write transaction, so several processes
+    can share the directory; readers re-open the files when the layout changes.
+    """
+
+    def __init__(self, directory: str, ivf_min_vectors: int = None, ivf_lists: int = None, ivf_probes: int = None,
+                 quantization: str = None, rerank_factor: int = None):
+        """
+        Open (or create) the index.
+
+        Args:
+            directory: Directory holding the index files
+            ivf_min_vectors: Chunks from which searches use IVF (0 = always exact; defaults to config)
+            ivf_lists: IVF lists (0 = sqrt of the chunk count; defaults to config)
+            ivf_probes: IVF lists searched per query (defaults to config)
+            quantization: "none" or "int8" first-pass search (defaults to config)
+            rerank_factor: int8 shortlist size as a multiple of n_results (defaults to config)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ivf_min_vectors = settings.NUMPY_IVF_MIN_VECTORS if ivf_min_vectors is None else ivf_min_vectors
+        self.ivf_lists = settings.NUMPY_IVF_LISTS if ivf_lists is None else ivf_lists
+        self.ivf_probes = settings.NUMPY_IVF_PROBES if ivf_probes is None else ivf_probes
+        self.quantization = quantization or settings.NUMPY_QUANTIZATION
+        self.rerank_factor = rerank_factor or settings.NUMPY_RERANK_FACTOR
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization: {self.quantization!r} (expected 'none' or 'int8')")
+
+        self._local = threading.local()  # one SQLite connection per thread
+        self._write_lock = threading.Lock()
+        self._files_lock = threading.Lock()
+        self._layout: Optional[int] = None  # layout the open files belong to
+        self._vectors: Optional[np.ndarray] = None
+        self._valid: Optional[np.ndarray] = None
+        self._lists: Optional[np.ndarray] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+        conn = self._conn()
+        with self._write_lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT UNIQUE NOT NULL,
+                    document TEXT,
+                    metadata TEXT NOT NULL
+                )
+            """)
+            for field in INDEXED_METADATA:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_chunks_{field} ON chunks ({_json_field(field)})")
+            conn.execute("CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY)")
+            # layout: bumped whenever files are replaced; rows_used: high-water mark; ivf_vectors: chunks at IVF training
+            conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO state (key, value) VALUES ('layout', 0), ('rows_used', 0), ('ivf_vectors', 0)")
+        self._repair()
+        if self.quantization == "int8":
+            self.quantize()
+
+    # --- VectorIndex ---
+
+    def count(self) -> int:
+        state = self._refresh()
+        valid = self._valid
+        if valid is None:
+            return 0
+        return int(np.count_nonzero(valid[:state['rows_used']]))
+
+    def add(self, ids, embeddings, documents, metadatas) -> None:
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._transaction() as (conn, state):
+            existing = self._rows_for_ids(conn, ids)
+            free = iter([row for (row,) in conn.execute("SELECT row FROM free_rows ORDER BY row LIMIT ?", (len(ids),))])
+            used = state['rows_used']
+            assigned: Dict[str, int] = {}
+            reused_free = []
+            for chunk_id in ids:
+                if chunk_id in assigned:
+                    continue
+                if chunk_id in existing:
+                    assigned[chunk_id] = existing[chunk_id]
+                    continue
+                row = next(free, None)
+                if row is None:
+                    row = used
+                    used += 1
+                else:
+                    reused_free.append(row)
+                assigned[chunk_id] = row
+            rows = np.array([assigned[chunk_id] for chunk_id in ids], dtype=np.int64)
+
+            self._ensure_capacity(conn, state, used, vectors.shape[1])
+            self._vectors[rows] = vectors
+            self._lists[rows] = self._assign(vectors, self._centroids) if self._centroids is not None else -1
+            self._vectors.flush()
+            self._lists.flush()
+            if self._codes is not None:
+                self._codes[rows], self._scales[rows] = _quantize(vectors)
+                self._codes.flush()
+                self._scales.flush()
+
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [(int(row), chunk_id, document, json.dumps(metadata))
+                 for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)]
+            )
+            conn.executemany("DELETE FROM free_rows WHERE row = ?", [(row,) for row in reused_free])
+            _set_state(conn, 'rows_used', used)
+
+            self._valid[rows] = True
+            self._valid.flush()
+
+        self._maybe_train_ivf()
+
+    def get(self, ids=None, where=None, include=('documents', 'metadatas'), limit=None, offset=None) -> Dict:
+        conn = self._conn()
+        if ids is not None:
+            records = []
+            for start in range(0, len(ids), SQL_BATCH):
+                batch = ids[start:start + SQL_BATCH]
+                records.extend(conn.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE id IN ({_placeholders(batch)}) ORDER BY row",
+                    batch
+                ).fetchall())
+        else:
+            sql = "SELECT row, id, document, metadata FROM chunks"
+            params: List = []
+            if where:
+                clause, params = where_sql(where)
+                sql += f" WHERE {clause}"
+            sql += " ORDER BY row LIMIT ? OFFSET ?"
+            params += [-1 if limit is None else limit, offset or 0]
+            records = conn.execute(sql, params).fetchall()
+
+        result = {'ids': [record[1] for record in records], 'documents': None, 'metadatas': None, 'embeddings': None}
+        if 'documents' in include:
+            result['documents'] = [record[2] for record in records]
+        if 'metadatas' in include:
+            result['metadatas'] = [json.loads(record[3]) for record in records]
+        if 'embeddings' in include:
+            self._refresh()
+            vectors = self._vectors
+            result['embeddings'] = [vectors[record[0]].tolist() for record in records]
+        return result
+
+    def update(self, ids, metadatas) -> None:
+        if not ids:
+            return
+        with self._transaction() as (conn, _):
+            conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)]
+            )
+
+    def delete(self, ids) -> None:
+        if not ids:
+            return
+        with self._transaction() as (conn, _):
+            rows = sorted(self._rows_for_ids(conn, ids).values())
+            if not rows:
+                return
+            # Hide the rows from searches first, then free them for reuse
+            self._valid[rows] = False
+            self._valid.flush()
+            self._lists[rows] = -1
+            for start in range(0, len(rows), SQL_BATCH):
+                batch = rows[start:start + SQL_BATCH]
+                conn.execute(f"DELETE FROM chunks WHERE row IN ({_placeholders(batch)})", batch)
+            conn.executemany("INSERT OR IGNORE INTO free_rows (row) VALUES (?)", [(row,) for row in rows])
+
+    def query(self, query_embeddings, n_results, where=None, include=('documents', 'metadatas', 'distances')) -> Dict:
+        state = self._refresh()
+        with self._files_lock:
+            vectors, valid, lists, centroids = self._vectors, self._valid, self._lists, self._centroids
+            codes, scales = self._codes, self._scales
+
+        results = {key: [] for key in ('ids', 'documents', 'metadatas', 'distances', 'embeddings')}
+        if vectors is None:
+            for _ in query_embeddings:
+                for values in results.values():
+                    values.append([])
+            return self._select(results, include)
+
+        # Files may be mid-replacement by another process: only trust rows all of them have
+        n = min(state['rows_used'], len(vectors), len(valid), len(lists))
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        mask = valid[:n].astype(bool)
+        if where:
+            allowed = self._rows_where(where)
+            allowed = allowed[allowed < n]
+            keep = np.zeros(n, dtype=bool)
+            keep[allowed] = True
+            mask &= keep
+
+        # First pass on int8 codes keeps a shortlist that is rescored on the float rows
+        int8 = self.quantization == "int8" and codes is not None and len(codes) >= n
+        shortlist = n_results * self.rerank_factor if int8 else n_results
+
+        def score(rows: np.ndarray, batch: np.ndarray) -> np.ndarray:
+            if int8:
+                return _int8_scores(codes, scales, rows, batch)
+            if rows.size == n:
+                return vectors[:n] @ batch.T  # contiguous: no gather copy
+            return vectors[rows] @ batch.T
+
+        hits = []  # per query: (rows, scores) best first
+        if centroids is not None:
+            probe_count = min(self.ivf_probes, len(centroids))
+            probes = np.argpartition(-(queries @ centroids.T), probe_count - 1, axis=1)[:, :probe_count]
+            for query, probe in zip(queries, probes):
+                candidates = np.flatnonzero(mask & np.isin(lists[:n], probe))
+                if candidates.size < n_results:
+                    candidates = np.flatnonzero(mask)  # too few in the probed lists (e.g. narrow filter): exact
+                hits.append(_top_k(candidates, score(candidates, query[None, :])[:, 0], shortlist))
+        elif np.count_nonzero(mask) < n // 2:
+            candidates = np.flatnonzero(mask)
+            scores = score(candidates, queries)
+            hits = [_top_k(candidates, scores[:, i], shortlist) for i in range(len(queries))]
+        else:
+            # Most rows are live: one product over the contiguous matrix, masked afterwards
+            candidates = np.arange(n)
+            scores = score(candidates, queries)
+            scores[~mask] = -np.inf
+            hits = [_top_k(candidates, scores[:, i], shortlist, drop_masked=True) for i in range(len(queries))]
+
+        if int8:
+            hits = [_top_k(np.array(rows, dtype=np.int64), vectors[rows] @ query, n_results) if rows else ([], [])
+                    for (rows, _), query in zip(hits, queries)]
+
+        records = self._records([row for rows, _ in hits for row in rows])
+        for rows, scores in hits:
+            found = [(row, score) for row, score in zip(rows, scores) if row in records]  # skip rows deleted meanwhile
+            results['ids'].append([records[row][0] for row, _ in found])
+            results['documents'].append([records[row][1] for row, _ in found])
+            results['metadatas'].append([records[row][2] for row, _ in found])
+            results['distances'].append([float(1.0 - score) for _, score in found])
+            results['embeddings'].append([vectors[row].tolist() for row, _ in found])
+        return self._select(results, include)
+
+    def clear(self) -> None:
+        with self._transaction() as (conn, state):
+            conn.execute("DELETE FROM chunks")
+            conn.execute("DELETE FROM free_rows")
+            _set_state(conn, 'rows_used', 0)
+            _set_state(conn, 'ivf_vectors', 0)
+            with self._files_lock:
+                self._vectors = self._valid = self._lists = self._centroids = None
+                self._codes = self._scales = None
+            for name in ('vectors', 'valid', 'lists', 'centroids', 'codes', 'scales'):
+                self._path(name).unlink(missing_ok=True)
+            self._bump_layout(conn, state)
+
+    # --- Quantization ---
+
+    def quantize(self) -> int:
+        """
+        Build int8 codes for every stored vector (no-op once they exist; adds keep them current).
+
+        Returns:
+            Number of rows encoded
+        """
+        with self._transaction() as (conn, state):
+            if self._vectors is None or self._codes is not None:
+                return 0
+            n = state['rows_used']
+            capacity, dimension = self._vectors.shape
+            scales = np.zeros(capacity, dtype=np.float32)
+            tmp = self.directory / "codes.tmp.npy"
+            codes = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.int8, shape=(capacity, dimension))
+            for start in range(0, n, ASSIGN_BLOCK):
+                end = min(start + ASSIGN_BLOCK, n)
+                codes[start:end], scales[start:end] = _quantize(np.asarray(self._vectors[start:end]))
+            codes.flush()
+            del codes
+            os.replace(tmp, self._path('codes'))
+            self._write_array('scales', scales)
+            self._bump_layout(conn, state)
+
+        logger.info("Built int8 codes for %d vectors", n)
+        return n
+
+    def memory_footprint(self) -> Dict[str, int]:
+        """
+        Bytes of vector data for the rows in use, per representation.
+
+        Returns:
+            Dict with rows, dimension, float32_bytes, int8_bytes (codes plus
+            scales) and search_bytes (what a first-pass scan reads)
+        """
+        state = self._refresh()
+        if self._vectors is None:
+            return {'rows': 0, 'dimension': 0, 'float32_bytes': 0, 'int8_bytes': 0, 'search_bytes': 0}
+        rows = state['rows_used']
+        dimension = self._vectors.shape[1]
+        float32_bytes = rows * dimension * 4
+        int8_bytes = rows * (dimension + 4)
+        int8 = self.quantization == "int8" and self._codes is not None
+        return {
+            'rows': rows,
+            'dimension': dimension,
+            'float32_bytes': float32_bytes,
+            'int8_bytes': int8_bytes,
+            'search_bytes': int8_bytes if int8 else float32_bytes
+        }
+
+    # --- IVF ---
+
+    def train_ivf(self, lists: int = None, iterations: int = 10) -> int:
+        """
+        Train the IVF coarse quantizer (spherical k-means on a sample of the
+        stored vectors) and assign every row to its nearest list.
+
+        Args:
+            lists: Number of lists (defaults to ivf_lists, or sqrt of the chunk count)
+            iterations: k-means iterations
+
+        Returns:
+            Number of lists trained (0 if the index is empty)
+        """
+        with self._transaction() as (conn, state):
+            if self._vectors is None:
+                return 0
+            n = state['rows_used']
+            rows = np.flatnonzero(self._valid[:n])
+            if rows.size == 0:
+                return 0
+            lists = min(lists or self.ivf_lists or int(math.sqrt(rows.size)), rows.size)
+            rng = np.random.default_rng(0)
+            sample = rows
+            if rows.size > lists * KMEANS_POINTS_PER_LIST:
+                sample = np.sort(rng.choice(rows, lists * KMEANS_POINTS_PER_LIST, replace=False))
+            centroids = _spherical_kmeans(np.asarray(self._vectors[sample]), lists, rng, iterations)
+
+            # New lists file and centroids, swapped in together with the layout bump
+            assignments = np.full(len(self._lists), -1, dtype=np.int32)
+            for start in range(0, n, ASSIGN_BLOCK):
+                block = rows[(rows >= start) & (rows < start + ASSIGN_BLOCK)]
+                if block.size:
+                    assignments[block] = self._assign(np.asarray(self._vectors[block]), centroids)
+            self._write_array('lists', assignments)
+            self._write_array('centroids', centroids)
+            _set_state(conn, 'ivf_vectors', int(rows.size))
+            self._bump_layout(conn, state)
+
+        logger.info("Trained IVF index: %d lists over %d vectors", lists, rows.size)
+        return lists
+
+    def _maybe_train_ivf(self) -> None:
+        """Train IVF once the index reaches ivf_min_vectors, and retrain each time it doubles."""
+        if self.ivf_min_vectors <= 0:
+            return
+        count = self.count()
+        trained = self._read_state()['ivf_vectors']
+        if count >= self.ivf_min_vectors and (trained == 0 or count >= 2 * trained):
+            self.train_ivf()
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each (unit) vector."""
+        return np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+
+    # --- Files and state ---
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection to meta.db (autocommit; writes use explicit transactions)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.directory / "meta.db"), isolation_level=None, timeout=60)
+            self._local.conn = conn
+        return conn
+
+    def _read_state(self) -> Dict[str, int]:
+        return dict(self._conn().execute("SELECT key, value FROM state").fetchall())
+
+    def _refresh(self) -> Dict[str, int]:
+        """Read the shared state, re-opening the files if their layout changed."""
+        state = self._read_state()
+        if state['layout'] != self._layout:
+            with self._files_lock:
+                if state['layout'] != self._layout:
+                    self._open_files(state['layout'])
+        return state
+
+    def _open_files(self, layout: int) -> None:
+        """Map the index files (caller holds _files_lock)."""
+        if self._path('vectors').exists():
+            self._vectors = np.load(self._path('vectors'), mmap_mode='r+')
+            self._valid = np.load(self._path('valid'), mmap_mode='r+')
+            self._lists = np.load(self._path('lists'), mmap_mode='r+')
+        else:
+            self._vectors = self._valid = self._lists = None
+        self._centroids = np.load(self._path('centroids')) if self._path('centroids').exists() else None
+        if self._vectors is not None and self._path('codes').exists():
+            self._codes = np.load(self._path('codes'), mmap_mode='r+')
+            self._scales = np.load(self._path('scales'), mmap_mode='r+')
+        else:
+            self._codes = self._scales = None
+        self._layout = layout
+
+    @contextmanager
+    def _transaction(self) -> Iterator[Tuple[sqlite3.Connection, Dict[str, int]]]:
+        """Exclusive write transaction across threads and processes, on up-to-date files."""
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn, self._refresh()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._layout = None  # re-read the files on next use
+                raise
+
+    def _bump_layout(self, conn: sqlite3.Connection, state: Dict[str, int]) -> None:
+        """Tell other processes to re-open the files (and re-open them here)."""
+        layout = state['layout'] + 1
+        _set_state(conn, 'layout', layout)
+        state['layout'] = layout
+        with self._files_lock:
+            self._open_files(layout)
+
+    def _ensure_capacity(self, conn: sqlite3.Connection, state: Dict[str, int], rows: int, dimension: int) -> None:
+        """Grow the files (doubling) so they hold at least `rows` rows."""
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if self._vectors is not None and self._vectors.shape[1] != dimension:
+            raise ValueError(f"Embedding dimension {dimension} does not match the index ({self._vectors.shape[1]})")
+        if rows <= capacity:
+            return
+
+        capacity = max(rows, capacity * 2, 1024)
+        used = state['rows_used']
+        vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        valid = np.zeros(capacity, dtype=bool)
+        lists = np.full(capacity, -1, dtype=np.int32)
+        if self._vectors is not None:
+            vectors[:used] = self._vectors[:used]
+            valid[:used] = self._valid[:used]
+            lists[:used] = self._lists[:used]
+        arrays = [('vectors', vectors), ('valid', valid), ('lists', lists)]
+        if self._codes is not None or self.quantization == "int8":
+            codes = np.zeros((capacity, dimension), dtype=np.int8)
+            scales = np.zeros(capacity, dtype=np.float32)
+            if self._codes is not None:
+                codes[:used] = self._codes[:used]
+                scales[:used] = self._scales[:used]
+            elif used:
+                codes[:used], scales[:used] = _quantize(np.asarray(self._vectors[:used]))
+            arrays += [('codes', codes), ('scales', scales)]
+        for name, array in arrays:
+            self._write_array(name, array)
+        self._bump_layout(conn, state)
+
+    def _write_array(self, name: str, array: np.ndarray) -> None:
+        """Write an array file atomically (readers keep their old mapping until they re-open)."""
+        tmp = self.directory / f"{name}.tmp.npy"
+        np.save(tmp, array)
+        os.replace(tmp, self._path(name))
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.npy"
+
+    def _repair(self) -> None:
+        """Re-derive valid.npy from meta.db if a crash left them out of step."""
+        with self._transaction() as (conn, state):
+            if self._valid is None:
+                return
+            stored = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            if stored == int(np.count_nonzero(self._valid[:state['rows_used']])):
+                return
+            rows = np.fromiter((row for (row,) in conn.execute("SELECT row FROM chunks")), dtype=np.int64)
+            self._valid[:] = False
+            self._valid[rows] = True
+            self._valid.flush()
+            logger.warning("Repaired NumPy index row flags (%d chunks)", stored)
+
+    # --- Rows ---
+
+    def _rows_for_ids(self, conn: sqlite3.Connection, ids: List[str]) -> Dict[str, int]:
+        rows = {}
+        for start in range(0, len(ids), SQL_BATCH):
+            batch = ids[start:start + SQL_BATCH]
+            rows.update(conn.execute(f"SELECT id, row FROM chunks WHERE id IN ({_placeholders(batch)})", batch).fetchall())
+        return rows
+
+    def _rows_where(self, where: Dict) -> np.ndarray:
+        clause, params = where_sql(where)
+        rows = self._conn().execute(f"SELECT row FROM chunks WHERE {clause}", params)
+        return np.fromiter((row for (row,) in rows), dtype=np.int64)
+
+    def _records(self, rows: List[int]) -> Dict[int, Tuple[str, str, Dict]]:
+        """(id, document, metadata) by row."""
+        conn = self._conn()
+        records = {}
+        rows = sorted(set(int(row) for row in rows))
+        for start in range(0, len(rows), SQL_BATCH):
+            batch = rows[start:start + SQL_BATCH]
+            for row, chunk_id, document, metadata in conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({_placeholders(batch)})", batch
+            ):
+                records[row] = (chunk_id, document, json.loads(metadata))
+        return records
+
+    @staticmethod
+    def _select(results: Dict, include: Sequence[str]) -> Dict:
+        """Keep ids plus the included fields, like Chroma."""
+        return {key: (values if key == 'ids' or key in include else None) for key, values in results.items()}
+
+
+def create_vector_index(persist_directory: str, collection_name: str, backend: str = None) -> VectorIndex:
+    """
+    Open the configured index backend.
+
+    Args:
+        persist_directory: Directory for the index files
+        collection_name: Collection (Chroma) or index directory name (NumPy)
+        backend: "chroma" or "numpy" (defaults to VECTOR_INDEX_BACKEND)
+    """
+    backend = backend or settings.VECTOR_INDEX_BACKEND
+    if backend == "chroma":
+        return ChromaIndex(persist_directory, collection_name)
+    if backend == "numpy":
+        return NumpyIndex(str(Path(persist_directory) / f"{collection_name}.npindex"))
+    raise ValueError(f"Unknown VECTOR_INDEX_BACKEND: {backend!r} (expected 'chroma' or 'numpy')")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (cosine similarity becomes a dot product)."""
+    vectors = np.atleast_2d(vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and scales (row ~= codes * scale)."""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _int8_scores(codes: np.ndarray, scales: np.ndarray, rows: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Approximate dot products of the given (sorted) rows with each query, from the int8 codes."""
+    scores = np.empty((rows.size, len(queries)), dtype=np.float32)
+    widened = np.empty((INT8_SCORE_BLOCK, codes.shape[1]), dtype=np.float32)  # reused for every block
+    contiguous = rows.size > 0 and rows[-1] - rows[0] + 1 == rows.size
+    for start in range(0, rows.size, INT8_SCORE_BLOCK):
+        block = rows[start:start + INT8_SCORE_BLOCK]
+        select = slice(block[0], block[-1] + 1) if contiguous else block
+        buffer = widened[:block.size]
+        buffer[...] = codes[select]
+        scores[start:start + block.size] = (buffer @ queries.T) * scales[select, None]
+    return scores
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int, drop_masked: bool = False) -> Tuple[List[int], List[float]]:
+    """The k best-scoring rows, best first."""
+    if rows.size == 0 or k <= 0:
+        return [], []
+    k = min(k, rows.size)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    if drop_masked:
+        best = best[np.isfinite(scores[best])]
+    return rows[best].tolist(), scores[best].tolist()
+
+
+def _spherical_kmeans(points: np.ndarray, k: int, rng: np.random.Generator, iterations: int) -> np.ndarray:
+    """k unit centroids for unit points (cosine k-means), fully vectorized per iteration."""
+    centroids = points[rng.choice(len(points), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(points @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=k)
+        nonempty = counts > 0
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(points[order], starts, axis=0)
+        empty = np.flatnonzero(~nonempty)
+        if empty.size:
+            sums[empty] = points[rng.choice(len(points), empty.size, replace=False)]  # re-seed empty lists
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _set_state(conn: sqlite3.Connection, key: str, value: int) -> None:
+    conn.execute("UPDATE state SET value = ? WHERE key = ?", (value, key))
+
+
+def _placeholders(values: Sequence) -> str:
+    return ", ".join("?" * len(values))
+
+
+# Chroma where operators supported by NumpyIndex
+_COMPARISONS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def where_sql(where: Dict) -> Tuple[str, List]:
+    """
+    Translate a Chroma where filter into SQL over a `metadata` JSON column
+    (used by NumpyIndex and LexicalIndex).
+
+    Returns:
+        (SQL condition, bound parameters)
+    """
+    clauses = []
+    params: List = []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_sql(condition) for condition in value]
+            clauses.append("(" + f" {key[1:].upper()} ".join(clause for clause, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+
+        field, field_params = (_json_field(key), []) if key.isidentifier() else ("json_extract(metadata, ?)", [f'$."{key}"'])
+        conditions = value if isinstance(value, dict) else {"$eq": value}
+        for operator, operand in conditions.items():
+            if operator in _COMPARISONS:
+                clauses.append(f"{field} {_COMPARISONS[operator]} ?")
+                params.extend([*field_params, operand])
+            elif operator in ("$in", "$nin"):
+                negate = "NOT " if operator == "$nin" else ""
+                clauses.append(f"{field} {negate}IN ({_placeholders(operand)})")
+                params.extend([*field_params, *operand])
+            else:
+                raise ValueError(f"Unsupported where operator: {operator}")
+    return " AND ".join(clauses) or "1", params
+
+
+def _json_field(key: str) -> str:
+    """SQL for one metadata field, written out literally so SQLite can use an expression index on it."""
+    return f"json_extract(metadata, '$.\"{key}\"')"
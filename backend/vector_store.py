@@ -1,24 +1,117 @@
 """
 DocuMind Vector Store
-Wrapper for ChromaDB to store and query document embeddings,
+Wrapper for the vector index (ChromaDB or NumPy) to store and query document embeddings,
 Search for similar chunks when user asks a question
 """
-from openai import OpenAI
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
 from backend.config import settings, get_settings
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict  # Labels telling us what data looks like
+from backend.clients import get_openai_client, get_async_openai_client, get_upstream_limiter
+from backend.query_cache import QueryEmbeddingCache
+from backend.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from backend.catalog import DocumentCatalog, file_type_of
+from backend.vector_index import create_vector_index
+from backend.active_index import ActiveIndex, EmbeddingSpec
+from backend.change_log import ChangeLog
+from backend.ingestion import chunk_hash, generate_embeddings
+from backend.mmr import mmr_select
+from backend.metrics import QUERY_STAGE_SECONDS, timed
+from backend.schemas import QueryFilters
+from typing import List, Dict, Optional, Iterator, Tuple  # Labels telling us what data looks like
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class _SwapLock:
+    """
+    Readers-writer lock: searches share it, a document swap takes it alone
+    (a waiting swap holds back new searches so it can't be starved).
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+        self.swaps = 0  # completed swaps, so a reader can tell if one happened between two of its reads
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self.swaps += 1
+                self._condition.notify_all()
+
+
+def filter_where(filters: Optional[QueryFilters]) -> Optional[Dict]:
+    """
+    Translate query filters into a where clause on chunk metadata (applied by
+    the vector index itself, and by the BM25 index).
+
+    Returns:
+        Chroma where dict, or None when nothing is filtered
+    """
+    if filters is None:
+        return None
+    conditions = []
+    if filters.source_files:
+        conditions.append({'source_file': {'$in': sorted(set(filters.source_files))}})
+    if filters.file_type:
+        conditions.append({'file_type': filters.file_type.lower().lstrip('.')})
+    if filters.ingested_after is not None:
+        conditions.append({'ingested_at': {'$gte': filters.ingested_after.timestamp()}})
+    if filters.ingested_before is not None:
+        conditions.append({'ingested_at': {'$lt': filters.ingested_before.timestamp()}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {'$and': conditions}
+
+
+class QueryNotEmbeddedError(Exception):
+    """
+    Raised by query()/query_batch() with embed_missing=False when a question
+    needs an embedding the caller didn't provide for the active index (e.g.
+    a migration cut over after it was embedded).
+    """
 
 
 class VectorStore:
-    """Manages document storage and retrieval using ChromaDB"""
+    """Manages document storage and retrieval using the configured vector index"""
 
     def __init__(self, persist_directory: str = None, collection_name: str = None):
         """
-        Initialize ChromaDB with persistence.
+        Initialize the vector index with persistence.
         
         Args:
             persist_directory: Where to save the database (defaults to config)
@@ -30,134 +123,602 @@ class VectorStore:
 
         # Store collection name
         self.collection_name = collection_name
+        self.persist_directory = persist_directory
+
+        # Shared OpenAI clients (sync for worker threads, async for request handlers)
+        self.openai_client = get_openai_client()
+        self.async_openai_client = get_async_openai_client()
+
+        # Re-uploaded documents are swapped in under this lock (see replace_document)
+        self._swap_lock = _SwapLock()
+        self._local = threading.local()
 
-        # Initialize ChromaDB client object
-        self.client = chromadb.PersistentClient(  # creates a database that saves to disk(survives restarts)
-            path=persist_directory,  # path = directory where SQLite database files are stored
-            settings=ChromaSettings(anonymized_telemetry=False)
-        )
+        # Index serving the collection and the embedding model it was built with (moved by backend.reembed)
+        self.active_index = ActiveIndex(persist_directory, self.collection_name)
+        self._open_active_index()
+        self.change_log = ChangeLog(persist_directory, self.collection_name)  # records writes while a migration runs
+        
+        # Corpus version: changes on every add/delete/clear (shared by all workers via a file)
+        self._version_path = Path(persist_directory) / "corpus_version"
+        
+        # BM25 index over the same chunks (built from the vector index the first time)
+        self.lexical_index = LexicalIndex(str(Path(persist_directory) / f"{self.collection_name}.lexical.db"))
+        if self.lexical_index.count() == 0 and self.index.count() > 0:
+            self.rebuild_lexical_index()
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(  # creates new collection first time, later uses existing collections
-            name=self.collection_name,
-            metadata={"hnsw:space": "cosine"}  # use hnsw for fast search, cosine similarity for matching text embeddings
-        )
+        # Per-document counts for /stats, /health and /documents (built from the vector index the first time)
+        self.catalog = DocumentCatalog(str(Path(persist_directory) / f"{self.collection_name}.catalog.db"))
+        if self.catalog.totals()[1] == 0 and self.index.count() > 0:
+            self.rebuild_catalog()
+        
+        # Chunks indexed before the metadata query filters use get it from the catalog (once)
+        sample = self.index.get(include=['metadatas'], limit=1)
+        if sample['ids'] and 'ingested_at' not in sample['metadatas'][0]:
+            self.backfill_filter_metadata()
+        
+        logger.info("Vector store initialized at: %s", persist_directory)
+
+    @property
+    def corpus_version(self) -> str:
+        """Token that changes whenever the indexed corpus changes (used to invalidate answer caches)."""
+        try:
+            return self._version_path.read_text().strip()
+        except FileNotFoundError:
+            return "0"
+
+    def _bump_corpus_version(self) -> None:
+        """Write a new corpus version token atomically."""
+        tmp_path = self._version_path.with_name(f"{self._version_path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(uuid.uuid4().hex)
+        os.replace(tmp_path, self._version_path)
+
+    def _open_active_index(self) -> None:
+        """Open the index the collection's pointer names, with a query cache for its embedding model."""
+        self._active_stamp = self.active_index.stamp()
+        self.index_name, self.embedding_spec = self.active_index.read()
+
+        # Embedding index: Chroma collection or memory-mapped NumPy matrix (VECTOR_INDEX_BACKEND)
+        self.index = create_vector_index(self.persist_directory, self.index_name)
+        self.query_cache = QueryEmbeddingCache(model=self.embedding_spec.model, dimension=self.embedding_spec.dimension)
+
+    def follow_cutover(self) -> bool:
+        """
+        Switch to the active index if a re-embedding migration cut over since
+        the last check (searches in progress finish on the old index first).
         
-        print(f"Vector initialized at: {persist_directory}")
+        Returns:
+            True if the index changed
+        """
+        if self.active_index.stamp() == self._active_stamp:
+            return False
+        with self._swap_lock.write():
+            if self.active_index.stamp() == self._active_stamp:
+                return False
+            self._open_active_index()
+        logger.info("Switched to index %s (%s, %d dimensions)",
+                    self.index_name, self.embedding_spec.model, self.embedding_spec.dimension)
+        return True
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Hold the collection's shared write lock (a migration cutover waits for it) on the active index."""
+        if getattr(self._local, 'writing', False):
+            yield  # nested call (e.g. add_documents inside replace_document)
+            return
+        with self.active_index.writing():
+            self.follow_cutover()
+            self._local.writing = True
+            try:
+                yield
+            finally:
+                self._local.writing = False
+
+    @contextmanager
+    def document_lock(self, source_file: str) -> Iterator[None]:
+        """Serialize ingestion/deletion of one source file across threads and processes (reentrant per thread)."""
+        held = self._local.__dict__.setdefault('documents', set())
+        if source_file in held:
+            yield
+            return
+        with self.active_index.document_lock(source_file):
+            held.add(source_file)
+            try:
+                yield
+            finally:
+                held.discard(source_file)
 
-    def add_documents(self, documents: List[Dict]) -> int:
-        """Add documents to the vector store."""
+    def add_documents(self, documents: List[Dict], embedded_with: Optional[EmbeddingSpec] = None) -> int:
+        """
+        Add documents to the vector store.
+        
+        Args:
+            documents: Records with id, content, embedding and metadata
+            embedded_with: Embedding model the records were embedded with, if
+                           it may predate a migration cutover (they are
+                           embedded again for the active index if it differs)
+        """
         if len(documents) == 0:
-            print("⚠️  No documents to add")
+            logger.warning("No documents to add")
             return 0
         
         try:
-            ids = [doc['id'] for doc in documents]
-            embeddings = [doc['embedding'] for doc in documents]
-            contents = [doc['content'] for doc in documents]
-            metadatas = [doc['metadata'] for doc in documents]
-            
-            print(f"📊 Attempting to add {len(documents)} chunks")
-            print(f"   - First 3 IDs: {ids[:3]}")
-            print(f"   - Embedding dimensions: {len(embeddings[0])}")
-            print(f"   - First content preview: {contents[0][:100]}...")
-            
-            # Add to ChromaDB
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                documents=contents,
-                metadatas=metadatas
-            )
+            with self._writing():
+                ids = [doc['id'] for doc in documents]
+                embeddings = [doc['embedding'] for doc in documents]
+                contents = [doc['content'] for doc in documents]
+                metadatas = [doc['metadata'] for doc in documents]
+                
+                if embedded_with is not None and embedded_with != self.embedding_spec:
+                    logger.info("Re-embedding %d chunks for %s (migrated during ingestion)", len(documents), self.index_name)
+                    embeddings = generate_embeddings(contents, spec=self.embedding_spec)
+                
+                logger.debug("Adding chunks=%d first_ids=%s dimension=%d", len(documents), ids[:3], len(embeddings[0]))
+                
+                # Add to the vector index
+                self.index.add(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=contents,
+                    metadatas=metadatas
+                )
+                self.lexical_index.add(ids, contents, metadatas)
+                self.change_log.record(ids)
+                self.catalog.add_chunks(documents)
+                
+                self._bump_corpus_version()
             
-            print(f"✅ Successfully added {len(documents)} chunks to vector store")
+            logger.debug("Added chunks=%d", len(documents))
             return len(documents)
             
         except Exception as e:
-            print(f"❌ ERROR in add_documents: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in add_documents: %s: %s", type(e).__name__, e)
             raise  # Re-raise so main.py can catch it
 
-    def query(self, query_text: str, n_results: int = 5) -> dict:
+    def embed_query(self, query_text: str) -> List[float]:
         """
-        Query the vector store with text.
+        Embed a query, serving repeated questions from the query cache.
         
         Args:
             query_text: The question/query as text
-            n_results: Number of results to return
             
         Returns:
-            Dictionary with 'documents' and 'metadatas' keys
+            The query embedding
         """
-        try:
-            print(f"🔍 Querying for: {query_text[:50]}...")
-            
-            # Create embedding for the query text
-            client = OpenAI(api_key=settings.OPENAI_API_KEY)
-            response = client.embeddings.create(
-                model=settings.EMBEDDING_MODEL,
+        query_embedding = self.query_cache.get(query_text)
+        if query_embedding is not None:
+            logger.debug("Query embedding cache hit")
+            return query_embedding
+
+        with timed(QUERY_STAGE_SECONDS, 'embed'):
+            response = self.openai_client.embeddings.create(
+                **self.embedding_spec.request_params(),
                 input=query_text
             )
-            query_embedding = response.data[0].embedding
-            
-            print(f"✅ Generated query embedding, dimension: {len(query_embedding)}")
+        query_embedding = response.data[0].embedding
+        self.query_cache.put(query_text, query_embedding)
+        
+        logger.debug("Generated query embedding dimension=%d", len(query_embedding))
+        return query_embedding
+
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries in one API request (cached and repeated questions are not sent).
+        
+        Args:
+            query_texts: The questions as text
             
-            # Query ChromaDB with the embedding
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=['documents', 'metadatas', 'distances']
+        Returns:
+            One embedding per question, in order
+        """
+        embeddings, missing = self._cached_query_embeddings(query_texts)
+        if not missing:
+            return embeddings
+
+        with timed(QUERY_STAGE_SECONDS, 'embed'):
+            response = self.openai_client.embeddings.create(
+                **self.embedding_spec.request_params(),
+                input=missing
             )
+        return self._merge_query_embeddings(query_texts, embeddings, missing, response)
+
+    async def aembed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """
+        embed_queries for request handlers: uses the AsyncOpenAI client and
+        waits for an upstream slot (raises UpstreamBusyError when none is free).
+        """
+        embeddings, missing = self._cached_query_embeddings(query_texts)
+        if not missing:
+            return embeddings
+
+        async with get_upstream_limiter().slot():
+            with timed(QUERY_STAGE_SECONDS, 'embed'):
+                response = await self.async_openai_client.embeddings.create(
+                    **self.embedding_spec.request_params(),
+                    input=missing
+                )
+        return self._merge_query_embeddings(query_texts, embeddings, missing, response)
+
+    def _cached_query_embeddings(self, query_texts: List[str]) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """(cached embedding or None per question, distinct questions the cache doesn't have)"""
+        embeddings = [self.query_cache.get(text) for text in query_texts]
+        missing = list(dict.fromkeys(text for text, embedding in zip(query_texts, embeddings) if embedding is None))
+        return embeddings, missing
+
+    def _merge_query_embeddings(self, query_texts: List[str], embeddings: List[Optional[List[float]]],
+                                missing: List[str], response) -> List[List[float]]:
+        """Cache the embeddings API response and fill it in for the questions that missed."""
+        fresh = {}
+        for item in response.data:
+            fresh[missing[item.index]] = item.embedding
+            self.query_cache.put(missing[item.index], item.embedding)
+        
+        logger.debug("Embedded %d of %d queries", len(missing), len(query_texts))
+        return [embedding if embedding is not None else fresh[text] for text, embedding in zip(query_texts, embeddings)]
+
+    def query(self, query_text: str, n_results: int = 5, query_embedding: Optional[List[float]] = None,
+              filters: Optional[QueryFilters] = None, embed_missing: bool = True,
+              embedded_with: Optional[EmbeddingSpec] = None) -> dict:
+        """
+        Query the vector store with text.
+        
+        Uses RETRIEVAL_MODE: vector search, BM25, or both fused with reciprocal-rank fusion.
+        In hybrid mode a decisive BM25 match is returned without embedding the query.
+        With MMR_ENABLED, MMR_CANDIDATES candidates are over-fetched with their
+        embeddings and n_results of them picked by maximal marginal relevance.
+        Filters are pushed down into both searches as a where clause, so only
+        matching chunks are scored.
+        
+        Args:
+            query_text: The question/query as text
+            n_results: Number of results to return
+            query_embedding: Embedding of query_text if the caller already has it
+            filters: Only search chunks of matching documents
+            embed_missing: Embed the question here if it needs an embedding the
+                           caller didn't provide; request handlers pass False and
+                           embed under the upstream limiter (aembed_queries)
+            embedded_with: Embedding model query_embedding was made with (it is
+                           dropped if a migration cut over to another one since)
+            
+        Returns:
+            Dictionary with 'documents', 'metadatas' and 'distances' keys
+            (distance is None for chunks only found by BM25)
+        
+        Raises:
+            QueryNotEmbeddedError: embed_missing is False and an embedding is needed
+        """
+        try:
+            logger.debug("Querying for: %.50s", query_text)
+            mode = settings.RETRIEVAL_MODE
+            where = filter_where(filters)
+            self.follow_cutover()
+            query_embedding = self._usable_embedding(query_embedding, embedded_with)
+
+            lexical = []
+            with self._swap_lock.read():
+                swaps = self._swap_lock.swaps
+                if mode != "vector":
+                    with timed(QUERY_STAGE_SECONDS, 'lexical'):
+                        lexical = self.lexical_index.search(query_text, max(n_results, settings.HYBRID_CANDIDATES), where)
+                    # Fast path only when it saves the embeddings round trip
+                    if mode == "lexical" or (query_embedding is None and self._is_decisive(lexical)):
+                        logger.debug("Found %d results (BM25)", min(len(lexical), n_results))
+                        return self._lexical_results(lexical[:n_results])
+            
+            # Create embedding for the query text (cached for repeated questions)
+            if query_embedding is None:
+                if not embed_missing:
+                    raise QueryNotEmbeddedError(query_text)
+                query_embedding = self.embed_query(query_text)
             
-            num_results = len(results['documents'][0]) if results['documents'] else 0
-            print(f"✅ Found {num_results} results")
+            with self._swap_lock.read():
+                # A document was swapped while embedding: search BM25 again so both rankings see the same version
+                if mode == "hybrid" and self._swap_lock.swaps != swaps:
+                    with timed(QUERY_STAGE_SECONDS, 'lexical'):
+                        lexical = self.lexical_index.search(query_text, max(n_results, settings.HYBRID_CANDIDATES), where)
+                
+                # Query the vector index with the embedding
+                with timed(QUERY_STAGE_SECONDS, 'search'):
+                    results = self.index.query(
+                        query_embeddings=[query_embedding],
+                        n_results=self._candidates(n_results, mode),
+                        where=where,
+                        include=self._search_include()
+                    )
             
-            # Return in format main.py expects
-            return {
+            vector = {
+                'ids': results['ids'][0] if results['ids'] else [],
                 'documents': results['documents'][0] if results['documents'] else [],
                 'metadatas': results['metadatas'][0] if results['metadatas'] else [],
-                'distances': results['distances'][0] if results['distances'] else []
+                'distances': results['distances'][0] if results['distances'] else [],
+                'embeddings': results['embeddings'][0] if results.get('embeddings') else None
             }
+            results = self._rank(vector, lexical, n_results, query_embedding, mode)
             
+            logger.debug("Found %d results", len(results['documents']))
+            return results
+            
+        except QueryNotEmbeddedError:
+            raise  # expected: the caller embeds the question and retries
         except Exception as e:
-            print(f"❌ ERROR in query: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in query: %s: %s", type(e).__name__, e)
             raise  # Re-raise so main.py can catch it
 
-    def get_stats(self) -> Dict:
+    def query_batch(self, query_texts: List[str], n_results: List[int],
+                    query_embeddings: Optional[List[Optional[List[float]]]] = None,
+                    filters: Optional[List[Optional[QueryFilters]]] = None,
+                    embed_missing: bool = True, embedded_with: Optional[EmbeddingSpec] = None) -> List[dict]:
         """
-        Get statistics about the indexed documents.
+        Query the vector store with several questions at once: questions that
+        need an embedding are embedded in one API request and the vector
+        searches run as one index query per distinct filter. Retrieval is
+        otherwise the same as query() (RETRIEVAL_MODE, BM25 fast path per question).
         
+        Args:
+            query_texts: The questions as text
+            n_results: Number of results to return for each question
+            query_embeddings: Embedding of each question, or None where the caller doesn't have it
+            filters: Filters of each question (None where it has none)
+            embed_missing: See query()
+            embedded_with: Embedding model query_embeddings were made with (see query())
+            
         Returns:
-            Dict with total_chunks, unique_documents, source_files
+            One query() result dict per question, in order
+        
+        Raises:
+            QueryNotEmbeddedError: embed_missing is False and a question needs an embedding
         """
-        count = self.collection.count()  # Gives us count on how many chunks we have stored
+        try:
+            mode = settings.RETRIEVAL_MODE
+            count = len(query_texts)
+            query_embeddings = list(query_embeddings) if query_embeddings is not None else [None] * count
+            wheres = [filter_where(f) for f in filters] if filters is not None else [None] * count
+            self.follow_cutover()
+            query_embeddings = [self._usable_embedding(embedding, embedded_with) for embedding in query_embeddings]
+            results: List[Optional[dict]] = [None] * count
 
-        if count > 0:
-            # Get all items to find unique sources
-            all_items = self.collection.get(include=['metadatas'])  # gives us all the items in the db only metadata we acc need
-            unique_sources = set(  # as set is a collection that automatically removes duplicates
-                meta.get('source_file', 'unknown')
-                for meta in all_items['metadatas']
-            )
-            return {
-                'total_chunks': count,
-                'unique_documents': len(unique_sources),  # counts how many unique file names we found
-                'source_files': sorted(list(unique_sources))  # takes our set and converts it to a list, sorts it alphabetically, and includes that sorted list
-            }
+            lexical = [[] for _ in range(count)]
+            with self._swap_lock.read():
+                swaps = self._swap_lock.swaps
+                if mode != "vector":
+                    for i, text in enumerate(query_texts):
+                        with timed(QUERY_STAGE_SECONDS, 'lexical'):
+                            lexical[i] = self.lexical_index.search(text, max(n_results[i], settings.HYBRID_CANDIDATES), wheres[i])
+                        if mode == "lexical" or (query_embeddings[i] is None and self._is_decisive(lexical[i])):
+                            results[i] = self._lexical_results(lexical[i][:n_results[i]])
+
+            pending = [i for i in range(count) if results[i] is None]
+            if not pending:
+                return results
+
+            # One embeddings request for every question still without an embedding
+            missing = [i for i in pending if query_embeddings[i] is None]
+            if missing and not embed_missing:
+                raise QueryNotEmbeddedError(query_texts[missing[0]])
+            if missing:
+                for i, embedding in zip(missing, self.embed_queries([query_texts[i] for i in missing])):
+                    query_embeddings[i] = embedding
+
+            # Candidates per question (each question's top results are a prefix of a larger search's)
+            candidates = {i: self._candidates(n_results[i], mode) for i in pending}
+            with self._swap_lock.read():
+                if mode == "hybrid" and self._swap_lock.swaps != swaps:
+                    for i in pending:
+                        with timed(QUERY_STAGE_SECONDS, 'lexical'):
+                            lexical[i] = self.lexical_index.search(query_texts[i], candidates[i], wheres[i])
+
+                # Questions with the same filters share one index query
+                groups: Dict[str, List[int]] = {}
+                for i in pending:
+                    groups.setdefault(json.dumps(wheres[i], sort_keys=True), []).append(i)
+                vectors: Dict[int, Dict] = {}
+                with timed(QUERY_STAGE_SECONDS, 'search'):
+                    for group in groups.values():
+                        raw = self.index.query(
+                            query_embeddings=[query_embeddings[i] for i in group],
+                            n_results=max(candidates[i] for i in group),
+                            where=wheres[group[0]],
+                            include=self._search_include()
+                        )
+                        for row, i in enumerate(group):
+                            vectors[i] = {key: raw[key][row][:candidates[i]]
+                                          for key in ('ids', 'documents', 'metadatas', 'distances')}
+                            vectors[i]['embeddings'] = raw['embeddings'][row][:candidates[i]] if raw.get('embeddings') else None
+
+            for i in pending:
+                results[i] = self._rank(vectors[i], lexical[i], n_results[i], query_embeddings[i], mode)
+
+            logger.debug("Batch query: %d questions, %d vector searched", count, len(pending))
+            return results
+
+        except QueryNotEmbeddedError:
+            raise  # expected: the caller embeds the question and retries
+        except Exception as e:
+            logger.exception("Error in query_batch: %s: %s", type(e).__name__, e)
+            raise
+
+    def _usable_embedding(self, embedding: Optional[List[float]],
+                          embedded_with: Optional[EmbeddingSpec]) -> Optional[List[float]]:
+        """A query embedding if it was made for the active index, None if for the one a migration replaced."""
+        if embedding is None or (embedded_with is not None and embedded_with != self.embedding_spec):
+            return None
+        return embedding if len(embedding) == self.embedding_spec.dimension else None
+
+    def lexical_fast_path(self, query_text: str, n_results: int = 5,
+                          filters: Optional[QueryFilters] = None) -> Optional[dict]:
+        """
+        Results for a question that BM25 alone answers decisively (see query), else None.
+        Lets callers skip embedding a question whose retrieval won't need it.
+        """
+        if settings.RETRIEVAL_MODE == "vector":
+            return None
+        with self._swap_lock.read(), timed(QUERY_STAGE_SECONDS, 'lexical'):
+            lexical = self.lexical_index.search(query_text, max(n_results, settings.HYBRID_CANDIDATES), filter_where(filters))
+        if settings.RETRIEVAL_MODE == "lexical" or self._is_decisive(lexical):
+            return self._lexical_results(lexical[:n_results])
+        return None
+
+    def _is_decisive(self, lexical: List[Dict]) -> bool:
+        """Whether the top BM25 hit contains every query term and clearly outscores the runner-up."""
+        if not settings.LEXICAL_FAST_PATH or not lexical or not lexical[0]['matches_all']:
+            return False
+        if len(lexical) == 1:
+            return True
+        return lexical[0]['score'] >= settings.LEXICAL_FAST_PATH_MARGIN * lexical[1]['score']
+
+    def _lexical_results(self, lexical: List[Dict]) -> dict:
+        """BM25 hits in the format query() returns."""
+        return {
+            'documents': [hit['document'] for hit in lexical],
+            'metadatas': [hit['metadata'] for hit in lexical],
+            'distances': [None] * len(lexical)
+        }
+
+    def _candidates(self, n_results: int, mode: str) -> int:
+        """Vector results fetched for a question: enough to fuse (hybrid) and to diversify (MMR)."""
+        count = max(n_results, settings.HYBRID_CANDIDATES) if mode == "hybrid" else n_results
+        return max(count, settings.MMR_CANDIDATES) if settings.MMR_ENABLED else count
+
+    def _search_include(self) -> List[str]:
+        """Fields fetched by vector searches (MMR needs the candidates' embeddings)."""
+        include = ['documents', 'metadatas', 'distances']
+        return include + ['embeddings'] if settings.MMR_ENABLED else include
+
+    def _rank(self, vector: Dict, lexical: List[Dict], n_results: int, query_embedding: List[float], mode: str) -> dict:
+        """A question's final results from its candidates: RRF fusion (hybrid), then MMR (MMR_ENABLED)."""
+        if mode == "hybrid":
+            vector = self._fuse(vector, lexical, self._candidates(n_results, mode) if settings.MMR_ENABLED else n_results)
+        if settings.MMR_ENABLED:
+            vector = self._diversify(vector, query_embedding, n_results)
+        return {
+            'documents': vector['documents'][:n_results],
+            'metadatas': vector['metadatas'][:n_results],
+            'distances': vector['distances'][:n_results]
+        }
+
+    def _diversify(self, vector: Dict, query_embedding: List[float], n_results: int) -> Dict:
+        """
+        Keep n_results of the candidates, picked by maximal marginal relevance
+        (MMR_LAMBDA). Fused candidates are relevant by their RRF score, so
+        exact BM25 matches the embedding ranks low still make it; embeddings
+        only measure redundancy between candidates.
+        """
+        embeddings = list(vector['embeddings'] if vector.get('embeddings') is not None else [None] * len(vector['ids']))
+        missing = [chunk_id for chunk_id, embedding in zip(vector['ids'], embeddings) if embedding is None]
+        if missing:  # BM25-only hits
+            found = self.index.get(ids=missing, include=['embeddings'])
+            by_id = dict(zip(found['ids'], found['embeddings']))
+            embeddings = [embedding if embedding is not None else by_id.get(chunk_id)
+                          for chunk_id, embedding in zip(vector['ids'], embeddings)]
+        usable = [i for i, embedding in enumerate(embeddings) if embedding is not None]  # skips chunks deleted meanwhile
+
+        relevance = [vector['scores'][i] for i in usable] if 'scores' in vector else None
+
+        with timed(QUERY_STAGE_SECONDS, 'mmr'):
+            picked = mmr_select(query_embedding, [embeddings[i] for i in usable], n_results, settings.MMR_LAMBDA,
+                                relevance=relevance)
+        order = [usable[i] for i in picked]
+        return {key: [vector[key][i] for i in order] for key in ('ids', 'documents', 'metadatas', 'distances')}
+
+    def _fuse(self, vector: Dict, lexical: List[Dict], n_results: int) -> Dict:
+        """Combine vector and BM25 rankings with reciprocal-rank fusion, keeping the top n_results."""
+        embeddings = vector.get('embeddings')
+        if embeddings is None:
+            embeddings = [None] * len(vector['ids'])
+        chunks = {hit['id']: (hit['document'], hit['metadata'], None, None) for hit in lexical}
+        for chunk_id, doc, meta, distance, embedding in zip(vector['ids'], vector['documents'], vector['metadatas'],
+                                                           vector['distances'], embeddings):
+            chunks[chunk_id] = (doc, meta, distance, embedding)
+
+        fused = reciprocal_rank_fusion(
+            [vector['ids'], [hit['id'] for hit in lexical]],
+            k=settings.RRF_K
+        )[:n_results]
+
+        return {
+            'ids': [chunk_id for chunk_id, _ in fused],
+            'documents': [chunks[chunk_id][0] for chunk_id, _ in fused],
+            'metadatas': [chunks[chunk_id][1] for chunk_id, _ in fused],
+            'distances': [chunks[chunk_id][2] for chunk_id, _ in fused],
+            'embeddings': [chunks[chunk_id][3] for chunk_id, _ in fused],
+            'scores': [score for _, score in fused]
+        }
+
+    def rebuild_lexical_index(self, page_size: int = 5000) -> int:
+        """
+        Rebuild the BM25 index from the vector index (e.g. for a collection indexed before it existed).
+        
+        Returns:
+            Number of chunks indexed
+        """
+        self.lexical_index.clear()
+        total = self.index.count()
+        for offset in range(0, total, page_size):
+            page = self.index.get(include=['documents', 'metadatas'], limit=page_size, offset=offset)
+            self.lexical_index.add(page['ids'], page['documents'], page['metadatas'])
+        logger.info("Built BM25 index for %d chunks", total)
+        return total
+
+    def rebuild_catalog(self, page_size: int = 5000) -> int:
+        """
+        Rebuild the document catalog from the vector index (e.g. for a collection indexed before it existed).
+        
+        Returns:
+            Number of chunks cataloged
+        """
+        self.catalog.clear()
+        total = self.index.count()
+        for offset in range(0, total, page_size):
+            page = self.index.get(include=['documents', 'metadatas'], limit=page_size, offset=offset)
+            self.catalog.add_chunks([
+                {'content': content, 'metadata': metadata}
+                for content, metadata in zip(page['documents'], page['metadatas'])
+            ])
+        logger.info("Built document catalog for %d chunks", total)
+        return total
+
+    def backfill_filter_metadata(self, page_size: int = 5000) -> int:
+        """
+        Add the file_type and ingested_at metadata query filters match on to
+        chunks indexed before it existed (taken from the document catalog).
         
-        # if chunks < 0 (db is empty)
+        Returns:
+            Number of chunks updated
+        """
+        documents = self.catalog.ingestion_info()
+        updated = 0
+        for offset in range(0, self.index.count(), page_size):
+            page = self.index.get(include=['metadatas'], limit=page_size, offset=offset)
+            ids, metadatas = [], []
+            for chunk_id, metadata in zip(page['ids'], page['metadatas']):
+                if 'ingested_at' in metadata:
+                    continue
+                source_file = metadata.get('source_file', 'unknown')
+                file_type, ingested_at = documents.get(source_file, (file_type_of(source_file), time.time()))
+                ids.append(chunk_id)
+                metadatas.append({**metadata, 'file_type': file_type, 'ingested_at': ingested_at})
+            self.update_metadatas(ids, metadatas)
+            updated += len(ids)
+        logger.info("Added filter metadata to %d chunks", updated)
+        return updated
+
+    def get_stats(self) -> Dict:
+        """
+        Get statistics about the indexed documents (read from the catalog, not the collection).
+        
+        Returns:
+            Dict with total_chunks, unique_documents, source_files
+        """
+        documents, chunks = self.catalog.totals()
         return {
-            'total_chunks': 0,
-            'unique_documents': 0,
-            'source_files': []
+            'total_chunks': chunks,
+            'unique_documents': documents,
+            'source_files': self.catalog.source_files()
         }
     
     def delete_document(self, source_file: str) -> bool:
         """
-        Delete all chunks from a specific source file.
+        Delete all chunks from a specific source file. Waits for an ingestion
+        of the same file, and searches see the document either whole or gone.
         
         Args:
             source_file: The filename to delete (e.g., 'ml_notes.pdf')
@@ -166,22 +727,109 @@ class VectorStore:
             True if successful, False if file not found or error occurred
         """
         try:
-            # Get all chunk IDs that belong to this source file
-            results = self.collection.get(
-                where={"source_file": source_file}
-            )
-            
-            if results['ids']:
-                # Delete all those chunks
-                self.collection.delete(ids=results['ids'])
-                return True
-            
-            # No chunks found with that source file
-            return False
+            with self.document_lock(source_file), self._writing(), self._swap_lock.write():
+                # Get all chunk IDs that belong to this source file
+                results = self.index.get(
+                    where={"source_file": source_file}
+                )
+                
+                if results['ids']:
+                    # Delete all those chunks
+                    self.index.delete(ids=results['ids'])
+                    self.lexical_index.delete_source(source_file)
+                    self.change_log.record(results['ids'])
+                    self.catalog.remove_document(source_file)
+                    self._bump_corpus_version()
+                    return True
+                
+                # No chunks found with that source file
+                return False
         except Exception as e:
-            print(f"Error deleting document {source_file}: {e}")
+            logger.error("Error deleting document %s: %s", source_file, e)
             return False
         
+    def delete_chunks(self, ids: List[str]) -> None:
+        """
+        Delete chunks by ID (e.g. to roll back a partially indexed document).
+        
+        Args:
+            ids: Chunk IDs to delete
+        """
+        if ids:
+            with self._writing():
+                deleted = self.index.get(ids=ids, include=['documents', 'metadatas'])
+                self.index.delete(ids=ids)
+                self.lexical_index.delete_ids(ids)
+                self.change_log.record(ids)
+                self.catalog.remove_chunks([
+                    {'content': content, 'metadata': metadata}
+                    for content, metadata in zip(deleted['documents'], deleted['metadatas'])
+                ])
+                self._bump_corpus_version()
+
+    def get_document_chunks(self, source_file: str) -> List[Dict]:
+        """
+        Get the indexed chunks of one file, in chunk order.
+        
+        Args:
+            source_file: The filename (e.g., 'ml_notes.pdf')
+        
+        Returns:
+            List of dicts with id, chunk_hash and metadata
+        """
+        results = self.index.get(where={"source_file": source_file}, include=['documents', 'metadatas'])
+        chunks = [
+            {
+                'id': chunk_id,
+                # Chunks indexed before chunk_hash metadata existed are hashed from their text
+                'chunk_hash': metadata.get('chunk_hash') or chunk_hash(content),
+                'metadata': metadata
+            }
+            for chunk_id, content, metadata in zip(results['ids'], results['documents'], results['metadatas'])
+        ]
+        chunks.sort(key=lambda chunk: chunk['metadata'].get('chunk_index', 0))
+        return chunks
+
+    def replace_document(self, source_file: str, new_documents: List[Dict], kept_ids: List[str],
+                         kept_metadatas: List[Dict], removed_ids: List[str],
+                         embedded_with: Optional[EmbeddingSpec] = None) -> None:
+        """
+        Swap in a new version of an indexed document in one step: add its new
+        chunks, update the metadata (position, totals) of chunks it kept and
+        delete the chunks it dropped. Searches wait for the swap, so they see
+        either the old version or the new one, never a mix.
+        
+        Args:
+            source_file: The filename being replaced
+            new_documents: Records of chunks that weren't indexed before (with embeddings)
+            kept_ids: IDs of unchanged chunks
+            kept_metadatas: New metadata of each unchanged chunk
+            removed_ids: IDs of chunks the new version no longer has
+            embedded_with: Embedding model of new_documents (see add_documents)
+        """
+        with self._writing(), self._swap_lock.write():
+            if new_documents:
+                self.add_documents(new_documents, embedded_with=embedded_with)
+            self.update_metadatas(kept_ids, kept_metadatas)
+            self.delete_chunks(removed_ids)
+        logger.info("Replaced %s: %d new, %d unchanged, %d removed chunks",
+                    source_file, len(new_documents), len(kept_ids), len(removed_ids))
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]) -> None:
+        """
+        Replace the metadata of existing chunks.
+        
+        Args:
+            ids: Chunk IDs
+            metadatas: New metadata for each chunk
+        """
+        if ids:
+            with self._writing():
+                self.index.update(ids=ids, metadatas=metadatas)
+                self.lexical_index.update_metadatas(ids, metadatas)
+                self.change_log.record(ids)
+                self._bump_corpus_version()  # cached answers cite chunk positions that may have moved
+
     def clear(self) -> bool:
         """
         Delete all documents and their embeddings from the vector store
@@ -190,13 +838,13 @@ class VectorStore:
             True if successful
         """
         try:
-            self.client.delete_collection(name=self.collection_name)
-            
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
+            with self._writing():
+                self.index.clear()
+                self.lexical_index.clear()
+                self.change_log.record_clear()
+                self.catalog.clear()
+                self._bump_corpus_version()
             return True
         except Exception as e:
-            print(f"Error clearing vector store: {e}")
+            logger.error("Error clearing vector store: %s", e)
             return False
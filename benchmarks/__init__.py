@@ -0,0 +1,4 @@
+"""
+DocuMind Benchmarks
+Offline performance measurements for the ingestion and retrieval hot paths.
+"""
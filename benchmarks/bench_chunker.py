@@ -0,0 +1,94 @@
+"""
+Chunker microbenchmark
+Compares chunk_text / chunk_texts throughput (MB/s) against the previous
+implementation, which looked up the encoder on every call and decoded every
+window (overlap included) back from tokens.
+
+Usage:
+    python -m benchmarks.bench_chunker [--docs 200] [--doc-kb 64] [--repeat 3]
+"""
+
+import os
+import time
+import argparse
+import statistics
+from typing import List
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # Settings requires a key; nothing is called
+
+import tiktoken
+from backend.config import settings
+from backend.ingestion import chunk_text, chunk_texts, get_encoding
+from benchmarks.corpus import make_corpus
+
+
+def reference_chunk_text(content: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+    """The previous chunk_text: encoder lookup per call, decode per window."""
+    if chunk_size == None:
+        chunk_size = settings.CHUNK_SIZE
+    if overlap == None:
+        overlap = settings.CHUNK_OVERLAP
+
+    try:
+        encoding = tiktoken.encoding_for_model(settings.LLM_MODEL)
+    except KeyError:
+        encoding = get_encoding()  # model unknown to this tiktoken: same fallback as the new code
+    tokens = encoding.encode(content)
+
+    if len(tokens) == 0:
+        return []
+    if len(tokens) <= chunk_size:
+        return [content]
+
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        end = min(start + chunk_size, len(tokens))
+        chunks.append(encoding.decode(tokens[start:end]))
+        start = start + chunk_size - overlap
+        if end >= len(tokens):
+            break
+    return chunks
+
+
+def best_of(fn, repeat: int) -> float:
+    """Fastest wall time of repeat runs."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker throughput benchmark")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--doc-kb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.docs, args.doc_kb)
+    megabytes = sum(len(doc.encode('utf-8')) for doc in corpus) / (1024 * 1024)
+    chunk_text("warm up")  # load the encoder and its byte-length table once, outside the timings
+
+    # Same chunks as before (the new chunker slices the original text instead of decoding)
+    new_chunks = [chunk_text(doc) for doc in corpus]
+    assert new_chunks == [reference_chunk_text(doc) for doc in corpus], "chunker output changed"
+    assert [chunks for chunks, _ in chunk_texts(corpus)] == new_chunks, "batch chunker output changed"
+
+    timings = {
+        "reference chunk_text": best_of(lambda: [reference_chunk_text(doc) for doc in corpus], args.repeat),
+        "chunk_text": best_of(lambda: [chunk_text(doc) for doc in corpus], args.repeat),
+        "chunk_texts (encode_batch)": best_of(lambda: chunk_texts(corpus), args.repeat),
+    }
+
+    print(f"Corpus: {args.docs} docs, {megabytes:.1f} MB, "
+          f"{statistics.mean(len(c) for c in new_chunks):.0f} chunks/doc")
+    baseline = timings["reference chunk_text"]
+    for name, seconds in timings.items():
+        print(f"  {name:28s} {megabytes / seconds:8.2f} MB/s  ({baseline / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Quantized index benchmark
+Compares NumpyIndex search on float32 vectors with the int8 first pass plus
+float32 rerank: vector memory, recall@k against exact float32 search, and
+query latency. Embeddings are synthetic topic centers plus noise, which is
+closer to real embedding geometry than independent random vectors.
+
+Usage:
+    python -m benchmarks.bench_quantization [--vectors 100000] [--dimension 1536] [--top-k 10]
+                                            [--queries 200] [--rerank-factor 4] [--ivf]
+"""
+
+import os
+import json
+import time
+import argparse
+import statistics
+import tempfile
+from typing import List, Tuple
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # Settings requires a key; nothing is called
+
+import numpy as np
+from backend.vector_index import NumpyIndex
+
+
+# Vectors generated and added per call (bounds memory at large sizes)
+ADD_BATCH = 20_000
+
+
+def make_embeddings(rng: np.random.Generator, centers: np.ndarray, count: int, noise: float) -> np.ndarray:
+    """count vectors scattered around randomly chosen topic centers."""
+    topics = centers[rng.integers(0, len(centers), count)]
+    return (topics + rng.normal(scale=noise, size=topics.shape)).astype(np.float32)
+
+
+def search(index: NumpyIndex, queries: np.ndarray, top_k: int) -> Tuple[List[List[str]], List[float]]:
+    """IDs per query and per-query latencies (ms), one query at a time like /query."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        ids = index.query(query_embeddings=[query], n_results=top_k, include=[])['ids'][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids)
+    return results, latencies
+
+
+def recall(results: List[List[str]], truth: List[List[str]], top_k: int) -> float:
+    """Mean fraction of the exact top-k found."""
+    return statistics.mean(len(set(found) & set(expected)) / top_k for found, expected in zip(results, truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 first pass + float rerank vs float32 search")
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=1000, help="Topic centers the vectors cluster around")
+    parser.add_argument("--noise", type=float, default=0.6, help="Spread around each topic (per dimension)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--ivf", action="store_true", help="Also compare both with an IVF quantizer trained")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(args.topics, args.dimension)).astype(np.float32)
+    queries = make_embeddings(rng, centers, args.queries, args.noise)
+
+    with tempfile.TemporaryDirectory(prefix="documind-quant-") as workdir:
+        # Two views of the same files: float32 search and int8 first pass with rerank
+        exact = NumpyIndex(workdir, ivf_min_vectors=0, quantization="none")
+        quantized = NumpyIndex(workdir, ivf_min_vectors=0, quantization="int8", rerank_factor=args.rerank_factor)
+
+        print(f"Indexing {args.vectors:,} x {args.dimension} vectors...")
+        for start in range(0, args.vectors, ADD_BATCH):
+            count = min(ADD_BATCH, args.vectors - start)
+            quantized.add(
+                ids=[f"v{i}" for i in range(start, start + count)],
+                embeddings=make_embeddings(rng, centers, count, args.noise),
+                documents=[""] * count,
+                metadatas=[{}] * count
+            )
+
+        truth, _ = search(exact, queries, args.top_k)  # exact float32 search is the reference
+        runs = {}
+        modes = ["flat"] + (["ivf"] if args.ivf else [])
+        for mode in modes:
+            if mode == "ivf":
+                quantized.train_ivf()
+            for name, index in (("float32", exact), ("int8+rerank", quantized)):
+                search(index, queries[:5], args.top_k)  # warm the page cache
+                results, latencies = search(index, queries, args.top_k)
+                latencies.sort()
+                runs[f"{name}/{mode}"] = {
+                    'recall_at_k': recall(results, truth, args.top_k),
+                    'p50_ms': statistics.median(latencies),
+                    'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                }
+
+        memory = quantized.memory_footprint()
+
+    saved = memory['float32_bytes'] - memory['int8_bytes']
+    print(f"\nVector memory: float32 {memory['float32_bytes'] / 2**20:,.1f} MiB, "
+          f"int8 codes + scales {memory['int8_bytes'] / 2**20:,.1f} MiB "
+          f"(saves {saved / 2**20:,.1f} MiB, {saved / memory['float32_bytes']:.0%})")
+    print(f"Rerank reads {args.top_k * args.rerank_factor} float32 rows per query\n")
+    print(f"{'search':22s} {'recall@' + str(args.top_k):>10s} {'p50 ms':>9s} {'p95 ms':>9s}")
+    for name, run in runs.items():
+        print(f"{name:22s} {run['recall_at_k']:10.3f} {run['p50_ms']:9.2f} {run['p95_ms']:9.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'memory': memory, 'searches': runs}, f, indent=2)
+        print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Synthetic benchmark corpora
+Deterministic markdown/plain text and minimal PDFs of any size, so runs
+are reproducible without shipping real documents.
+"""
+
+import random
+from pathlib import Path
+from typing import List
+
+
+WORDS = (
+    "attention transformer sequence token embedding layer residual query key value head "
+    "matrix softmax gradient training dataset encoder decoder vector retrieval context "
+    "Vaswani 2017 model parameters bias weights normalization dropout positional"
+).split()
+
+
+def make_sentence(rng: random.Random) -> str:
+    """One sentence of 8-20 vocabulary words."""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "."
+
+
+def make_corpus(docs: int, doc_kb: int, seed: int = 0) -> List[str]:
+    """Deterministic plain-text documents of roughly doc_kb kilobytes each."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(docs):
+        parts = []
+        size = 0
+        while size < doc_kb * 1024:
+            sentence = make_sentence(rng) + "\n"
+            parts.append(sentence)
+            size += len(sentence)
+        corpus.append("".join(parts))
+    return corpus
+
+
+def make_markdown(sections: int, seed: int = 0) -> str:
+    """A markdown document with headings, paragraphs and bullet lists."""
+    rng = random.Random(seed)
+    parts = []
+    for section in range(sections):
+        parts.append(f"## Section {section + 1}: {rng.choice(WORDS).title()}\n")
+        parts.append(" ".join(make_sentence(rng) for _ in range(rng.randint(3, 6))) + "\n")
+        parts.extend(f"- {make_sentence(rng)}\n" for _ in range(rng.randint(2, 4)))
+        parts.append("\n")
+    return "".join(parts)
+
+
+def make_pdf(path: Path, pages: int, seed: int = 0) -> Path:
+    """
+    Write a minimal text PDF (Helvetica, one content stream per page).
+
+    Args:
+        path: Output file
+        pages: Number of pages, each with ~40 lines of text
+        seed: Seed for the page text
+
+    Returns:
+        The path written
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        page_id = 4 + 2 * page
+        kids.append(f"{page_id} 0 R")
+        lines = [make_sentence(rng)[:90] for _ in range(40)]
+        text_ops = " ".join(f"({line}) Tj T*" for line in lines)
+        content = f"BT /F1 10 Tf 20 780 Td 12 TL {text_ops} ET".encode('latin-1')
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+
+    path = Path(path)
+    path.write_bytes(bytes(out))
+    return path
@@ -0,0 +1,92 @@
+"""
+Deterministic fake OpenAI provider for benchmarks
+Embeddings are pseudo-random unit vectors seeded by the input text and
+chat completions echo a fixed answer, with optional simulated latency,
+so runs measure DocuMind's own overhead rather than the network.
+"""
+
+import time
+import types
+import hashlib
+import threading
+import numpy as np
+from typing import List
+
+
+class FakeEmbeddings:
+    """Stands in for client.embeddings"""
+
+    def __init__(self, dimension: int, latency: float = 0.0):
+        """
+        Args:
+            dimension: Length of the returned vectors
+            latency: Seconds each request sleeps (simulated round trip)
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.requests = 0
+        self.inputs = 0
+        self._lock = threading.Lock()
+
+    def create(self, model: str = None, input=None, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        with self._lock:
+            self.requests += 1
+            self.inputs += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        vectors = fake_vectors(texts, self.dimension)
+        return types.SimpleNamespace(
+            data=[types.SimpleNamespace(embedding=vector, index=i) for i, vector in enumerate(vectors)]
+        )
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions"""
+
+    ANSWER = "This is a benchmark answer generated without calling a model."
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def create(self, model: str = None, messages=None, stream: bool = False, **kwargs):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if stream:
+            return iter([
+                types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=word + " "))])
+                for word in self.ANSWER.split()
+            ])
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=self.ANSWER))]
+        )
+
+
+def fake_vectors(texts: List[str], dimension: int) -> List[List[float]]:
+    """Unit vectors seeded by each text's hash (same text, same vector)."""
+    vectors = np.empty((len(texts), dimension), dtype=np.float32)
+    for i, text in enumerate(texts):
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        vectors[i] = np.random.default_rng(seed).standard_normal(dimension, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.tolist()
+
+
+def install(dimension: int, embed_latency: float = 0.0, llm_latency: float = 0.0) -> FakeEmbeddings:
+    """
+    Point the shared OpenAI client (and ingestion's embedding client) at the fakes.
+
+    Returns:
+        The FakeEmbeddings instance, for request counters
+    """
+    from backend.clients import get_openai_client
+    import backend.ingestion as ingestion
+
+    embeddings = FakeEmbeddings(dimension, embed_latency)
+    chat = types.SimpleNamespace(completions=FakeCompletions(llm_latency))
+    for client in (get_openai_client(), ingestion.embedding_client):
+        client.embeddings = embeddings
+        client.chat = chat
+    return embeddings
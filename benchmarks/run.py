@@ -0,0 +1,300 @@
+"""
+DocuMind Benchmark Runner
+Times the ingestion and retrieval hot paths offline against synthetic
+corpora and a fake OpenAI provider, writes the results as JSON and
+compares them with a stored baseline to flag regressions.
+
+Usage:
+    python -m benchmarks.run [--sizes 1k,100k,1m] [--output results.json]
+                             [--baseline benchmarks/baseline.json] [--save-baseline]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+# Settings are read on import: configure the run before backend is imported
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")  # nothing is sent to OpenAI
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")  # time batching, not cache hits
+
+from backend.config import settings
+from backend.ingestion import extract_pdf_text, chunk_text, generate_embeddings, build_documents
+from backend.vector_store import VectorStore
+from benchmarks import fake_openai
+from benchmarks.corpus import make_markdown, make_pdf, make_sentence
+
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# Chunks embedded and indexed per slice (bounds memory at large sizes)
+SLICE_SIZE = 10_000
+
+# Chunks per VectorStore.add_documents call (under Chroma's max batch size)
+ADD_BATCH = 5_000
+
+# Markdown sections per synthetic document (~30 chunks each at the default chunk size)
+SECTIONS_PER_DOC = 200
+
+
+def parse_size(text: str) -> int:
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500."""
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def format_size(size: int) -> str:
+    """Inverse of parse_size for result keys."""
+    if size % 1_000_000 == 0:
+        return f"{size // 1_000_000}m"
+    if size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+
+def timed(fn, repeat: int = 1):
+    """Run fn `repeat` times and return (fastest seconds, last result)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_extract_pdf(workdir: Path, pages: int, repeat: int) -> Dict:
+    """Time extract_pdf_text on a synthetic PDF (best of `repeat`)."""
+    pdf_path = make_pdf(workdir / "bench.pdf", pages)
+    seconds, text = timed(lambda: extract_pdf_text(str(pdf_path)), repeat)
+    return {
+        'seconds': seconds,
+        'pages': pages,
+        'pages_per_second': pages / seconds,
+        'characters': len(text)
+    }
+
+
+def bench_chunk_text(size: int, repeat: int) -> Tuple[Dict, List[str]]:
+    """
+    Time chunk_text on enough synthetic markdown to produce `size` chunks (best of `repeat`).
+
+    Returns:
+        (result, exactly `size` unique chunk texts for the later stages)
+    """
+    sample = chunk_text(make_markdown(SECTIONS_PER_DOC, seed=0))
+    docs_needed = max(1, math.ceil(size / len(sample) * 1.05))
+    documents = [make_markdown(SECTIONS_PER_DOC, seed=seed) for seed in range(docs_needed)]
+    megabytes = sum(len(doc.encode('utf-8')) for doc in documents) / (1024 * 1024)
+
+    def run():
+        chunks = []
+        for doc in documents:
+            chunks.extend(chunk_text(doc))
+        return chunks
+
+    seconds, chunks = timed(run, repeat)
+    result = {
+        'seconds': seconds,
+        'documents': len(documents),
+        'chunks': len(chunks),
+        'megabytes': round(megabytes, 2),
+        'megabytes_per_second': megabytes / seconds,
+        'chunks_per_second': len(chunks) / seconds
+    }
+
+    # Later stages need exactly `size` distinct texts (generate_embeddings dedupes repeats)
+    chunks = chunks[:size]
+    for i in range(len(chunks), size):
+        chunks.append(f"{chunks[i % len(chunks)]} [{i}]")
+    return result, chunks
+
+
+def bench_embed_and_add(chunks: List[str], vector_store: VectorStore, embeddings_api) -> Tuple[Dict, Dict]:
+    """
+    Time generate_embeddings and VectorStore.add_documents over the chunks, slice by slice.
+
+    Returns:
+        (generate_embeddings result, add_documents result)
+    """
+    embed_seconds = 0.0
+    add_seconds = 0.0
+    requests_before = embeddings_api.requests
+
+    for start in range(0, len(chunks), SLICE_SIZE):
+        batch = chunks[start:start + SLICE_SIZE]
+        seconds, embeddings = timed(lambda: generate_embeddings(batch))
+        embed_seconds += seconds
+
+        documents = build_documents("bench.md", batch, embeddings, start_index=start)
+        for i in range(0, len(documents), ADD_BATCH):
+            seconds, _ = timed(lambda: vector_store.add_documents(documents[i:i + ADD_BATCH]))
+            add_seconds += seconds
+
+    embed_result = {
+        'seconds': embed_seconds,
+        'chunks_per_second': len(chunks) / embed_seconds,
+        'api_requests': embeddings_api.requests - requests_before
+    }
+    add_result = {
+        'seconds': add_seconds,
+        'chunks_per_second': len(chunks) / add_seconds
+    }
+    return embed_result, add_result
+
+
+def bench_query(vector_store: VectorStore, queries: int, top_k: int) -> Dict:
+    """Time VectorStore.query for distinct synthetic questions."""
+    rng = random.Random(42)
+    questions = [f"{make_sentence(rng)} ({i})" for i in range(queries)]
+
+    latencies = []
+    for question in questions:
+        seconds, _ = timed(lambda: vector_store.query(question, n_results=top_k))
+        latencies.append(seconds * 1000)
+
+    latencies.sort()
+    return {
+        'seconds': sum(latencies) / 1000,
+        'queries': queries,
+        'retrieval_mode': settings.RETRIEVAL_MODE,
+        'vector_index_backend': settings.VECTOR_INDEX_BACKEND,
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'queries_per_second': queries / (sum(latencies) / 1000)
+    }
+
+
+def run_benchmarks(sizes: List[int], pdf_pages: int, queries: int, top_k: int,
+                   dimension: int, embed_latency: float, repeat: int = 3) -> Dict:
+    """
+    Run every benchmark.
+
+    Returns:
+        Dict with 'meta' (environment and parameters) and 'results' keyed by benchmark@size
+    """
+    embeddings_api = fake_openai.install(dimension, embed_latency)
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="documind-bench-") as workdir:
+        workdir = Path(workdir)
+        print(f"\n⏱️  extract_pdf_text ({pdf_pages} pages)")
+        results['extract_pdf_text'] = bench_extract_pdf(workdir, pdf_pages, repeat)
+
+        for size in sizes:
+            label = format_size(size)
+            print(f"\n⏱️  {label} chunks")
+
+            results[f'chunk_text@{label}'], chunks = bench_chunk_text(size, repeat)
+
+            vector_store = VectorStore(persist_directory=str(workdir / f"chroma_{label}"),
+                                       collection_name=f"bench_{label}")
+            embed_result, add_result = bench_embed_and_add(chunks, vector_store, embeddings_api)
+            results[f'generate_embeddings@{label}'] = embed_result
+            results[f'add_documents@{label}'] = add_result
+            del chunks
+
+            results[f'query@{label}'] = bench_query(vector_store, queries, top_k)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'sizes': sizes,
+            'pdf_pages': pdf_pages,
+            'queries': queries,
+            'top_k': top_k,
+            'dimension': dimension,
+            'embed_latency': embed_latency,
+            'repeat': repeat,
+            'chunk_size': settings.CHUNK_SIZE,
+            'chunk_overlap': settings.CHUNK_OVERLAP,
+            'embedding_batch_max_tokens': settings.EMBEDDING_BATCH_MAX_TOKENS,
+            'embedding_concurrency': settings.EMBEDDING_CONCURRENCY,
+            'retrieval_mode': settings.RETRIEVAL_MODE,
+            'vector_index_backend': settings.VECTOR_INDEX_BACKEND
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Print each benchmark against the baseline.
+
+    Returns:
+        Names of benchmarks that got slower by more than the tolerance
+    """
+    regressions = []
+    print(f"\n{'benchmark':32s} {'baseline s':>12s} {'current s':>12s} {'change':>8s}")
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            print(f"{name:32s} {'-':>12s} {result['seconds']:12.4f} {'new':>8s}")
+            continue
+
+        change = result['seconds'] / previous['seconds'] - 1 if previous['seconds'] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  ❌ REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            flag = "  ✅ faster"
+        print(f"{name:32s} {previous['seconds']:12.4f} {result['seconds']:12.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline DocuMind benchmarks")
+    parser.add_argument("--sizes", default="1k", help="Corpus sizes in chunks, e.g. 1k,100k,1m")
+    parser.add_argument("--pdf-pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--dimension", type=int, default=settings.EMBEDDING_DIMENSION,
+                        help="Fake embedding dimension (lower it for 1m-chunk runs to fit in memory)")
+    parser.add_argument("--embed-latency", type=float, default=0.0,
+                        help="Simulated seconds per embeddings request")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the CPU-only stages (fastest is kept)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    results = run_benchmarks(sizes, args.pdf_pages, args.queries, args.top_k, args.dimension, args.embed_latency, args.repeat)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    else:
+        print(f"\nNo baseline at {baseline_path} (run with --save-baseline to create one)")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline saved to: {baseline_path}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+DocuMind Load Test
+Drives N concurrent clients that mix uploads and queries against a running
+DocuMind (or one it starts against the local mock OpenAI server) and
+reports throughput and p50/p95/p99 latency per endpoint, per concurrency level.
+
+Usage:
+    # start mock + app locally, step through concurrency levels
+    python evaluation/load_test.py --start-servers --concurrency 1,8,32 --duration 30
+
+    # against an already running app
+    python evaluation/load_test.py --base-url http://127.0.0.1:8000 --concurrency 16
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import statistics
+import httpx
+from pathlib import Path
+from typing import List, Dict, Tuple
+
+TEST_QUESTIONS_FILE = Path(__file__).parent / "test_questions.json"
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+WORDS = (
+    "attention transformer sequence token embedding layer residual query key value head "
+    "matrix softmax gradient training dataset encoder decoder vector retrieval context"
+).split()
+
+
+def load_questions() -> List[str]:
+    """Questions from the evaluation set."""
+    with open(TEST_QUESTIONS_FILE, 'r', encoding='utf-8') as f:
+        return [case['question'] for case in json.load(f)['test_cases']]
+
+
+def make_document(rng: random.Random, words: int = 1500) -> bytes:
+    """A small synthetic text document."""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).encode('utf-8')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latency samples and errors per endpoint"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        if ok:
+            self.samples.setdefault(endpoint, []).append(seconds)
+        else:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            self.samples.setdefault(endpoint, [])
+
+    def summary(self, elapsed: float) -> Dict:
+        """Per-endpoint count, errors, throughput and latency percentiles (ms)."""
+        report = {}
+        for endpoint, values in sorted(self.samples.items()):
+            values = sorted(values)
+            report[endpoint] = {
+                'count': len(values),
+                'errors': self.errors.get(endpoint, 0),
+                'throughput_rps': round(len(values) / elapsed, 2),
+                'mean_ms': round(statistics.mean(values) * 1000, 1) if values else None,
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p95_ms': round(percentile(values, 95) * 1000, 1),
+                'p99_ms': round(percentile(values, 99) * 1000, 1)
+            }
+        return report
+
+
+async def wait_for_job(client: httpx.AsyncClient, status_url: str, started: float, recorder: Recorder,
+                       timeout: float = 600) -> None:
+    """Poll a job until it finishes and record upload-to-indexed time."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            job = (await client.get(status_url)).json()
+        except httpx.HTTPError:
+            await asyncio.sleep(0.5)
+            continue
+        if job['status'] in ('completed', 'failed'):
+            recorder.record("upload (indexed)", time.perf_counter() - started, job['status'] == 'completed')
+            return
+        await asyncio.sleep(0.25)
+    recorder.record("upload (indexed)", timeout, False)
+
+
+async def do_upload(client: httpx.AsyncClient, rng: random.Random, recorder: Recorder, jobs: List[asyncio.Task]) -> None:
+    """POST /upload one synthetic file; its indexing is tracked in the background."""
+    files = [("files", (f"load_{rng.getrandbits(48):012x}.txt", make_document(rng), "text/plain"))]
+    start = time.perf_counter()
+    try:
+        response = await client.post("/upload", files=files)
+        ok = response.status_code == 202
+    except httpx.HTTPError:
+        ok = False
+    recorder.record("POST /upload", time.perf_counter() - start, ok)
+    if ok:
+        jobs.append(asyncio.create_task(wait_for_job(client, response.json()['status_url'], start, recorder)))
+
+
+async def do_query(client: httpx.AsyncClient, question: str, top_k: int, recorder: Recorder) -> None:
+    """POST /query."""
+    start = time.perf_counter()
+    try:
+        response = await client.post("/query", json={"query": question, "top_k": top_k})
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    recorder.record("POST /query", time.perf_counter() - start, ok)
+
+
+async def do_stream(client: httpx.AsyncClient, question: str, top_k: int, recorder: Recorder) -> None:
+    """POST /query/stream, recording time to first answer text and to the end of the stream."""
+    start = time.perf_counter()
+    first_delta = None
+    ok = False
+    try:
+        async with client.stream("POST", "/query/stream", json={"query": question, "top_k": top_k}) as response:
+            ok = response.status_code == 200
+            async for line in response.aiter_lines():
+                if line == "event: delta" and first_delta is None:
+                    first_delta = time.perf_counter() - start
+                elif line == "event: error":
+                    ok = False
+    except httpx.HTTPError:
+        ok = False
+    recorder.record("POST /query/stream", time.perf_counter() - start, ok)
+    if ok and first_delta is not None:
+        recorder.record("POST /query/stream (first delta)", first_delta, True)
+
+
+async def client_loop(client: httpx.AsyncClient, worker_id: int, deadline: float, args, questions: List[str],
+                      recorder: Recorder, jobs: List[asyncio.Task]) -> None:
+    """One simulated user: issue requests back to back until the deadline."""
+    rng = random.Random(args.seed * 1000 + worker_id)
+    sent = 0
+    while time.perf_counter() < deadline:
+        question = rng.choice(questions)
+        if not args.allow_cache_hits:
+            question = f"{question} (client {worker_id} request {sent})"  # defeat the answer cache
+        sent += 1
+
+        roll = rng.random()
+        if roll < args.upload_ratio:
+            await do_upload(client, rng, recorder, jobs)
+        elif roll < args.upload_ratio + args.stream_ratio:
+            await do_stream(client, question, args.top_k, recorder)
+        else:
+            await do_query(client, question, args.top_k, recorder)
+
+
+async def run_level(base_url: str, concurrency: int, args, questions: List[str]) -> Dict:
+    """Run one concurrency level for args.duration seconds."""
+    recorder = Recorder()
+    jobs: List[asyncio.Task] = []
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            client_loop(client, worker_id, deadline, args, questions, recorder, jobs)
+            for worker_id in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        if jobs:
+            await asyncio.gather(*jobs)  # indexing finishes outside the measured window
+
+    endpoints = recorder.summary(elapsed)
+    total = sum(e['count'] for name, e in endpoints.items() if not name.endswith(")"))
+    return {
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 2),
+        'total_requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'endpoints': endpoints
+    }
+
+
+async def seed_corpus(base_url: str, documents: int, seed: int) -> None:
+    """Upload documents and wait until they are indexed, so queries retrieve something."""
+    if documents <= 0:
+        return
+    rng = random.Random(seed)
+    recorder = Recorder()
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        files = [("files", (f"seed_{i}.txt", make_document(rng, 5000), "text/plain")) for i in range(documents)]
+        response = await client.post("/upload", files=files)
+        response.raise_for_status()
+        await wait_for_job(client, response.json()['status_url'], time.perf_counter(), recorder)
+    print(f"📤 Seeded {documents} document(s)")
+
+
+def print_level(level: Dict) -> None:
+    """Print one concurrency level as a table."""
+    print(f"\n👥 Concurrency {level['concurrency']}: {level['total_requests']} requests "
+          f"in {level['elapsed_seconds']}s ({level['throughput_rps']} req/s)")
+    print(f"   {'endpoint':34s} {'count':>6s} {'err':>4s} {'req/s':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for endpoint, stats in level['endpoints'].items():
+        print(f"   {endpoint:34s} {stats['count']:6d} {stats['errors']:4d} {stats['throughput_rps']:7.2f} "
+              f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f}")
+
+
+def free_port() -> int:
+    """An unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 120) -> None:
+    """Poll url until it answers (or fail if the process exits)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before becoming ready")
+        try:
+            httpx.get(url, timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def start_servers(args, workdir: Path) -> Tuple[str, List[subprocess.Popen]]:
+    """
+    Start the mock OpenAI server and DocuMind (uvicorn) with state in workdir.
+
+    Returns:
+        (DocuMind base URL, processes to terminate afterwards)
+    """
+    mock_port, app_port = free_port(), free_port()
+    mock = subprocess.Popen([
+        sys.executable, str(Path(__file__).parent / "mock_openai.py"),
+        "--port", str(mock_port),
+        "--embed-latency-ms", str(args.mock_embed_latency_ms),
+        "--llm-latency-ms", str(args.mock_llm_latency_ms),
+        "--token-interval-ms", str(args.mock_token_interval_ms),
+        "--error-rate", str(args.mock_error_rate)
+    ])
+    wait_until_up(f"http://127.0.0.1:{mock_port}/stats", mock)
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-mock"),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{mock_port}/v1",
+        "CHROMA_PERSIST_DIR": str(workdir / "chroma"),
+        "JOBS_DB_PATH": str(workdir / "jobs" / "jobs.db"),
+        "EMBEDDING_CACHE_PATH": str(workdir / "cache" / "embeddings.db"),
+        "SYNC_MANIFEST_PATH": str(workdir / "sync" / "manifest.db")
+    }
+    app = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--host", "127.0.0.1", "--port", str(app_port),
+        "--workers", str(args.app_workers), "--log-level", "warning"
+    ], cwd=REPO_ROOT, env=env)
+    base_url = f"http://127.0.0.1:{app_port}"
+    wait_until_up(f"{base_url}/health", app)
+    print(f"🚀 Mock OpenAI on :{mock_port}, DocuMind on :{app_port} ({args.app_workers} worker(s))")
+    return base_url, [app, mock]
+
+
+async def run_load_test(base_url: str, args) -> Dict:
+    """Seed the corpus, then run every concurrency level."""
+    questions = load_questions()
+    await seed_corpus(base_url, args.seed_docs, args.seed)
+
+    levels = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        level = await run_level(base_url, concurrency, args, questions)
+        print_level(level)
+        levels.append(level)
+    return {'base_url': base_url, 'parameters': vars(args), 'levels': levels}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for DocuMind")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-servers", action="store_true",
+                        help="Start the mock OpenAI server and DocuMind locally (ignores --base-url)")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn workers when starting DocuMind")
+    parser.add_argument("--mock-embed-latency-ms", type=float, default=50)
+    parser.add_argument("--mock-llm-latency-ms", type=float, default=800)
+    parser.add_argument("--mock-token-interval-ms", type=float, default=20)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrent client counts")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per concurrency level")
+    parser.add_argument("--upload-ratio", type=float, default=0.1, help="Fraction of requests that are uploads")
+    parser.add_argument("--stream-ratio", type=float, default=0.0, help="Fraction of requests to /query/stream")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed-docs", type=int, default=5, help="Documents indexed before the run")
+    parser.add_argument("--allow-cache-hits", action="store_true", help="Repeat questions verbatim (measures the answer cache)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=str(Path(__file__).parent / "load_test_results.json"))
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory(prefix="documind-load-") as workdir:
+        try:
+            base_url = args.base_url
+            if args.start_servers:
+                base_url, processes = start_servers(args, Path(workdir))
+            results = asyncio.run(run_load_test(base_url, args))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=30)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
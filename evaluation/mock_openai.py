@@ -0,0 +1,167 @@
+"""
+DocuMind Mock OpenAI Server
+Local OpenAI-compatible /v1/embeddings and /v1/chat/completions with
+configurable injected latency, so load tests measure DocuMind itself
+without spending API credits.
+
+Usage:
+    python evaluation/mock_openai.py --port 9000 --embed-latency-ms 50 --llm-latency-ms 800
+    # then run DocuMind with OPENAI_BASE_URL=http://127.0.0.1:9000/v1
+"""
+
+import time
+import json
+import base64
+import random
+import asyncio
+import hashlib
+import argparse
+import numpy as np
+import uvicorn
+from typing import Dict
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+ANSWER = ("This is a mock answer from the local load-test server. It cites the provided context "
+          "and exists only to exercise DocuMind's generation path.")
+
+app = FastAPI(title="Mock OpenAI")
+
+# Injected behaviour (set from the command line)
+config = {
+    'embed_latency': 0.05,      # seconds per embeddings request
+    'llm_latency': 0.8,         # seconds to first token
+    'token_interval': 0.02,     # seconds between streamed tokens
+    'error_rate': 0.0,          # fraction of requests answered with 429
+    'dimension': 1536
+}
+
+# Requests served, per endpoint
+counters = {'embeddings': 0, 'embedding_inputs': 0, 'chat': 0, 'rate_limited': 0}
+
+
+def embed(text: str, dimension: int) -> np.ndarray:
+    """Deterministic unit vector seeded by the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def rate_limited() -> JSONResponse:
+    """A 429 like OpenAI's, with a retry hint."""
+    counters['rate_limited'] += 1
+    return JSONResponse(
+        status_code=429,
+        content={"error": {"message": "Mock rate limit", "type": "requests", "code": "rate_limit_exceeded"}},
+        headers={"retry-after-ms": "200"}
+    )
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    """Embeddings endpoint (float lists or base64 float32, like the real API)."""
+    body = await request.json()
+    if random.random() < config['error_rate']:
+        return rate_limited()
+
+    inputs = body['input']
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    counters['embeddings'] += 1
+    counters['embedding_inputs'] += len(inputs)
+
+    await asyncio.sleep(config['embed_latency'])
+
+    dimension = body.get('dimensions') or config['dimension']
+    data = []
+    for index, text in enumerate(inputs):
+        vector = embed(str(text), dimension)
+        if body.get('encoding_format') == 'base64':
+            embedding = base64.b64encode(vector.tobytes()).decode('ascii')
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+    tokens = sum(len(str(text).split()) for text in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get('model', 'mock-embedding'),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Chat completions endpoint, streamed as SSE when stream=true."""
+    body = await request.json()
+    if random.random() < config['error_rate']:
+        return rate_limited()
+    counters['chat'] += 1
+
+    model = body.get('model', 'mock-llm')
+    completion_id = f"chatcmpl-mock{counters['chat']}"
+    created = int(time.time())
+    words = ANSWER.split(" ")
+
+    if body.get('stream'):
+        async def event_stream():
+            await asyncio.sleep(config['llm_latency'])
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(config['token_interval'])
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    # Non-streaming: the whole answer after first-token latency plus generation time
+    await asyncio.sleep(config['llm_latency'] + config['token_interval'] * len(words))
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)}
+    }
+
+
+@app.get("/stats")
+async def stats() -> Dict:
+    """Requests served so far."""
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI API for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--embed-latency-ms", type=float, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Time to first token")
+    parser.add_argument("--token-interval-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests rejected with 429")
+    parser.add_argument("--dimension", type=int, default=1536)
+    args = parser.parse_args()
+
+    config.update({
+        'embed_latency': args.embed_latency_ms / 1000,
+        'llm_latency': args.llm_latency_ms / 1000,
+        'token_interval': args.token_interval_ms / 1000,
+        'error_rate': args.error_rate,
+        'dimension': args.dimension
+    })
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -110,7 +110,7 @@ async function handleFiles(files) {
         formData.append('files', file);
     }
 
-    uploadStatus.innerHTML = '<div class="status-item processing">⏳ Processing files...</div>';
+    uploadStatus.innerHTML = '<div class="status-item processing">⏳ Uploading files...</div>';
 
     try {
         const startTime = Date.now();
@@ -120,15 +120,27 @@ async function handleFiles(files) {
         });
 
         const result = await response.json();
+
+        if (!response.ok) {
+            uploadStatus.innerHTML = `<div class="status-item error">✗ ${result.detail}</div>`;
+            showToast('Upload Failed', result.detail, 'error');
+            return;
+        }
+
+        // Upload accepted (202): poll the job until every file is indexed
+        const job = await pollJob(result.job_id);
         const uploadTime = ((Date.now() - startTime) / 1000).toFixed(1);
 
-        if (response.ok) {
+        if (job.files_done > 0) {
             uploadStatus.innerHTML = `<div class="status-item success">✓ Processed in ${uploadTime}s</div>`;
-            showToast('Upload Successful', `${result.processed} file(s) processed successfully`, 'success');
+            showToast('Upload Successful', `${job.files_done} file(s) processed successfully`, 'success');
             
-            // Add documents to list
-            Array.from(files).forEach((file) => {
-                addDocumentCard(file);
+            // Add indexed documents to list
+            job.files.forEach((jobFile) => {
+                const file = Array.from(files).find(f => f.name === jobFile.filename);
+                if (jobFile.stage === 'done' && file) {
+                    addDocumentCard(file, jobFile.chunks);
+                }
             });
 
             documentsUploaded = true;
@@ -147,9 +159,16 @@ async function handleFiles(files) {
             setTimeout(() => {
                 uploadStatus.innerHTML = '';
             }, 3000);
-        } else {
-            uploadStatus.innerHTML = `<div class="status-item error">✗ ${result.detail}</div>`;
-            showToast('Upload Failed', result.detail, 'error');
+        }
+
+        const failed = job.files.filter(f => f.stage === 'failed');
+        const rejected = result.rejected || [];
+        if (failed.length > 0 || rejected.length > 0) {
+            const messages = failed.map(f => `${f.filename}: ${f.error}`).concat(rejected);
+            if (job.files_done === 0) {
+                uploadStatus.innerHTML = `<div class="status-item error">✗ ${messages[0]}</div>`;
+            }
+            showToast('Upload Failed', messages.join('<br>'), 'error');
         }
     } catch (error) {
         uploadStatus.innerHTML = '<div class="status-item error">✗ Connection error</div>';
@@ -157,8 +176,31 @@ async function handleFiles(files) {
     }
 }
 
+// Poll GET /jobs/{id} and show per-file progress until the job finishes
+async function pollJob(jobId) {
+    while (true) {
+        const response = await fetch(`${API_BASE}/jobs/${jobId}`);
+        const job = await response.json();
+
+        if (!response.ok) {
+            throw new Error(job.detail);
+        }
+
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+
+        const finished = job.files_done + job.files_failed;
+        const active = job.files.find(f => !['queued', 'done', 'failed'].includes(f.stage));
+        const stageText = active ? ` (${active.filename}: ${active.stage})` : '';
+        uploadStatus.innerHTML = `<div class="status-item processing">⏳ Indexed ${finished}/${job.total_files} file(s)${stageText}</div>`;
+
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 // ===== DOCUMENT CARD MANAGEMENT =====
-function addDocumentCard(file) {
+function addDocumentCard(file, chunkCount = null) {
     if (documentsList.querySelector('.empty-state')) {
         documentsList.innerHTML = '';
     }
@@ -185,7 +227,7 @@ function addDocumentCard(file) {
                     <line x1="9" y1="9" x2="15" y2="9"></line>
                     <line x1="9" y1="15" x2="15" y2="15"></line>
                 </svg>
-                <span>Chunks: --</span>
+                <span>Chunks: ${chunkCount ?? '--'}</span>
             </div>
             <div class="meta-item">
                 <svg class="meta-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
@@ -350,7 +392,7 @@ async function sendQuery() {
     const startTime = Date.now();
 
     try {
-        const response = await fetch(`${API_BASE}/query`, {
+        const response = await fetch(`${API_BASE}/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -361,27 +403,58 @@ async function sendQuery() {
             })
         });
 
-        const result = await response.json();
+        if (!response.ok) {
+            const result = await response.json();
+            document.getElementById(`msg-${loadingId}`)?.remove();
+            addMessage('assistant', `⚠️ Error: ${result.detail}`, new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
+            sendButton.disabled = false;
+            return;
+        }
+
+        // Read Server-Sent Events: sources first, then answer deltas
+        let answer = '';
+        let sources = [];
+        let streamError = null;
+        let contentEl = null;
+
+        await readEventStream(response, (event, data) => {
+            if (event === 'sources') {
+                sources = data.sources;
+            } else if (event === 'delta') {
+                if (!contentEl) {
+                    // First token: swap the loading dots for a live message
+                    document.getElementById(`msg-${loadingId}`)?.remove();
+                    contentEl = addStreamingMessage(loadingId);
+                }
+                answer += data.text;
+                contentEl.textContent = answer;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (event === 'error') {
+                streamError = data.detail;
+            }
+        });
+
         const responseTime = ((Date.now() - startTime) / 1000).toFixed(1);
 
-        // Remove loading message
+        // Replace the live message with the final one (sources, copy button, timing)
         document.getElementById(`msg-${loadingId}`)?.remove();
 
-        if (response.ok) {
-            const msgTimestamp = new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+        const msgTimestamp = new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+        if (streamError) {
+            addMessage('assistant', `⚠️ Error: ${streamError}`, msgTimestamp);
+        } else {
+            answer = answer.trim();
             
             // Add to history
             chatHistory.push({ 
                 role: 'assistant', 
-                content: result.answer, 
+                content: answer, 
                 time: msgTimestamp,
-                sources: result.sources,
+                sources: sources,
                 responseTime: responseTime
             });
 
-            addMessage('assistant', result.answer, msgTimestamp, result.sources, responseTime);
-        } else {
-            addMessage('assistant', `⚠️ Error: ${result.detail}`, new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' }));
+            addMessage('assistant', answer, msgTimestamp, sources, responseTime);
         }
     } catch (error) {
         document.getElementById(`msg-${loadingId}`)?.remove();
@@ -392,6 +465,55 @@ async function sendQuery() {
     sendButton.disabled = false;
 }
 
+// Parse a text/event-stream response body, calling onEvent(event, data) per frame
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();  // keep the incomplete frame
+
+        frames.forEach((frame) => {
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach((line) => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            if (data) onEvent(event, JSON.parse(data));
+        });
+    }
+}
+
+// Assistant message whose text is filled in as tokens arrive
+function addStreamingMessage(id) {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message assistant';
+    messageDiv.id = `msg-${id}`;
+
+    messageDiv.innerHTML = `
+        <div class="message-avatar">
+            <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                <rect x="3" y="11" width="18" height="11" rx="2" ry="2"></rect>
+                <path d="M7 11V7a5 5 0 0 1 10 0v4"></path>
+            </svg>
+        </div>
+        <div class="message-wrapper">
+            <div class="message-content"></div>
+        </div>
+    `;
+
+    chatMessages.appendChild(messageDiv);
+    chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv.querySelector('.message-content');
+}
+
 // ===== ADD MESSAGE =====
 function addMessage(role, content, timestamp, sources = null, responseTime = null) {
     const messageDiv = document.createElement('div');